@@ -8,7 +8,8 @@ from alembic import context
 # Import app configuration and models
 from app.config import settings
 from app.database import Base
-from app.models import User, Account, Transaction, Category, CategoryGroup, BudgetAllocation
+# Registers every model on Base.metadata
+import app.models  # noqa: F401
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,179 @@
+"""In-process caches"""
+
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Any
+
+
+class TTLCache:
+    """
+    Bounded LRU cache whose entries expire a fixed time after being set.
+
+    Not thread safe; meant to be used from the event loop.
+    """
+
+    def __init__(self, maxsize: int, ttl_seconds: float):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for `key`, or `default` if missing or expired"""
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store `value` under `key`, evicting the least recently used entry if full"""
+        self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: Hashable) -> None:
+        """Drop `key` from the cache if present"""
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters for sizing the cache"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class ResponseCacheBackend(ABC):
+    """
+    Storage for serialized response bodies.
+
+    Entries are grouped into namespaces (one per user) so a write can drop
+    everything it may have made stale. Implement this to move the cache to
+    a shared store.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> bytes | None:
+        """Return the body stored under `key`, or None"""
+
+    @abstractmethod
+    async def set(self, namespace: str, key: str, value: bytes) -> None:
+        """Store a body under `key` in `namespace`"""
+
+    @abstractmethod
+    async def invalidate(self, namespace: str) -> None:
+        """Drop every entry in `namespace`"""
+
+    @abstractmethod
+    def stats(self) -> dict:
+        """Counters for the /stats endpoint"""
+
+
+class MemoryResponseCache(ResponseCacheBackend):
+    """
+    In-process LRU bounded by entry count, total bytes and age.
+
+    Not thread safe; meant to be used from the event loop.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        # key -> (expires_at, namespace, body)
+        self._data: OrderedDict[str, tuple[float, str, bytes]] = OrderedDict()
+        self._namespaces: dict[str, set[str]] = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _drop(self, key: str) -> None:
+        _, namespace, value = self._data.pop(key)
+        self.bytes -= len(key) + len(value)
+        keys = self._namespaces[namespace]
+        keys.discard(key)
+        if not keys:
+            del self._namespaces[namespace]
+
+    async def get(self, key: str) -> bytes | None:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, _, value = entry
+        if expires_at <= time.monotonic():
+            self._drop(key)
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    async def set(self, namespace: str, key: str, value: bytes) -> None:
+        size = len(key) + len(value)
+        # A single oversized body would flush the whole cache
+        if size > self.max_bytes // 10:
+            return
+
+        if key in self._data:
+            self._drop(key)
+        self._data[key] = (time.monotonic() + self.ttl_seconds, namespace, value)
+        self._namespaces.setdefault(namespace, set()).add(key)
+        self.bytes += size
+
+        while len(self._data) > self.max_entries or self.bytes > self.max_bytes:
+            self._drop(next(iter(self._data)))
+            self.evictions += 1
+
+    async def invalidate(self, namespace: str) -> None:
+        for key in self._namespaces.get(namespace, set()).copy():
+            self._drop(key)
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_entries": self.max_entries,
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,160 @@
+"""
+Maintenance commands.
+
+    python -m app.cli check-balances [--user-id N]
+    python -m app.cli rebuild-balances [--user-id N]
+    python -m app.cli check-activity [--user-id N]
+    python -m app.cli rebuild-activity [--user-id N]
+    python -m app.cli purge-user --user-id N
+"""
+
+import argparse
+import asyncio
+import sys
+from contextlib import asynccontextmanager
+
+from sqlalchemy import select, text
+
+from app.config import settings
+from app.database import AsyncSessionLocal, engine
+from app.models import Transaction, User
+from app.services.ledger import (
+    check_activity,
+    check_balances,
+    rebuild_activity,
+    rebuild_balances,
+)
+from app.services.purge import count_transactions, purge_user
+
+
+@asynccontextmanager
+async def maintenance_session():
+    """Session without the request statement timeout; scans can be long"""
+    async with AsyncSessionLocal() as db:
+        await db.execute(text("SET LOCAL statement_timeout = 0"))
+        yield db
+
+
+async def _check_balances(user_id: int | None) -> int:
+    async with maintenance_session() as db:
+        mismatches = await check_balances(db, user_id)
+    for mismatch in mismatches:
+        stored, expected = mismatch["stored"], mismatch["expected"]
+        print(
+            f"account {mismatch['account_id']} (user {mismatch['user_id']}): "
+            + ", ".join(
+                f"{key} {stored[key]} != {expected[key]}"
+                for key in stored if stored[key] != expected[key]
+            )
+        )
+    print(f"{len(mismatches)} account(s) out of balance")
+    return 1 if mismatches else 0
+
+
+async def _rebuild_balances(user_id: int | None) -> int:
+    async with maintenance_session() as db:
+        fixed = await rebuild_balances(db, user_id)
+        await db.commit()
+    print(f"Rebuilt {len(fixed)} account balance(s)" + (f": {fixed}" if fixed else ""))
+    return 0
+
+
+async def _check_activity(user_id: int | None) -> int:
+    async with maintenance_session() as db:
+        mismatches = await check_activity(db, user_id)
+    for mismatch in mismatches:
+        stored, expected = mismatch["stored"], mismatch["expected"]
+        print(
+            f"user {mismatch['user_id']} category {mismatch['category_id']} {mismatch['month']}: "
+            f"activity {stored['activity']} != {expected['activity']}, "
+            f"transactions {stored['transaction_count']} != {expected['transaction_count']}"
+        )
+    print(f"{len(mismatches)} category month(s) out of step")
+    return 1 if mismatches else 0
+
+
+async def _rebuild_activity(user_id: int | None) -> int:
+    async with maintenance_session() as db:
+        rows = await rebuild_activity(db, user_id)
+        await db.commit()
+    print(f"Rebuilt {rows} category month row(s)")
+    return 0
+
+
+async def _purge_user(user_id: int) -> int:
+    async with maintenance_session() as db:
+        found = (await db.execute(select(User.id).where(User.id == user_id))).scalar_one_or_none()
+        total = await count_transactions(db, Transaction.user_id == user_id)
+    if found is None:
+        print(f"No user {user_id}")
+        return 1
+
+    def progress(deleted: int) -> None:
+        print(f"Deleted {deleted}/{total} transaction(s)", file=sys.stderr, flush=True)
+
+    deleted = await purge_user(user_id, on_chunk=progress)
+    print(f"Purged user {user_id} with {deleted} transaction(s)")
+    print(
+        "Running API processes may accept the user's session for up to "
+        f"{settings.principal_cache_ttl_seconds}s from their principal cache",
+        file=sys.stderr
+    )
+    return 0
+
+
+COMMANDS = {
+    "check-balances": _check_balances,
+    "rebuild-balances": _rebuild_balances,
+    "check-activity": _check_activity,
+    "rebuild-activity": _rebuild_activity,
+    "purge-user": _purge_user,
+}
+
+
+async def _run(command: str, user_id: int | None) -> int:
+    try:
+        return await COMMANDS[command](user_id)
+    finally:
+        await engine.dispose()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.cli", description="Minty maintenance commands"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    check = subparsers.add_parser(
+        "check-balances",
+        help="Compare stored account balances with their transactions; exits 1 on mismatch"
+    )
+    check.add_argument("--user-id", type=int, help="Only check this user's accounts")
+
+    rebuild = subparsers.add_parser(
+        "rebuild-balances", help="Recompute account balances from their transactions"
+    )
+    rebuild.add_argument("--user-id", type=int, help="Only rebuild this user's accounts")
+
+    check = subparsers.add_parser(
+        "check-activity",
+        help="Compare the category activity rollup with the transactions; exits 1 on mismatch"
+    )
+    check.add_argument("--user-id", type=int, help="Only check this user's categories")
+
+    rebuild = subparsers.add_parser(
+        "rebuild-activity", help="Recompute (or backfill) the category activity rollup"
+    )
+    rebuild.add_argument("--user-id", type=int, help="Only rebuild this user's categories")
+
+    purge = subparsers.add_parser(
+        "purge-user",
+        help="Delete a user and all their data, in chunks of PURGE_CHUNK_SIZE transactions"
+    )
+    purge.add_argument("--user-id", type=int, required=True)
+
+    args = parser.parse_args(argv)
+    return asyncio.run(_run(args.command, args.user_id))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
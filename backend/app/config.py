@@ -13,10 +13,51 @@ class Settings(BaseSettings):
 
     # Database
     database_url: str
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout_seconds: float = 30
+    db_pool_recycle_seconds: int = 1800
+    # Ping each connection on checkout; only needed behind proxies that
+    # drop idle connections sooner than db_pool_recycle_seconds
+    db_pool_pre_ping: bool = False
+    # Per-statement limit set on every connection; 0 disables it
+    db_statement_timeout_ms: int = 30000
 
     # Clerk Authentication
     clerk_secret_key: str
     clerk_publishable_key: str
+    clerk_jwks_url: str = "https://api.clerk.com/v1/jwks"
+    clerk_jwks_ttl_seconds: int = 3600
+    clerk_issuer: str | None = None
+    clerk_authorized_parties: list[str] = []
+
+    # Authenticated principal cache (clerk_user_id -> user)
+    principal_cache_size: int = 10000
+    principal_cache_ttl_seconds: int = 300
+
+    # Per-user cache of read endpoint responses (opt-in)
+    response_cache_enabled: bool = False
+    response_cache_max_entries: int = 10000
+    response_cache_max_bytes: int = 64 * 1024 * 1024
+    response_cache_ttl_seconds: int = 300
+
+    # Query debugging for development and tests: count statements per
+    # request, warn about repeated statements and check query budgets
+    query_debug: bool = False
+    query_repeat_threshold: int = 2
+    # Fail requests that go over their query budget instead of warning
+    query_budget_strict: bool = False
+
+    # Bearer token for /metrics and /stats; unset disables both endpoints
+    metrics_token: str | None = None
+
+    # Largest statement POST /api/transactions/import accepts
+    import_max_bytes: int = 50 * 1024 * 1024
+
+    # Accounts with more transactions than this are deleted by a background
+    # purge, which commits purge_chunk_size transactions at a time
+    purge_background_threshold: int = 10000
+    purge_chunk_size: int = 5000
 
     model_config = SettingsConfigDict(
         env_file=".env",
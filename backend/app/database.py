@@ -1,28 +1,99 @@
 """Database connection and session management"""
 
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from app.config import settings
+from app.metrics import Histogram, instrument_engine
+
+
+def async_database_url(url: str) -> str:
+    """Point a plain postgresql:// URL at the asyncpg driver"""
+    parsed = make_url(url)
+    if parsed.drivername in ("postgresql", "postgresql+psycopg2"):
+        parsed = parsed.set(drivername="postgresql+asyncpg")
+    return parsed.render_as_string(hide_password=False)
+
+
+class MeteredQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that records how long each checkout waits.
+
+    The wait covers queueing for a free connection and opening a new one
+    when the pool is below its limit. Counters restart when the pool is
+    recreated (engine.dispose()).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkout_wait = Histogram()
+        self.checkout_timeouts = 0
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.checkout_timeouts += 1
+            raise
+        finally:
+            self.checkout_wait.observe(time.perf_counter() - start)
+
 
 # Create database engine
-engine = create_engine(
-    settings.database_url,
-    pool_pre_ping=True,
+# Liveness without a ping per checkout: a statement that fails with a
+# disconnect error invalidates the whole pool, so a database restart costs
+# one failed request per worker; connections are retired after
+# db_pool_recycle_seconds, before server or proxy idle timeouts close them;
+# LIFO checkout keeps the busy connections warm and lets surplus ones idle
+# out to be recycled.
+engine = create_async_engine(
+    async_database_url(settings.database_url),
+    poolclass=MeteredQueuePool,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout_seconds,
+    pool_recycle=settings.db_pool_recycle_seconds,
+    pool_pre_ping=settings.db_pool_pre_ping,
+    pool_use_lifo=True,
+    connect_args={
+        "server_settings": {"statement_timeout": str(settings.db_statement_timeout_ms)}
+    },
     echo=settings.debug
 )
+instrument_engine(engine)
 
 # Create session
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(
+    bind=engine,
+    autoflush=False,
+    expire_on_commit=False
+)
 
 Base = declarative_base()
 
 
-def get_db():
+def pool_stats() -> dict:
+    """Live connection pool usage for the /stats endpoint"""
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "max_overflow": settings.db_max_overflow,
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        # Negative while the pool has not opened pool_size connections yet
+        "overflow": max(pool.overflow(), 0),
+        "timeouts": pool.checkout_timeouts,
+        "checkout_wait_seconds": pool.checkout_wait.stats(),
+    }
+
+
+async def get_db():
     """get database session"""
-    db = SessionLocal()
-    try:
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
@@ -0,0 +1,210 @@
+"""Bank statement parsers for bulk transaction import"""
+
+import csv
+import html
+import re
+import time
+from collections.abc import Iterator
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from typing import IO, NamedTuple
+
+
+class ParsedRow(NamedTuple):
+    """One statement row: transaction fields, or the reason it could not be read"""
+    row: int
+    data: dict | None = None
+    error: str | None = None
+
+
+FORMATS = ("csv", "ofx", "qif")
+
+_CSV_DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%m/%d/%y", "%d.%m.%Y")
+_TRUE_VALUES = {"1", "true", "yes", "y", "x", "c", "*", "cleared", "reconciled", "r"}
+
+
+def detect_format(filename: str | None) -> str | None:
+    """Guess the statement format from the upload's file extension"""
+    if not filename or "." not in filename:
+        return None
+    extension = filename.rsplit(".", 1)[-1].lower()
+    if extension == "qfx":
+        return "ofx"
+    return extension if extension in FORMATS else None
+
+
+def parse_amount(value: str) -> Decimal:
+    """Parse amounts like '-1,234.56', '$12.00' or '(12.00)'"""
+    cleaned = value.strip().replace(",", "").replace("$", "")
+    negative = cleaned.startswith("(") and cleaned.endswith(")")
+    if negative:
+        cleaned = cleaned[1:-1]
+    try:
+        amount = Decimal(cleaned)
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount: {value!r}") from None
+    return -amount if negative else amount
+
+
+def parse_date(value: str, formats: tuple[str, ...] = _CSV_DATE_FORMATS) -> date:
+    value = value.strip()
+    for fmt in formats:
+        try:
+            return date(*time.strptime(value, fmt)[:3])
+        except ValueError:
+            continue
+    raise ValueError(f"Invalid date: {value!r}")
+
+
+def _parse_bool(value: str | None) -> bool:
+    return (value or "").strip().lower() in _TRUE_VALUES
+
+
+def _parse_id(value: str | None) -> int | None:
+    value = (value or "").strip()
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"Invalid id: {value!r}") from None
+
+
+def parse_csv(stream: IO[str]) -> Iterator[ParsedRow]:
+    """
+    Parse a CSV with a header row.
+
+    Required columns: date, payee, amount. Optional: memo, cleared,
+    category_id, account_id. Column names are case insensitive.
+    """
+    reader = csv.DictReader(stream)
+    if reader.fieldnames is None:
+        return
+    reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+
+    missing = {"date", "payee", "amount"} - set(reader.fieldnames)
+    if missing:
+        yield ParsedRow(1, error=f"Missing columns: {', '.join(sorted(missing))}")
+        return
+
+    for record in reader:
+        # Header is row 1
+        row = reader.line_num
+        try:
+            yield ParsedRow(row, data={
+                "date": parse_date(record["date"] or ""),
+                "payee": (record["payee"] or "").strip(),
+                "amount": parse_amount(record["amount"] or ""),
+                "memo": (record.get("memo") or "").strip() or None,
+                "cleared": _parse_bool(record.get("cleared")),
+                "category_id": _parse_id(record.get("category_id")),
+                "account_id": _parse_id(record.get("account_id")),
+            })
+        except ValueError as e:
+            yield ParsedRow(row, error=str(e))
+
+
+_OFX_TAG = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<\r\n]*)")
+
+
+def _ofx_row(row: int, fields: dict[str, str]) -> ParsedRow:
+    try:
+        payee = fields.get("NAME") or fields.get("PAYEE") or fields.get("MEMO") or ""
+        memo = fields.get("MEMO") if fields.get("MEMO") != payee else None
+        return ParsedRow(row, data={
+            # DTPOSTED is YYYYMMDD optionally followed by time and timezone
+            "date": parse_date(fields.get("DTPOSTED", "")[:8], ("%Y%m%d",)),
+            "payee": payee.strip(),
+            "amount": parse_amount(fields.get("TRNAMT", "")),
+            "memo": memo.strip() if memo else None,
+            "cleared": True,
+            "category_id": None,
+            "account_id": None,
+        })
+    except ValueError as e:
+        return ParsedRow(row, error=str(e))
+
+
+def parse_ofx(stream: IO[str]) -> Iterator[ParsedRow]:
+    """
+    Parse the STMTTRN records of an OFX/QFX statement (SGML v1 or XML v2).
+
+    Statement transactions are already posted, so they import as cleared.
+    Rows are numbered by their position among the transactions. Character
+    references in values (&amp;, &#39;) are decoded.
+    """
+    fields: dict[str, str] | None = None
+    row = 0
+
+    for line in stream:
+        for closing, name, value in _OFX_TAG.findall(line):
+            tag = name.upper()
+            if tag == "STMTTRN":
+                if closing and fields is not None:
+                    row += 1
+                    yield _ofx_row(row, fields)
+                    fields = None
+                elif not closing:
+                    fields = {}
+            elif fields is not None and not closing and value.strip():
+                fields[tag] = html.unescape(value.strip())
+
+
+def _qif_date(value: str) -> date:
+    # Quicken writes dates like 1/31/2024, 1/31'24 or 1-31-24
+    parts = re.split(r"[/'\-.]", value.strip().replace(" ", ""))
+    if len(parts) != 3:
+        raise ValueError(f"Invalid date: {value!r}")
+    try:
+        month, day, year = (int(part) for part in parts)
+    except ValueError:
+        raise ValueError(f"Invalid date: {value!r}") from None
+    if year < 100:
+        year += 1900 if year >= 70 else 2000
+    try:
+        return date(year, month, day)
+    except ValueError:
+        raise ValueError(f"Invalid date: {value!r}") from None
+
+
+def _qif_row(row: int, fields: dict[str, str]) -> ParsedRow:
+    try:
+        return ParsedRow(row, data={
+            "date": _qif_date(fields.get("D", "")),
+            "payee": fields.get("P", "").strip(),
+            "amount": parse_amount(fields.get("T") or fields.get("U") or ""),
+            "memo": fields.get("M", "").strip() or None,
+            "cleared": fields.get("C", "").strip().upper() in ("*", "C", "X", "R"),
+            "category_id": None,
+            "account_id": None,
+        })
+    except ValueError as e:
+        return ParsedRow(row, error=str(e))
+
+
+def parse_qif(stream: IO[str]) -> Iterator[ParsedRow]:
+    """
+    Parse a bank/cash/credit card QIF file.
+
+    Records end with '^'; rows are numbered by the line that ends them.
+    Split (S/E/$) and category (L) lines are ignored.
+    """
+    fields: dict[str, str] = {}
+    for line_number, raw_line in enumerate(stream, start=1):
+        line = raw_line.rstrip("\r\n")
+        if not line or line.startswith("!"):
+            continue
+        code, value = line[0], line[1:]
+        if code == "^":
+            if fields:
+                yield _qif_row(line_number, fields)
+            fields = {}
+        elif code in "DTUPMC":
+            fields.setdefault(code, value)
+
+
+PARSERS = {
+    "csv": parse_csv,
+    "ofx": parse_ofx,
+    "qif": parse_qif,
+}
@@ -1,10 +1,35 @@
 """FastAPI application entry point"""
 
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
 from app.config import settings
-from app.routers import accounts, transactions, categories, budget
+from app.database import engine, pool_stats
+from app.metrics import PROMETHEUS_CONTENT_TYPE, render_prometheus
+from app.middleware.auth import jwks_cache, principal_cache, require_metrics_token
+from app.middleware.limits import BodySizeLimitMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.responses import FastJSONResponse
+from app.routers import accounts, transactions, categories, budget, sync
+from app.services.response_cache import (
+    ResponseCacheHit,
+    response_cache,
+    response_cache_hit_handler,
+)
+from app.services.purge import purges
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop background tasks"""
+    await jwks_cache.start()
+    yield
+    await purges.stop()
+    await jwks_cache.stop()
+
 
 # Create FastAPI
 app = FastAPI(
@@ -12,7 +37,16 @@ app = FastAPI(
     version="0.1.0",
     description="Envelope budgeting application API",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan
+)
+
+# Refuse oversized statement uploads before they are spooled; the slack
+# covers the multipart envelope around the file
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    limits={"/api/transactions/import": lambda: settings.import_max_bytes + 64 * 1024},
 )
 
 # Configure CORS
@@ -23,12 +57,17 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Added last so it wraps everything, CORS included
+app.add_middleware(MetricsMiddleware)
+
+app.add_exception_handler(ResponseCacheHit, response_cache_hit_handler)
 
 # Register API routers
 app.include_router(accounts.router, prefix="/api")
 app.include_router(transactions.router, prefix="/api")
 app.include_router(categories.router, prefix="/api")
 app.include_router(budget.router, prefix="/api")
+app.include_router(sync.router, prefix="/api")
 
 
 @app.get("/")
@@ -45,3 +84,24 @@ async def root():
 async def health_check():
     """Health check for monitoring"""
     return {"status": "healthy"}
+
+
+@app.get("/stats", dependencies=[Depends(require_metrics_token)], include_in_schema=False)
+async def stats():
+    """In-process cache and connection pool statistics for capacity planning"""
+    return {
+        "db_pool": pool_stats(),
+        "principal_cache": principal_cache.stats(),
+        "response_cache": response_cache.stats() if response_cache is not None else None,
+    }
+
+
+@app.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    dependencies=[Depends(require_metrics_token)],
+    include_in_schema=False,
+)
+async def prometheus_metrics():
+    """Request, SQL and connection pool metrics in Prometheus text format"""
+    return PlainTextResponse(render_prometheus(engine.pool), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,215 @@
+"""In-process metrics and their Prometheus text exposition"""
+
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import event
+
+# Upper bounds in seconds, from a fast pool checkout to a pool timeout
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram of durations in seconds.
+
+    Buckets are cumulative, as in Prometheus: each bound counts the
+    observations less than or equal to it. Not thread safe; meant to be
+    updated from the event loop.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self._counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def cumulative(self) -> list[tuple[float, int]]:
+        """(upper bound, count) pairs, ending with +Inf"""
+        pairs = []
+        total = 0
+        for bound, count in zip((*self.buckets, float("inf")), self._counts, strict=True):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+    def stats(self) -> dict:
+        return {
+            "count": self.count,
+            "sum_seconds": round(self.sum, 6),
+            "buckets": {
+                _format_bound(bound): count for bound, count in self.cumulative()
+            },
+        }
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """A request ran more statements than its declared query budget"""
+
+
+@dataclass
+class RequestStats:
+    """SQL issued while serving one request"""
+
+    statements: int = 0
+    db_seconds: float = 0.0
+    # With query debugging on: times each statement text ran, so the same
+    # query repeated with different parameters (an N+1) stands out
+    statement_counts: dict[str, int] | None = None
+    # Statement count the request may reach, set by query_budget()
+    budget: int | None = None
+    budget_strict: bool = False
+
+
+class RouteMetrics:
+    """Counters for one (method, route template) pair"""
+
+    __slots__ = ("db_duration", "duration", "in_progress", "statements", "statuses")
+
+    def __init__(self):
+        self.in_progress = 0
+        self.statuses: dict[int, int] = {}
+        self.duration = Histogram()
+        self.db_duration = Histogram()
+        self.statements = 0
+
+
+# Stats of the request being served, if any; engine events add to it
+current_request: ContextVar[RequestStats | None] = ContextVar("current_request", default=None)
+
+
+class Metrics:
+    """Process-wide registry read by the /metrics endpoint"""
+
+    def __init__(self):
+        self.routes: dict[tuple[str, str], RouteMetrics] = {}
+        self.statement_duration = Histogram()
+
+    def route(self, method: str, route: str) -> RouteMetrics:
+        key = (method, route)
+        metrics = self.routes.get(key)
+        if metrics is None:
+            metrics = self.routes[key] = RouteMetrics()
+        return metrics
+
+
+metrics = Metrics()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_start = time.perf_counter()
+    stats = current_request.get()
+    if stats is None:
+        return
+    stats.statements += 1
+    if stats.statement_counts is not None and not executemany:
+        stats.statement_counts[statement] = stats.statement_counts.get(statement, 0) + 1
+    if stats.budget_strict and stats.statements > stats.budget:
+        raise QueryBudgetExceeded(
+            f"statement {stats.statements} exceeds the query budget of {stats.budget}: "
+            + " ".join(statement.split())
+        )
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._metrics_start
+    metrics.statement_duration.observe(elapsed)
+    stats = current_request.get()
+    if stats is not None:
+        stats.db_seconds += elapsed
+
+
+def instrument_engine(engine) -> None:
+    """Time every statement run through `engine` (sync or async)"""
+    target = getattr(engine, "sync_engine", engine)
+    event.listen(target, "before_cursor_execute", _before_cursor_execute)
+    event.listen(target, "after_cursor_execute", _after_cursor_execute)
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else str(bound)
+
+
+def _escape(value: object) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: object) -> str:
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _header(lines: list[str], name: str, kind: str, help_text: str) -> None:
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+
+
+def _histogram(lines: list[str], name: str, histogram: Histogram, **labels: object) -> None:
+    for bound, count in histogram.cumulative():
+        lines.append(f"{name}_bucket{_labels(**labels, le=_format_bound(bound))} {count}")
+    suffix = _labels(**labels) if labels else ""
+    lines.append(f"{name}_sum{suffix} {histogram.sum}")
+    lines.append(f"{name}_count{suffix} {histogram.count}")
+
+
+def render_prometheus(pool=None) -> str:
+    """
+    All metrics in Prometheus text format (0.0.4).
+
+    Pass the engine's MeteredQueuePool to include connection pool gauges.
+    """
+    lines: list[str] = []
+    routes = [
+        ({"method": method, "route": route}, m)
+        for (method, route), m in sorted(metrics.routes.items())
+    ]
+
+    _header(lines, "http_requests_total", "counter", "Requests by route template and status")
+    for labels, m in routes:
+        for status_code, count in sorted(m.statuses.items()):
+            lines.append(f"http_requests_total{_labels(**labels, status=status_code)} {count}")
+
+    _header(lines, "http_requests_in_progress", "gauge", "Requests being served")
+    for labels, m in routes:
+        lines.append(f"http_requests_in_progress{_labels(**labels)} {m.in_progress}")
+
+    _header(lines, "http_request_duration_seconds", "histogram", "Request latency")
+    for labels, m in routes:
+        _histogram(lines, "http_request_duration_seconds", m.duration, **labels)
+
+    _header(lines, "http_request_db_statements_total", "counter", "SQL statements run by requests")
+    for labels, m in routes:
+        lines.append(f"http_request_db_statements_total{_labels(**labels)} {m.statements}")
+
+    _header(lines, "http_request_db_duration_seconds", "histogram", "Database time per request")
+    for labels, m in routes:
+        _histogram(lines, "http_request_db_duration_seconds", m.db_duration, **labels)
+
+    _header(lines, "db_statement_duration_seconds", "histogram", "Latency of each SQL statement")
+    _histogram(lines, "db_statement_duration_seconds", metrics.statement_duration)
+
+    if pool is not None:
+        for name, value, help_text in (
+            ("db_pool_size", pool.size(), "Connections kept open by the pool"),
+            ("db_pool_checked_out", pool.checkedout(), "Connections in use"),
+            ("db_pool_idle", pool.checkedin(), "Connections waiting in the pool"),
+            ("db_pool_overflow", max(pool.overflow(), 0), "Connections open beyond the pool size"),
+        ):
+            _header(lines, name, "gauge", help_text)
+            lines.append(f"{name} {value}")
+        _header(lines, "db_pool_timeouts_total", "counter", "Checkouts that hit the pool timeout")
+        lines.append(f"db_pool_timeouts_total {pool.checkout_timeouts}")
+        _header(
+            lines, "db_pool_checkout_wait_seconds", "histogram", "Time waiting for a connection"
+        )
+        _histogram(lines, "db_pool_checkout_wait_seconds", pool.checkout_wait)
+
+    return "\n".join(lines) + "\n"
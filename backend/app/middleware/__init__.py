@@ -1,5 +1,6 @@
 """Middleware components"""
 
 from app.middleware.auth import get_current_user, get_current_user_optional
+from app.middleware.metrics import query_budget
 
-__all__ = ["get_current_user", "get_current_user_optional"]
+__all__ = ["get_current_user", "get_current_user_optional", "query_budget"]
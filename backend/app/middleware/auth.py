@@ -1,63 +1,157 @@
 """Clerk authentication middleware"""
 
+import hmac
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from clerk_backend_api import Clerk
 
+from app.cache import TTLCache
 from app.config import settings
 from app.database import get_db
+from app.middleware.jwks import JWKSCache
 from app.models import User
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 clerk = Clerk(bearer_auth=settings.clerk_secret_key)
 
+jwks_cache = JWKSCache(
+    settings.clerk_jwks_url,
+    ttl_seconds=settings.clerk_jwks_ttl_seconds,
+    headers={"Authorization": f"Bearer {settings.clerk_secret_key}"},
+)
+
+# clerk_user_id -> (user id, email) for users we have already resolved
+principal_cache = TTLCache(
+    maxsize=settings.principal_cache_size,
+    ttl_seconds=settings.principal_cache_ttl_seconds,
+)
+
+
+def _unauthorized(e: Exception) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=f"Invalid authentication token: {str(e)}",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def _principal_user(clerk_user_id: str, principal: tuple[int, str]) -> User:
+    """Build a detached User from cached identity columns"""
+    user_id, email = principal
+    return User(id=user_id, clerk_user_id=clerk_user_id, email=email)
+
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> User:
     """
     Dependency to get the current authenticated user.
 
-    - Verifies the Clerk JWT token using Clerk SDK
-    - Gets or creates the user in our database
-    - Returns the User object
+    - Verifies the Clerk JWT locally against the cached JWKS
+    - Resolves the user from the principal cache, then the database
+    - Creates the user with an atomic upsert on first login, which is the
+      only time the Clerk users API is called; 409 if another user already
+      has the email address
+    - Returns a User that is not attached to the request's session
     """
     token = credentials.credentials
 
     try:
-        # Verify token using Clerk SDK
-        verified_token = clerk.verify_token(token)
-        clerk_user_id = verified_token.sub
+        claims = await jwks_cache.verify(
+            token,
+            issuer=settings.clerk_issuer,
+            authorized_parties=settings.clerk_authorized_parties,
+        )
+        clerk_user_id = claims["sub"]
+    except Exception as e:
+        raise _unauthorized(e) from e
 
-        # Get user details from Clerk
-        clerk_user = clerk.users.get(user_id=clerk_user_id)
-        if not clerk_user:
-            raise ValueError("User does not exist")
+    principal = principal_cache.get(clerk_user_id)
+    if principal is not None:
+        return _principal_user(clerk_user_id, principal)
 
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail=f"Invalid authentication token: {str(e)}",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    result = await db.execute(
+        select(User.id, User.email).where(User.clerk_user_id == clerk_user_id)
+    )
+    row = result.first()
 
-    # Get or create user in our database
-    user = db.query(User).filter(User.clerk_user_id == clerk_user_id).first()
+    if not row:
+        # Get user details from Clerk
+        try:
+            clerk_user = await clerk.users.get_async(user_id=clerk_user_id)
+            if not clerk_user:
+                raise ValueError("User does not exist")
+        except Exception as e:
+            raise _unauthorized(e) from e
 
-    if not user:
-        # Create new user if doesn't exist
         email = None
         if clerk_user.email_addresses:
             email = clerk_user.email_addresses[0].email_address
 
-        user = User(
-            clerk_user_id=clerk_user_id,
-            email=email or f"{clerk_user_id}@unknown.com"
+        # Concurrent first requests for the same user all land on the same row
+        stmt = (
+            insert(User)
+            .values(
+                clerk_user_id=clerk_user_id,
+                email=email or f"{clerk_user_id}@unknown.com"
+            )
+            .on_conflict_do_update(
+                index_elements=[User.clerk_user_id],
+                set_={"email": User.email}
+            )
+            .returning(User.id, User.email)
         )
-        db.add(user)
-        db.commit()
-        db.refresh(user)
+        try:
+            row = (await db.execute(stmt)).one()
+        except IntegrityError:
+            # Email is unique too. Another Clerk user owns this address, and
+            # handing their data to whoever signs up with it next is not safe
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="This email address belongs to another user",
+            ) from None
+        await db.commit()
+
+    principal = (row.id, row.email)
+    principal_cache.set(clerk_user_id, principal)
+    return _principal_user(clerk_user_id, principal)
+
+
+async def get_current_user_optional(
+    credentials: HTTPAuthorizationCredentials | None = Depends(optional_security),
+    db: AsyncSession = Depends(get_db)
+) -> User | None:
+    """Like get_current_user, but returns None when no bearer token is sent"""
+    if credentials is None:
+        return None
+    return await get_current_user(credentials, db)
+
 
-    return user
+async def require_metrics_token(
+    credentials: HTTPAuthorizationCredentials | None = Depends(optional_security)
+) -> None:
+    """
+    Dependency guarding the internal /metrics and /stats endpoints.
+
+    They expose route templates, pool state and cache statistics, so they
+    answer 404 unless METRICS_TOKEN is set, and 401 without that token.
+    """
+    if not settings.metrics_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if credentials is None or not hmac.compare_digest(
+        credentials.credentials.encode(), settings.metrics_token.encode()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
@@ -0,0 +1,146 @@
+"""Cached JWKS for local Clerk session token verification"""
+
+import asyncio
+import contextlib
+import logging
+import time
+
+import httpx
+from jose import jwk, jwt
+from jose.backends.base import Key
+
+logger = logging.getLogger(__name__)
+
+# Clerk signs session tokens with RS256
+ALGORITHMS = ["RS256"]
+
+
+class JWKSCache:
+    """
+    In-memory copy of the issuer's JSON Web Key Set.
+
+    - Keys are fetched once and reused until the TTL expires
+    - A background task refreshes the set every TTL so requests never wait on it
+    - An unknown `kid` forces a refresh (rate limited) to pick up rotated keys
+    - A failed refresh keeps serving the cached keys, and is not retried
+      for `min_refresh_interval` so an issuer outage does not stall every request
+    """
+
+    def __init__(
+        self,
+        url: str,
+        ttl_seconds: float = 3600,
+        min_refresh_interval: float = 30,
+        headers: dict[str, str] | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self.url = url
+        self.ttl_seconds = ttl_seconds
+        self.min_refresh_interval = min_refresh_interval
+        self._headers = headers or {}
+        self._transport = transport
+        self._keys: dict[str, Key] = {}
+        self._fetched_at = 0.0
+        self._attempted_at = float("-inf")
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() - self._fetched_at >= self.ttl_seconds
+
+    @property
+    def retry_due(self) -> bool:
+        return time.monotonic() - self._attempted_at >= self.min_refresh_interval
+
+    async def refresh(self) -> None:
+        """Fetch the key set from the issuer and replace the cached keys"""
+        self._attempted_at = time.monotonic()
+        async with httpx.AsyncClient(transport=self._transport, timeout=10) as client:
+            response = await client.get(self.url, headers=self._headers)
+            response.raise_for_status()
+
+        keys = {}
+        for key_data in response.json().get("keys", []):
+            if key_data.get("kid") and key_data.get("kty") == "RSA":
+                keys[key_data["kid"]] = jwk.construct(key_data, algorithm=ALGORITHMS[0])
+
+        self._keys = keys
+        self._fetched_at = time.monotonic()
+
+    async def _refresh_if(self, needed) -> None:
+        async with self._lock:
+            # Another request may have refreshed (or tried to) while we waited for the lock
+            if not needed():
+                return
+            try:
+                await self.refresh()
+            except Exception:
+                if not self._keys:
+                    raise
+                logger.exception("Failed to refresh JWKS from %s; serving cached keys", self.url)
+
+    async def get_key(self, kid: str) -> Key:
+        """Return the verification key for `kid`, refreshing the set if needed"""
+        if (not self._keys or self.expired) and self.retry_due:
+            await self._refresh_if(lambda: (not self._keys or self.expired) and self.retry_due)
+
+        key = self._keys.get(kid)
+        if key is None and self.retry_due:
+            await self._refresh_if(lambda: kid not in self._keys and self.retry_due)
+            key = self._keys.get(kid)
+
+        if key is None:
+            raise ValueError(f"Unknown signing key: {kid}")
+        return key
+
+    async def verify(
+        self,
+        token: str,
+        issuer: str | None = None,
+        authorized_parties: list[str] | None = None,
+    ) -> dict:
+        """Verify a session token's signature and claims locally, returning its claims"""
+        header = jwt.get_unverified_header(token)
+        key = await self.get_key(header.get("kid", ""))
+
+        claims = jwt.decode(
+            token,
+            key,
+            algorithms=ALGORITHMS,
+            issuer=issuer,
+            options={"verify_aud": False, "leeway": 5},
+        )
+
+        if authorized_parties and claims.get("azp") not in authorized_parties:
+            raise ValueError("Token was issued for an unauthorized party")
+        if not claims.get("sub"):
+            raise ValueError("Token has no subject")
+
+        return claims
+
+    async def _refresh_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.ttl_seconds)
+            try:
+                await self._refresh_if(lambda: True)
+            except Exception:
+                # Nothing cached to fall back on; the next cycle or a request retries
+                logger.exception("Failed to refresh JWKS from %s", self.url)
+
+    async def start(self) -> None:
+        """Prime the key set and start the background refresh task"""
+        try:
+            await self.refresh()
+        except Exception:
+            logger.exception("Failed to prime JWKS from %s", self.url)
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_periodically())
+
+    async def stop(self) -> None:
+        """Cancel the background refresh task"""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
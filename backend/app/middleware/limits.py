@@ -0,0 +1,55 @@
+"""Request body size limits"""
+
+from collections.abc import Callable
+
+from fastapi import HTTPException, status
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.responses import FastJSONResponse
+
+
+class BodySizeLimitMiddleware:
+    """
+    Reject request bodies over a per-path byte limit with 413.
+
+    Form parsing spools a whole upload to disk before the endpoint runs, so
+    a size check in the endpoint comes too late. A declared Content-Length
+    over the limit is refused without reading the body; bodies without one
+    are counted as they arrive and cut off once they pass it. Limits are
+    callables so they follow settings changed at runtime.
+    """
+
+    def __init__(self, app: ASGIApp, limits: dict[str, Callable[[], int]]):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        limit = self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        max_bytes = limit()
+        detail = f"Request body is larger than {max_bytes} bytes"
+        for name, value in scope["headers"]:
+            if name == b"content-length" and value.isdigit() and int(value) > max_bytes:
+                response = FastJSONResponse(
+                    {"detail": detail}, status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+                )
+                await response(scope, receive, send)
+                return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_bytes:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=detail
+                    )
+            return message
+
+        await self.app(scope, limited_receive, send)
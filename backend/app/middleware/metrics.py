@@ -0,0 +1,128 @@
+"""Request metrics middleware and query budgets"""
+
+import logging
+import time
+from functools import lru_cache
+
+from fastapi import Depends
+from starlette.datastructures import MutableHeaders
+from starlette.routing import BaseRoute, Match
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.config import settings
+from app.metrics import RequestStats, current_request, metrics
+from app.middleware.auth import get_current_user
+from app.models import User
+
+logger = logging.getLogger(__name__)
+
+# Label for requests that match no route, so scanners can't grow the label set
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def route_template(routes: list[BaseRoute], method: str, path: str) -> str:
+    """The path template of the route that will serve a request"""
+    scope = {"type": "http", "method": method, "path": path, "root_path": ""}
+    partial = None
+    for route in routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+        if match == Match.PARTIAL and partial is None:
+            # Path matched but the method didn't (405)
+            partial = route.path
+    return partial or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """
+    Record count, latency, in-flight requests and SQL per route template.
+
+    Pure ASGI rather than BaseHTTPMiddleware, so streaming responses are not
+    buffered and the per-request cost is a cached route lookup and a few
+    counter updates. Requests are labelled by route template
+    (/api/accounts/{account_id}), never by raw path.
+    """
+
+    def __init__(self, app: ASGIApp, cache_size: int = 4096):
+        self.app = app
+        # Matching every route costs tens of microseconds, so templates are
+        # cached per method and path; the LRU bound caps paths with ids
+        self._route_template = lru_cache(maxsize=cache_size)(self._match)
+        self._routes: list[BaseRoute] | None = None
+
+    def _match(self, method: str, path: str) -> str:
+        return route_template(self._routes, method, path)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if self._routes is None:
+            self._routes = scope["app"].router.routes
+        method = scope["method"]
+        route = self._route_template(method, scope["path"])
+        route_metrics = metrics.route(method, route)
+        status_code = 500
+        stats = RequestStats(statement_counts={} if settings.query_debug else None)
+
+        async def send_with_status(message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if stats.statement_counts is not None:
+                    MutableHeaders(scope=message).append("X-Query-Count", str(stats.statements))
+            await send(message)
+
+        token = current_request.set(stats)
+        route_metrics.in_progress += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route_metrics.duration.observe(time.perf_counter() - start)
+            route_metrics.in_progress -= 1
+            current_request.reset(token)
+            route_metrics.statuses[status_code] = route_metrics.statuses.get(status_code, 0) + 1
+            route_metrics.db_duration.observe(stats.db_seconds)
+            route_metrics.statements += stats.statements
+            if stats.statement_counts is not None:
+                report_queries(stats, method, route)
+
+
+def report_queries(stats: RequestStats, method: str, route: str) -> None:
+    """Log repeated statements and query budget overruns of one request"""
+    for statement, count in stats.statement_counts.items():
+        if count >= settings.query_repeat_threshold:
+            logger.warning(
+                "%s %s ran the same statement %d times (N+1?): %s",
+                method, route, count, " ".join(statement.split())
+            )
+    if stats.budget is not None and stats.statements > stats.budget:
+        logger.warning(
+            "%s %s ran %d statements, over its query budget of %d",
+            method, route, stats.statements, stats.budget
+        )
+
+
+def query_budget(statements: int):
+    """
+    Route dependency declaring how many statements the endpoint may run.
+
+    Counted after authentication, whose principal lookup may or may not hit
+    the database. Only checked with query debugging on: over-budget
+    requests are logged, or fail with QueryBudgetExceeded at the offending
+    statement in strict mode.
+
+        @router.get("/", dependencies=[Depends(query_budget(2))])
+    """
+
+    async def check_query_budget(current_user: User = Depends(get_current_user)) -> None:
+        stats = current_request.get()
+        if stats is None or stats.statement_counts is None:
+            return
+        stats.budget = stats.statements + statements
+        stats.budget_strict = settings.query_budget_strict
+
+    return check_query_budget
@@ -5,6 +5,8 @@ from app.models.account import Account, AccountType
 from app.models.category import Category, CategoryGroup
 from app.models.transaction import Transaction
 from app.models.budget import BudgetAllocation
+from app.models.activity import CategoryMonthActivity
+from app.models.sync import SyncChange
 
 __all__ = [
     "User",
@@ -14,4 +16,6 @@ __all__ = [
     "CategoryGroup",
     "Transaction",
     "BudgetAllocation",
+    "CategoryMonthActivity",
+    "SyncChange",
 ]
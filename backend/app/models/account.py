@@ -1,6 +1,6 @@
 """Account model"""
 
-from sqlalchemy import Column, Integer, String, Numeric, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Numeric, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 import enum
 
@@ -21,12 +21,22 @@ class Account(Base):
 
     __tablename__ = "accounts"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     name = Column(String, nullable=False)
     type = Column(Enum(AccountType), nullable=False)
+    # Maintained by the server from transaction writes (see app.services.ledger)
     balance = Column(Numeric(precision=15, scale=2), default=0, nullable=False)
+    cleared_balance = Column(Numeric(precision=15, scale=2), default=0, nullable=False)
+    uncleared_balance = Column(Numeric(precision=15, scale=2), default=0, nullable=False)
 
     # Relationships
     user = relationship("User", back_populates="accounts")
-    transactions = relationship("Transaction", back_populates="account", cascade="all, delete-orphan")
+    # Deleted by the database's ON DELETE CASCADE, not loaded (see User)
+    transactions = relationship(
+        "Transaction", back_populates="account", cascade="all, delete-orphan", passive_deletes=True
+    )
+
+    __table_args__ = (
+        Index("idx_accounts_user_id", "user_id"),
+    )
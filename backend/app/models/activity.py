@@ -0,0 +1,27 @@
+"""Category activity rollup model"""
+
+from sqlalchemy import Column, Integer, Numeric, String, ForeignKey, Index
+
+from app.database import Base
+
+
+class CategoryMonthActivity(Base):
+    """
+    Net transaction amount per category per month.
+
+    Maintained by app.services.ledger alongside every transaction write, so
+    budget and report reads scan these rows instead of the transactions.
+    """
+
+    __tablename__ = "category_month_activity"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    category_id = Column(Integer, ForeignKey("categories.id", ondelete="CASCADE"), primary_key=True)
+    month = Column(String, primary_key=True)  # Format: YYYY-MM
+    activity = Column(Numeric(precision=15, scale=2), default=0, nullable=False)
+    transaction_count = Column(Integer, default=0, nullable=False)
+
+    __table_args__ = (
+        # The primary key leads with user_id; category deletes cascade by category
+        Index("idx_category_month_activity_category", "category_id"),
+    )
@@ -1,6 +1,6 @@
 """Budget allocation model"""
 
-from sqlalchemy import Column, Integer, Numeric, String, ForeignKey, Index
+from sqlalchemy import Column, Integer, Numeric, String, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 
 from app.database import Base
@@ -11,7 +11,7 @@ class BudgetAllocation(Base):
 
     __tablename__ = "budget_allocations"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     category_id = Column(Integer, ForeignKey("categories.id", ondelete="CASCADE"), nullable=False)
     month = Column(String, nullable=False)  # Format: YYYY-MM
@@ -22,5 +22,15 @@ class BudgetAllocation(Base):
     category = relationship("Category", back_populates="budget_allocations")
 
     __table_args__ = (
-        Index("idx_budget_allocations_user_category", "user_id", "category_id", "month"),
+        # One allocation per category and month; upserts conflict on it
+        UniqueConstraint(
+            "user_id", "category_id", "month", name="uq_budget_allocations_user_category_month"
+        ),
+        # Month lists and the budget summary's carryover read the user's
+        # allocations by month without visiting the table
+        Index(
+            "idx_budget_allocations_user_month", "user_id", "month",
+            postgresql_include=["category_id", "amount"],
+        ),
+        Index("idx_budget_allocations_category", "category_id"),
     )
@@ -1,6 +1,6 @@
 """Category models"""
 
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
 from app.database import Base
@@ -11,14 +11,24 @@ class CategoryGroup(Base):
 
     __tablename__ = "category_groups"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     name = Column(String, nullable=False)
     sort_order = Column(Integer, default=0, nullable=False)
 
     # Relationships
     user = relationship("User", back_populates="category_groups")
-    categories = relationship("Category", back_populates="category_group", cascade="all, delete-orphan")
+    categories = relationship(
+        "Category",
+        back_populates="category_group",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        order_by="(Category.sort_order, Category.id)"
+    )
+
+    __table_args__ = (
+        Index("idx_category_groups_user_id", "user_id"),
+    )
 
 
 class Category(Base):
@@ -26,14 +36,25 @@ class Category(Base):
 
     __tablename__ = "categories"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
-    category_group_id = Column(Integer, ForeignKey("category_groups.id", ondelete="CASCADE"), nullable=False)
+    category_group_id = Column(
+        Integer, ForeignKey("category_groups.id", ondelete="CASCADE"), nullable=False
+    )
     name = Column(String, nullable=False)
     sort_order = Column(Integer, default=0, nullable=False)
 
     # Relationships
     user = relationship("User", back_populates="categories")
     category_group = relationship("CategoryGroup", back_populates="categories")
-    transactions = relationship("Transaction", back_populates="category")
-    budget_allocations = relationship("BudgetAllocation", back_populates="category", cascade="all, delete-orphan")
+    # ON DELETE SET NULL and CASCADE in the database, not loaded (see User)
+    transactions = relationship("Transaction", back_populates="category", passive_deletes=True)
+    budget_allocations = relationship(
+        "BudgetAllocation", back_populates="category", cascade="all, delete-orphan",
+        passive_deletes=True
+    )
+
+    __table_args__ = (
+        Index("idx_categories_user_id", "user_id"),
+        Index("idx_categories_group_id", "category_group_id"),
+    )
@@ -0,0 +1,108 @@
+"""Change log for delta sync"""
+
+from sqlalchemy import BigInteger, Boolean, Column, DDL, ForeignKey, Index, Integer, String, event
+
+from app.database import Base
+
+# Tables whose changes are logged; the entity name is the table name
+SYNC_TABLES = ("accounts", "category_groups", "categories", "budget_allocations", "transactions")
+
+
+class SyncChange(Base):
+    """
+    Latest change to each synced row, with a tombstone once it is deleted.
+
+    Rows are written by database triggers, so ORM writes, bulk statements,
+    COPY and foreign key cascades are all captured. `version` is the owning
+    user's data_version after the change; it is taken under the user row
+    lock, so per user it increases in commit order.
+
+    Tombstones are never pruned, so a token stays valid however long a
+    client has been offline, at the cost of one row per deleted row for
+    good. Pruning would need a per-user floor version, with tokens older
+    than it answered by a full resync.
+    """
+
+    __tablename__ = "sync_changes"
+
+    entity = Column(String, primary_key=True)
+    entity_id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    version = Column(BigInteger, nullable=False)
+    deleted = Column(Boolean, default=False, nullable=False)
+
+    __table_args__ = (
+        # Sync reads walk (version, entity, entity_id) within a user
+        Index("idx_sync_changes_user_version", "user_id", "version", "entity", "entity_id"),
+    )
+
+
+# One statement-level trigger per table and operation. Each bumps the
+# affected users' data_version once and stamps every changed row with it.
+# Rows of users deleted in the same statement (cascades) are skipped.
+RECORD_SYNC_CHANGES = """
+CREATE OR REPLACE FUNCTION record_sync_changes() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        WITH versions AS (
+            UPDATE users SET data_version = data_version + 1
+            WHERE id IN (SELECT DISTINCT user_id FROM old_rows)
+            RETURNING id, data_version
+        )
+        INSERT INTO sync_changes (entity, entity_id, user_id, version, deleted)
+        SELECT TG_TABLE_NAME, o.id, o.user_id, v.data_version, true
+        FROM old_rows o JOIN versions v ON v.id = o.user_id
+        ON CONFLICT (entity, entity_id)
+        DO UPDATE SET version = excluded.version, deleted = true;
+    ELSE
+        WITH versions AS (
+            UPDATE users SET data_version = data_version + 1
+            WHERE id IN (SELECT DISTINCT user_id FROM new_rows)
+            RETURNING id, data_version
+        )
+        INSERT INTO sync_changes (entity, entity_id, user_id, version, deleted)
+        SELECT TG_TABLE_NAME, n.id, n.user_id, v.data_version, false
+        FROM new_rows n JOIN versions v ON v.id = n.user_id
+        ON CONFLICT (entity, entity_id)
+        DO UPDATE SET version = excluded.version, deleted = false;
+    END IF;
+    RETURN NULL;
+END
+$$
+"""
+
+
+def sync_trigger_ddl(table: str) -> list[str]:
+    """CREATE TRIGGER statements that log changes to `table`"""
+    return [
+        (
+            f"CREATE TRIGGER {table}_sync_insert AFTER INSERT ON {table} "
+            "REFERENCING NEW TABLE AS new_rows "
+            "FOR EACH STATEMENT EXECUTE FUNCTION record_sync_changes()"
+        ),
+        (
+            f"CREATE TRIGGER {table}_sync_update AFTER UPDATE ON {table} "
+            "REFERENCING NEW TABLE AS new_rows "
+            "FOR EACH STATEMENT EXECUTE FUNCTION record_sync_changes()"
+        ),
+        (
+            f"CREATE TRIGGER {table}_sync_delete AFTER DELETE ON {table} "
+            "REFERENCING OLD TABLE AS old_rows "
+            "FOR EACH STATEMENT EXECUTE FUNCTION record_sync_changes()"
+        ),
+    ]
+
+
+# Install the triggers whenever the schema is created with create_all
+# (migrations install them explicitly)
+event.listen(
+    Base.metadata,
+    "after_create",
+    DDL(RECORD_SYNC_CHANGES).execute_if(dialect="postgresql"),
+)
+for _table in SYNC_TABLES:
+    for _statement in sync_trigger_ddl(_table):
+        event.listen(
+            Base.metadata, "after_create", DDL(_statement).execute_if(dialect="postgresql")
+        )
@@ -1,6 +1,5 @@
 """Transaction model"""
 
-from datetime import date as date_type
 from sqlalchemy import Column, Integer, String, Numeric, Date, Boolean, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
@@ -12,11 +11,11 @@ class Transaction(Base):
 
     __tablename__ = "transactions"
 
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     account_id = Column(Integer, ForeignKey("accounts.id", ondelete="CASCADE"), nullable=False)
     category_id = Column(Integer, ForeignKey("categories.id", ondelete="SET NULL"), nullable=True)
-    date = Column(Date, nullable=False, index=True)
+    date = Column(Date, nullable=False)
     payee = Column(String, nullable=False)
     amount = Column(Numeric(precision=15, scale=2), nullable=False)
     memo = Column(String, nullable=True)
@@ -28,6 +27,20 @@ class Transaction(Base):
     category = relationship("Category", back_populates="transactions")
 
     __table_args__ = (
-        Index("idx_transactions_user_id", "user_id"),
-        Index("idx_transactions_date", "date"),
+        # Keyset pagination walks (date, id) newest first within a user
+        Index("idx_transactions_user_date_id", user_id, date.desc(), id.desc()),
+        # The same walk filtered to an account or a category. These lead with
+        # the foreign key rather than user_id (each account and category has
+        # one owner), so cascades and SET NULL from account and category
+        # deletes use them too; the included columns cover balance and
+        # activity rebuilds
+        Index(
+            "idx_transactions_account_date_id", account_id, date.desc(), id.desc(),
+            postgresql_include=["amount", "cleared"],
+        ),
+        Index(
+            "idx_transactions_category_date_id", category_id, date.desc(), id.desc(),
+            postgresql_include=["amount"],
+            postgresql_where=category_id.is_not(None),
+        ),
     )
@@ -1,7 +1,7 @@
 """User model"""
 
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Index
+from sqlalchemy import BigInteger, Column, Integer, String, DateTime
 from sqlalchemy.orm import relationship
 
 from app.database import Base
@@ -12,18 +12,29 @@ class User(Base):
 
     __tablename__ = "users"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     clerk_user_id = Column(String, unique=True, nullable=False, index=True)
     email = Column(String, unique=True, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-
-    # Relationships
-    accounts = relationship("Account", back_populates="user", cascade="all, delete-orphan")
-    transactions = relationship("Transaction", back_populates="user", cascade="all, delete-orphan")
-    category_groups = relationship("CategoryGroup", back_populates="user", cascade="all, delete-orphan")
-    categories = relationship("Category", back_populates="user", cascade="all, delete-orphan")
-    budget_allocations = relationship("BudgetAllocation", back_populates="user", cascade="all, delete-orphan")
-
-    __table_args__ = (
-        Index("idx_users_clerk_id", "clerk_user_id"),
+    # Bumped by every write to the user's data; drives ETags
+    data_version = Column(BigInteger, default=0, nullable=False)
+
+    # Relationships. passive_deletes leaves children that aren't loaded to
+    # the foreign keys' ON DELETE, instead of loading and deleting them one
+    # by one; large users are purged with app.services.purge
+    accounts = relationship(
+        "Account", back_populates="user", cascade="all, delete-orphan", passive_deletes=True
+    )
+    transactions = relationship(
+        "Transaction", back_populates="user", cascade="all, delete-orphan", passive_deletes=True
+    )
+    category_groups = relationship(
+        "CategoryGroup", back_populates="user", cascade="all, delete-orphan", passive_deletes=True
+    )
+    categories = relationship(
+        "Category", back_populates="user", cascade="all, delete-orphan", passive_deletes=True
+    )
+    budget_allocations = relationship(
+        "BudgetAllocation", back_populates="user", cascade="all, delete-orphan",
+        passive_deletes=True
     )
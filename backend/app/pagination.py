@@ -0,0 +1,43 @@
+"""Opaque cursors for keyset pagination"""
+
+import base64
+import json
+from datetime import date
+
+
+def _encode(values: list) -> str:
+    payload = json.dumps(values, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def _decode(cursor: str) -> list:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded))
+
+
+def encode_cursor(row_date: date, row_id: int) -> str:
+    """Encode the (date, id) sort key of the last row on a page"""
+    return _encode([row_date.isoformat(), row_id])
+
+
+def decode_cursor(cursor: str) -> tuple[date, int]:
+    """Decode a cursor from encode_cursor, raising ValueError if it is malformed"""
+    try:
+        row_date, row_id = _decode(cursor)
+        return date.fromisoformat(row_date), int(row_id)
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def encode_sync_token(version: int, entity: str, entity_id: int) -> str:
+    """Encode the (version, entity, entity_id) position of the last change delivered"""
+    return _encode([version, entity, entity_id])
+
+
+def decode_sync_token(token: str) -> tuple[int, str, int]:
+    """Decode a token from encode_sync_token, raising ValueError if it is malformed"""
+    try:
+        version, entity, entity_id = _decode(token)
+        return int(version), str(entity), int(entity_id)
+    except Exception as e:
+        raise ValueError("Invalid sync token") from e
@@ -0,0 +1,56 @@
+"""Fast JSON responses"""
+
+from collections.abc import Iterable
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from starlette.datastructures import MutableHeaders
+
+
+def _default(value: Any) -> Any:
+    # Same as Pydantic's JSON mode, so both paths produce the same output
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """orjson with Decimals as strings; dates, datetimes and enums are native"""
+    return orjson.dumps(content, default=_default)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response encoded with orjson"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def response_columns(model, schema: type[BaseModel]) -> list:
+    """The model's columns for each field of a response schema, in field order"""
+    return [getattr(model, field) for field in schema.model_fields]
+
+
+def rows_response(
+    content: Any,
+    headers: MutableHeaders | None = None,
+    status_code: int = 200
+) -> FastJSONResponse:
+    """
+    Serialize result rows (or dicts/lists of them) without building models.
+
+    Returning a Response bypasses FastAPI's response_model step, which also
+    skips headers set by dependencies on the injected Response; pass them
+    in `headers`.
+    """
+    response = FastJSONResponse(content, status_code=status_code)
+    if headers:
+        response.headers.update(headers)
+    return response
+
+
+def row_dicts(rows: Iterable) -> list[dict]:
+    return [row._asdict() for row in rows]
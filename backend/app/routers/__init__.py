@@ -1,5 +1,5 @@
 """API route handlers"""
 
-from app.routers import accounts, transactions, categories, budget
+from app.routers import accounts, transactions, categories, budget, sync
 
-__all__ = ["accounts", "transactions", "categories", "budget"]
+__all__ = ["accounts", "transactions", "categories", "budget", "sync"]
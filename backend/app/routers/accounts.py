@@ -1,37 +1,60 @@
 """Account CRUD endpoints"""
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.database import get_db
-from app.middleware import get_current_user
-from app.models import User, Account
-from app.schemas import AccountCreate, AccountUpdate, AccountResponse
+from app.middleware import get_current_user, query_budget
+from app.models import User, Account, Transaction
+from app.responses import response_columns, row_dicts, rows_response
+from app.schemas import AccountCreate, AccountUpdate, AccountResponse, PurgeJobResponse
+from app.services.ledger import remove_account_activity
+from app.services.purge import count_transactions, purges
+from app.services.response_cache import CachedRoute
+from app.services.versioning import bump_data_version, conditional_get
 
-router = APIRouter(prefix="/accounts", tags=["accounts"])
+router = APIRouter(prefix="/accounts", tags=["accounts"], route_class=CachedRoute)
 
+ACCOUNT_COLUMNS = response_columns(Account, AccountResponse)
 
-@router.get("/", response_model=list[AccountResponse])
+
+@router.get(
+    "/",
+    response_model=list[AccountResponse],
+    dependencies=[Depends(query_budget(2)), Depends(conditional_get)]
+)
 async def list_accounts(
+    response: Response,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """List all accounts for the current user"""
-    accounts = db.query(Account).filter(Account.user_id == current_user.id).all()
-    return accounts
+    result = await db.execute(
+        select(*ACCOUNT_COLUMNS).where(Account.user_id == current_user.id)
+    )
+    return rows_response(row_dicts(result), response.headers)
 
 
-@router.get("/{account_id}", response_model=AccountResponse)
+@router.get(
+    "/{account_id}",
+    response_model=AccountResponse,
+    dependencies=[Depends(query_budget(2)), Depends(conditional_get)]
+)
 async def get_account(
     account_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get a specific account by ID"""
-    account = db.query(Account).filter(
-        Account.id == account_id,
-        Account.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(Account).where(
+            Account.id == account_id,
+            Account.user_id == current_user.id
+        )
+    )
+    account = result.scalar_one_or_none()
 
     if not account:
         raise HTTPException(
@@ -42,35 +65,83 @@ async def get_account(
     return account
 
 
-@router.post("/", response_model=AccountResponse, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/",
+    response_model=AccountResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(query_budget(3))]
+)
 async def create_account(
     account_data: AccountCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Create a new account"""
-    account = Account(
-        **account_data.model_dump(),
-        user_id=current_user.id
+    """
+    Create a new account.
+
+    A non-zero opening balance is recorded as a cleared "Starting Balance"
+    transaction so the balance always equals the sum of the transactions.
+    """
+    data = account_data.model_dump()
+    opening = data.pop("balance")
+    result = await db.execute(
+        insert(Account)
+        .values(
+            **data,
+            user_id=current_user.id,
+            balance=opening,
+            cleared_balance=opening,
+            uncleared_balance=0
+        )
+        .returning(*ACCOUNT_COLUMNS)
     )
-    db.add(account)
-    db.commit()
-    db.refresh(account)
-    return account
+    account = result.one()
+
+    if opening:
+        await db.execute(
+            insert(Transaction).values(
+                user_id=current_user.id,
+                account_id=account.id,
+                # The database's date, like the balance migration
+                date=func.current_date(),
+                payee="Starting Balance",
+                amount=opening,
+                cleared=True
+            )
+        )
+
+    await bump_data_version(db, current_user.id)
+    await db.commit()
+    return rows_response(account._asdict(), status_code=status.HTTP_201_CREATED)
 
 
-@router.put("/{account_id}", response_model=AccountResponse)
+@router.put(
+    "/{account_id}",
+    response_model=AccountResponse,
+    dependencies=[Depends(query_budget(2))]
+)
 async def update_account(
     account_id: int,
     account_data: AccountUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update an existing account"""
-    account = db.query(Account).filter(
-        Account.id == account_id,
-        Account.user_id == current_user.id
-    ).first()
+    # Update only provided fields
+    update_data = account_data.model_dump(exclude_unset=True)
+    owned = (Account.id == account_id, Account.user_id == current_user.id)
+    if update_data:
+        stmt = (
+            update(Account)
+            .where(*owned)
+            .values(**update_data)
+            .returning(*ACCOUNT_COLUMNS)
+            .execution_options(synchronize_session=False)
+        )
+    else:
+        # Nothing to change; return the account as it is
+        stmt = select(*ACCOUNT_COLUMNS).where(*owned)
+    account = (await db.execute(stmt)).one_or_none()
 
     if not account:
         raise HTTPException(
@@ -78,27 +149,44 @@ async def update_account(
             detail="Account not found"
         )
 
-    # Update only provided fields
-    update_data = account_data.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(account, field, value)
-
-    db.commit()
-    db.refresh(account)
-    return account
-
-
-@router.delete("/{account_id}", status_code=status.HTTP_204_NO_CONTENT)
+    if update_data:
+        await bump_data_version(db, current_user.id)
+        await db.commit()
+    return rows_response(account._asdict())
+
+
+@router.delete(
+    "/{account_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    responses={
+        status.HTTP_202_ACCEPTED: {
+            "model": PurgeJobResponse,
+            "description": "Too many transactions to delete at once; purging in the background",
+        },
+    },
+    dependencies=[Depends(query_budget(5))]
+)
 async def delete_account(
     account_id: int,
+    request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Delete an account"""
-    account = db.query(Account).filter(
-        Account.id == account_id,
-        Account.user_id == current_user.id
-    ).first()
+    """
+    Delete an account and its transactions.
+
+    The transactions are deleted by the database's ON DELETE CASCADE in the
+    same statement. An account with more than PURGE_BACKGROUND_THRESHOLD
+    transactions is purged in chunks by a background job instead: the
+    response is 202 with the job, which can be polled at its Location.
+    """
+    result = await db.execute(
+        select(Account).where(
+            Account.id == account_id,
+            Account.user_id == current_user.id
+        )
+    )
+    account = result.scalar_one_or_none()
 
     if not account:
         raise HTTPException(
@@ -106,6 +194,34 @@ async def delete_account(
             detail="Account not found"
         )
 
-    db.delete(account)
-    db.commit()
+    threshold = settings.purge_background_threshold
+    transactions = await count_transactions(
+        db, Transaction.account_id == account.id, limit=threshold + 1
+    )
+    if transactions > threshold:
+        job = purges.submit("account", account.id, current_user.id)
+        return rows_response(
+            PurgeJobResponse.model_validate(job).model_dump(mode="json"),
+            {"Location": str(request.url_for("get_purge", job_id=job.id))},
+            status_code=status.HTTP_202_ACCEPTED
+        )
+
+    await remove_account_activity(db, account.id)
+    await db.delete(account)
+    await bump_data_version(db, current_user.id)
+    await db.commit()
     return None
+
+
+@router.get("/purges/{job_id}", response_model=PurgeJobResponse)
+async def get_purge(job_id: str, current_user: User = Depends(get_current_user)):
+    """Progress of a background account purge started by delete_account"""
+    job = purges.get(job_id, current_user.id)
+
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Purge job not found"
+        )
+
+    return job
@@ -1,52 +1,194 @@
 """Budget allocation CRUD endpoints"""
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query
+from sqlalchemy import (
+    Integer, String, and_, case, cast, column, func, literal, select, update, values
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
-from app.middleware import get_current_user
-from app.models import User, BudgetAllocation, Category
+from app.middleware import get_current_user, query_budget
+from app.models import User, BudgetAllocation, Category, CategoryGroup, CategoryMonthActivity
+from app.responses import response_columns, row_dicts, rows_response
 from app.schemas import (
     BudgetAllocationCreate,
     BudgetAllocationUpdate,
     BudgetAllocationResponse,
+    BudgetAllocationBulk,
+    BudgetMonthCopy,
+    BudgetSummaryCategory,
+    BudgetSummaryGroup,
+    BudgetSummary,
 )
+from app.services.ledger import MONEY, ZERO
+from app.services.response_cache import CachedRoute
+from app.services.versioning import bump_data_version, conditional_get
+
+router = APIRouter(prefix="/budget", tags=["budget"], route_class=CachedRoute)
+
+ALLOCATION_COLUMNS = response_columns(BudgetAllocation, BudgetAllocationResponse)
+
+# For Core INSERT ... ON CONFLICT statements on the table
+ALLOCATIONS = BudgetAllocation.__table__
+ALLOCATION_RETURNING = response_columns(ALLOCATIONS.c, BudgetAllocationResponse)
+ALLOCATION_KEY = ["user_id", "category_id", "month"]
+
 
-router = APIRouter(prefix="/budget", tags=["budget"])
+def _summary_query(user_id: int, month: str):
+    """
+    The month's figures for every category in one statement.
+
+    Allocations and rolled-up activity up to the end of the month are
+    aggregated per category, then joined onto the user's category tree.
+    """
+    allocations = (
+        select(
+            BudgetAllocation.category_id,
+            func.sum(
+                case((BudgetAllocation.month == month, BudgetAllocation.amount), else_=0)
+            ).label("budgeted"),
+            func.sum(BudgetAllocation.amount).label("budgeted_to_date"),
+        )
+        .where(BudgetAllocation.user_id == user_id, BudgetAllocation.month <= month)
+        .group_by(BudgetAllocation.category_id)
+        .subquery("allocations")
+    )
+    activity = (
+        select(
+            CategoryMonthActivity.category_id,
+            func.sum(case(
+                (CategoryMonthActivity.month == month, CategoryMonthActivity.activity), else_=0
+            )).label("activity"),
+            func.sum(CategoryMonthActivity.activity).label("activity_to_date"),
+        )
+        .where(CategoryMonthActivity.user_id == user_id, CategoryMonthActivity.month <= month)
+        .group_by(CategoryMonthActivity.category_id)
+        .subquery("activity")
+    )
+
+    return (
+        select(
+            CategoryGroup.id.label("group_id"),
+            CategoryGroup.name.label("group_name"),
+            CategoryGroup.sort_order.label("group_sort_order"),
+            Category.id,
+            Category.name,
+            Category.sort_order,
+            cast(func.coalesce(allocations.c.budgeted, ZERO), MONEY).label("budgeted"),
+            cast(func.coalesce(activity.c.activity, ZERO), MONEY).label("activity"),
+            cast(
+                func.coalesce(allocations.c.budgeted_to_date, ZERO)
+                + func.coalesce(activity.c.activity_to_date, ZERO),
+                MONEY
+            ).label("available"),
+        )
+        .select_from(CategoryGroup)
+        .outerjoin(Category, Category.category_group_id == CategoryGroup.id)
+        .outerjoin(allocations, allocations.c.category_id == Category.id)
+        .outerjoin(activity, activity.c.category_id == Category.id)
+        .where(CategoryGroup.user_id == user_id)
+        .order_by(
+            CategoryGroup.sort_order,
+            CategoryGroup.id,
+            Category.sort_order,
+            Category.id
+        )
+    )
+
+
+@router.get(
+    "/summary",
+    response_model=BudgetSummary,
+    dependencies=[Depends(query_budget(2)), Depends(conditional_get)]
+)
+async def get_budget_summary(
+    month: str = Query(..., pattern=r"^\d{4}-(0[1-9]|1[0-2])$", description="Month as YYYY-MM"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Budgeted, activity and available for every category in a month.
 
+    Returns the category group tree with per-category figures and totals
+    per group and overall, computed by one aggregate query. Available
+    includes carry-over from all previous months.
+    """
+    result = await db.execute(_summary_query(current_user.id, month))
 
-@router.get("/", response_model=list[BudgetAllocationResponse])
+    summary = BudgetSummary(month=month)
+    groups: dict[int, BudgetSummaryGroup] = {}
+    for row in result.all():
+        group = groups.get(row.group_id)
+        if group is None:
+            group = groups[row.group_id] = BudgetSummaryGroup(
+                id=row.group_id, name=row.group_name, sort_order=row.group_sort_order
+            )
+            summary.groups.append(group)
+        # Empty groups come back as one row without a category
+        if row.id is None:
+            continue
+
+        group.categories.append(BudgetSummaryCategory(
+            id=row.id,
+            name=row.name,
+            sort_order=row.sort_order,
+            budgeted=row.budgeted,
+            activity=row.activity,
+            available=row.available,
+        ))
+        for totals in (group, summary):
+            totals.budgeted += row.budgeted
+            totals.activity += row.activity
+            totals.available += row.available
+
+    return summary
+
+
+@router.get(
+    "/",
+    response_model=list[BudgetAllocationResponse],
+    dependencies=[Depends(query_budget(2)), Depends(conditional_get)]
+)
 async def list_budget_allocations(
+    response: Response,
     month: str | None = Query(None, pattern=r"^\d{4}-\d{2}$"),
     category_id: int | None = None,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """List budget allocations for the current user with optional filters"""
-    query = db.query(BudgetAllocation).filter(
+    query = select(*ALLOCATION_COLUMNS).where(
         BudgetAllocation.user_id == current_user.id
     )
 
     if month:
-        query = query.filter(BudgetAllocation.month == month)
+        query = query.where(BudgetAllocation.month == month)
     if category_id:
-        query = query.filter(BudgetAllocation.category_id == category_id)
+        query = query.where(BudgetAllocation.category_id == category_id)
 
-    allocations = query.all()
-    return allocations
+    result = await db.execute(query)
+    return rows_response(row_dicts(result), response.headers)
 
 
-@router.get("/{allocation_id}", response_model=BudgetAllocationResponse)
+@router.get(
+    "/{allocation_id}",
+    response_model=BudgetAllocationResponse,
+    dependencies=[Depends(query_budget(2)), Depends(conditional_get)]
+)
 async def get_budget_allocation(
     allocation_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get a specific budget allocation by ID"""
-    allocation = db.query(BudgetAllocation).filter(
-        BudgetAllocation.id == allocation_id,
-        BudgetAllocation.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(BudgetAllocation).where(
+            BudgetAllocation.id == allocation_id,
+            BudgetAllocation.user_id == current_user.id
+        )
+    )
+    allocation = result.scalar_one_or_none()
 
     if not allocation:
         raise HTTPException(
@@ -57,60 +199,196 @@ async def get_budget_allocation(
     return allocation
 
 
-@router.post("/", response_model=BudgetAllocationResponse, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/",
+    response_model=BudgetAllocationResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(query_budget(2))]
+)
 async def create_budget_allocation(
     allocation_data: BudgetAllocationCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Create a new budget allocation"""
-    # Verify category belongs to user
-    category = db.query(Category).filter(
-        Category.id == allocation_data.category_id,
-        Category.user_id == current_user.id
-    ).first()
-
-    if not category:
+    """
+    Create a new budget allocation.
+
+    One INSERT ... SELECT: the row is only selected if the category is the
+    user's, and skipped by ON CONFLICT if the month already has one, so
+    concurrent creates can't both succeed.
+    """
+    result = await db.execute(
+        pg_insert(ALLOCATIONS)
+        .from_select(
+            ["user_id", "category_id", "month", "amount"],
+            select(
+                Category.user_id,
+                Category.id,
+                literal(allocation_data.month, String),
+                literal(allocation_data.amount, MONEY),
+            ).where(
+                Category.id == allocation_data.category_id,
+                Category.user_id == current_user.id
+            )
+        )
+        .on_conflict_do_nothing(index_elements=ALLOCATION_KEY)
+        .returning(*ALLOCATION_RETURNING)
+    )
+    allocation = result.first()
+
+    if not allocation:
+        # Only failures pay for finding out which check failed
+        result = await db.execute(
+            select(Category.id).where(
+                Category.id == allocation_data.category_id,
+                Category.user_id == current_user.id
+            )
+        )
+        if not result.first():
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Category not found"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Budget allocation already exists for this category and month"
+        )
+
+    await bump_data_version(db, current_user.id)
+    await db.commit()
+    return rows_response(allocation._asdict(), status_code=status.HTTP_201_CREATED)
+
+
+@router.put(
+    "/bulk",
+    response_model=list[BudgetAllocationResponse],
+    dependencies=[Depends(query_budget(2))]
+)
+async def bulk_set_budget_allocations(
+    bulk: BudgetAllocationBulk,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Create or update many allocations in one statement.
+
+    Each allocation is inserted, or its amount replaced if the category
+    already has one for the month, by a single INSERT ... ON CONFLICT DO
+    UPDATE. All or nothing: if any category isn't the user's, nothing is
+    written.
+    """
+    # Sorted so concurrent bulk writes lock existing rows in the same order
+    rows = sorted((a.category_id, a.month, a.amount) for a in bulk.allocations)
+    new = values(
+        column("category_id", Integer),
+        column("month", String),
+        column("amount", MONEY),
+        name="new"
+    ).data(rows)
+    stmt = pg_insert(ALLOCATIONS).from_select(
+        ["user_id", "category_id", "month", "amount"],
+        select(Category.user_id, new.c.category_id, new.c.month, new.c.amount)
+        .select_from(new)
+        .join(
+            Category,
+            and_(Category.id == new.c.category_id, Category.user_id == current_user.id)
+        )
+    )
+    result = await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=ALLOCATION_KEY, set_={"amount": stmt.excluded.amount}
+        )
+        .returning(*ALLOCATION_RETURNING)
+    )
+    written = row_dicts(result)
+
+    if len(written) < len(rows):
+        await db.rollback()
+        missing = {row[0] for row in rows} - {row["category_id"] for row in written}
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Category not found"
+            detail=f"Categories not found: {sorted(missing)}"
         )
 
-    # Check if allocation already exists for this category/month
-    existing = db.query(BudgetAllocation).filter(
-        BudgetAllocation.user_id == current_user.id,
-        BudgetAllocation.category_id == allocation_data.category_id,
-        BudgetAllocation.month == allocation_data.month
-    ).first()
+    await bump_data_version(db, current_user.id)
+    await db.commit()
+    return rows_response(written)
+
+
+@router.post(
+    "/copy",
+    response_model=list[BudgetAllocationResponse],
+    dependencies=[Depends(query_budget(2))]
+)
+async def copy_budget_month(
+    copy: BudgetMonthCopy,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Copy one month's allocations to another, e.g. to roll a budget forward.
 
-    if existing:
+    One INSERT ... SELECT. Categories that already have an allocation in
+    to_month keep it, unless overwrite is set. Returns the allocations
+    written.
+    """
+    if copy.from_month == copy.to_month:
         raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail="Budget allocation already exists for this category and month"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="from_month and to_month must differ"
         )
 
-    allocation = BudgetAllocation(
-        **allocation_data.model_dump(),
-        user_id=current_user.id
+    stmt = pg_insert(ALLOCATIONS).from_select(
+        ["user_id", "category_id", "month", "amount"],
+        select(
+            ALLOCATIONS.c.user_id,
+            ALLOCATIONS.c.category_id,
+            literal(copy.to_month, String),
+            ALLOCATIONS.c.amount,
+        )
+        .where(
+            ALLOCATIONS.c.user_id == current_user.id,
+            ALLOCATIONS.c.month == copy.from_month
+        )
+        .order_by(ALLOCATIONS.c.category_id)
     )
-    db.add(allocation)
-    db.commit()
-    db.refresh(allocation)
-    return allocation
+    if copy.overwrite:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=ALLOCATION_KEY, set_={"amount": stmt.excluded.amount}
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=ALLOCATION_KEY)
+    written = row_dicts(await db.execute(stmt.returning(*ALLOCATION_RETURNING)))
 
+    if written:
+        await bump_data_version(db, current_user.id)
+        await db.commit()
+    return rows_response(written)
 
-@router.put("/{allocation_id}", response_model=BudgetAllocationResponse)
+
+@router.put(
+    "/{allocation_id}",
+    response_model=BudgetAllocationResponse,
+    dependencies=[Depends(query_budget(2))]
+)
 async def update_budget_allocation(
     allocation_id: int,
     allocation_data: BudgetAllocationUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update an existing budget allocation"""
-    allocation = db.query(BudgetAllocation).filter(
-        BudgetAllocation.id == allocation_id,
-        BudgetAllocation.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        update(BudgetAllocation)
+        .where(
+            BudgetAllocation.id == allocation_id,
+            BudgetAllocation.user_id == current_user.id
+        )
+        .values(**allocation_data.model_dump(exclude_unset=True))
+        .returning(*ALLOCATION_COLUMNS)
+        .execution_options(synchronize_session=False)
+    )
+    allocation = result.one_or_none()
 
     if not allocation:
         raise HTTPException(
@@ -118,26 +396,29 @@ async def update_budget_allocation(
             detail="Budget allocation not found"
         )
 
-    update_data = allocation_data.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(allocation, field, value)
-
-    db.commit()
-    db.refresh(allocation)
-    return allocation
+    await bump_data_version(db, current_user.id)
+    await db.commit()
+    return rows_response(allocation._asdict())
 
 
-@router.delete("/{allocation_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete(
+    "/{allocation_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(query_budget(3))]
+)
 async def delete_budget_allocation(
     allocation_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete a budget allocation"""
-    allocation = db.query(BudgetAllocation).filter(
-        BudgetAllocation.id == allocation_id,
-        BudgetAllocation.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(BudgetAllocation).where(
+            BudgetAllocation.id == allocation_id,
+            BudgetAllocation.user_id == current_user.id
+        )
+    )
+    allocation = result.scalar_one_or_none()
 
     if not allocation:
         raise HTTPException(
@@ -145,6 +426,7 @@ async def delete_budget_allocation(
             detail="Budget allocation not found"
         )
 
-    db.delete(allocation)
-    db.commit()
+    await db.delete(allocation)
+    await bump_data_version(db, current_user.id)
+    await db.commit()
     return None
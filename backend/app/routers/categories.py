@@ -1,11 +1,15 @@
 """Category and Category Group CRUD endpoints"""
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy import Integer, column, insert, literal, select, update, values
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
-from app.middleware import get_current_user
-from app.models import User, Category, CategoryGroup
+from app.middleware import get_current_user, query_budget
+from app.models import User, BudgetAllocation, Category, CategoryGroup, Transaction
+from app.responses import response_columns, row_dicts, rows_response
 from app.schemas import (
     CategoryGroupCreate,
     CategoryGroupUpdate,
@@ -13,35 +17,68 @@ from app.schemas import (
     CategoryCreate,
     CategoryUpdate,
     CategoryResponse,
+    CategoryGroupTree,
+    CategoryMerge,
+    CategoryMergeResult,
+    CategoryReorder,
 )
+from app.services.ledger import move_category_activity
+from app.services.response_cache import CachedRoute
+from app.services.versioning import bump_data_version, conditional_get
 
-router = APIRouter(prefix="/categories", tags=["categories"])
+router = APIRouter(prefix="/categories", tags=["categories"], route_class=CachedRoute)
+
+GROUP_COLUMNS = response_columns(CategoryGroup, CategoryGroupResponse)
+CATEGORY_COLUMNS = response_columns(Category, CategoryResponse)
+# For Core INSERT ... SELECT statements on the table
+CATEGORY_RETURNING = response_columns(Category.__table__.c, CategoryResponse)
+
+
+def _not_found(kind: str, ids: set[int]) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"{kind} not found: {', '.join(str(i) for i in sorted(ids))}"
+    )
 
 
 # Category Group endpoints
-@router.get("/groups", response_model=list[CategoryGroupResponse])
+@router.get(
+    "/groups",
+    response_model=list[CategoryGroupResponse],
+    dependencies=[Depends(query_budget(2)), Depends(conditional_get)]
+)
 async def list_category_groups(
+    response: Response,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """List all category groups for the current user"""
-    groups = db.query(CategoryGroup).filter(
-        CategoryGroup.user_id == current_user.id
-    ).order_by(CategoryGroup.sort_order).all()
-    return groups
+    result = await db.execute(
+        select(*GROUP_COLUMNS).where(
+            CategoryGroup.user_id == current_user.id
+        ).order_by(CategoryGroup.sort_order)
+    )
+    return rows_response(row_dicts(result), response.headers)
 
 
-@router.get("/groups/{group_id}", response_model=CategoryGroupResponse)
+@router.get(
+    "/groups/{group_id}",
+    response_model=CategoryGroupResponse,
+    dependencies=[Depends(query_budget(2)), Depends(conditional_get)]
+)
 async def get_category_group(
     group_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get a specific category group by ID"""
-    group = db.query(CategoryGroup).filter(
-        CategoryGroup.id == group_id,
-        CategoryGroup.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(CategoryGroup).where(
+            CategoryGroup.id == group_id,
+            CategoryGroup.user_id == current_user.id
+        )
+    )
+    group = result.scalar_one_or_none()
 
     if not group:
         raise HTTPException(
@@ -52,35 +89,55 @@ async def get_category_group(
     return group
 
 
-@router.post("/groups", response_model=CategoryGroupResponse, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/groups",
+    response_model=CategoryGroupResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(query_budget(2))]
+)
 async def create_category_group(
     group_data: CategoryGroupCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new category group"""
-    group = CategoryGroup(
-        **group_data.model_dump(),
-        user_id=current_user.id
+    result = await db.execute(
+        insert(CategoryGroup)
+        .values(**group_data.model_dump(), user_id=current_user.id)
+        .returning(*GROUP_COLUMNS)
     )
-    db.add(group)
-    db.commit()
-    db.refresh(group)
-    return group
+    group = result.one()
+    await bump_data_version(db, current_user.id)
+    await db.commit()
+    return rows_response(group._asdict(), status_code=status.HTTP_201_CREATED)
 
 
-@router.put("/groups/{group_id}", response_model=CategoryGroupResponse)
+@router.put(
+    "/groups/{group_id}",
+    response_model=CategoryGroupResponse,
+    dependencies=[Depends(query_budget(2))]
+)
 async def update_category_group(
     group_id: int,
     group_data: CategoryGroupUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update an existing category group"""
-    group = db.query(CategoryGroup).filter(
-        CategoryGroup.id == group_id,
-        CategoryGroup.user_id == current_user.id
-    ).first()
+    update_data = group_data.model_dump(exclude_unset=True)
+    owned = (CategoryGroup.id == group_id, CategoryGroup.user_id == current_user.id)
+    if update_data:
+        stmt = (
+            update(CategoryGroup)
+            .where(*owned)
+            .values(**update_data)
+            .returning(*GROUP_COLUMNS)
+            .execution_options(synchronize_session=False)
+        )
+    else:
+        # Nothing to change; return the group as it is
+        stmt = select(*GROUP_COLUMNS).where(*owned)
+    group = (await db.execute(stmt)).one_or_none()
 
     if not group:
         raise HTTPException(
@@ -88,26 +145,36 @@ async def update_category_group(
             detail="Category group not found"
         )
 
-    update_data = group_data.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(group, field, value)
-
-    db.commit()
-    db.refresh(group)
-    return group
+    if update_data:
+        await bump_data_version(db, current_user.id)
+        await db.commit()
+    return rows_response(group._asdict())
 
 
-@router.delete("/groups/{group_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete(
+    "/groups/{group_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(query_budget(3))]
+)
 async def delete_category_group(
     group_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Delete a category group"""
-    group = db.query(CategoryGroup).filter(
-        CategoryGroup.id == group_id,
-        CategoryGroup.user_id == current_user.id
-    ).first()
+    """
+    Delete a category group and its categories.
+
+    The categories, their allocations and rollup rows go by ON DELETE
+    CASCADE and their transactions become uncategorized by ON DELETE SET
+    NULL, all in the database within the one DELETE.
+    """
+    result = await db.execute(
+        select(CategoryGroup).where(
+            CategoryGroup.id == group_id,
+            CategoryGroup.user_id == current_user.id
+        )
+    )
+    group = result.scalar_one_or_none()
 
     if not group:
         raise HTTPException(
@@ -115,39 +182,76 @@ async def delete_category_group(
             detail="Category group not found"
         )
 
-    db.delete(group)
-    db.commit()
+    await db.delete(group)
+    await bump_data_version(db, current_user.id)
+    await db.commit()
     return None
 
 
 # Category endpoints
-@router.get("/", response_model=list[CategoryResponse])
+@router.get(
+    "/tree",
+    response_model=list[CategoryGroupTree],
+    dependencies=[Depends(query_budget(3)), Depends(conditional_get)]
+)
+async def get_category_tree(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    List category groups with their categories nested, both in sort order.
+
+    Loads in two statements: the groups, then all their categories via
+    selectinload.
+    """
+    result = await db.execute(
+        select(CategoryGroup)
+        .where(CategoryGroup.user_id == current_user.id)
+        .options(selectinload(CategoryGroup.categories))
+        .order_by(CategoryGroup.sort_order, CategoryGroup.id)
+    )
+    return result.scalars().all()
+
+
+@router.get(
+    "/",
+    response_model=list[CategoryResponse],
+    dependencies=[Depends(query_budget(2)), Depends(conditional_get)]
+)
 async def list_categories(
+    response: Response,
     group_id: int | None = None,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """List all categories for the current user, optionally filtered by group"""
-    query = db.query(Category).filter(Category.user_id == current_user.id)
+    query = select(*CATEGORY_COLUMNS).where(Category.user_id == current_user.id)
 
     if group_id:
-        query = query.filter(Category.category_group_id == group_id)
+        query = query.where(Category.category_group_id == group_id)
 
-    categories = query.order_by(Category.sort_order).all()
-    return categories
+    result = await db.execute(query.order_by(Category.sort_order))
+    return rows_response(row_dicts(result), response.headers)
 
 
-@router.get("/{category_id}", response_model=CategoryResponse)
+@router.get(
+    "/{category_id}",
+    response_model=CategoryResponse,
+    dependencies=[Depends(query_budget(2)), Depends(conditional_get)]
+)
 async def get_category(
     category_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get a specific category by ID"""
-    category = db.query(Category).filter(
-        Category.id == category_id,
-        Category.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(Category).where(
+            Category.id == category_id,
+            Category.user_id == current_user.id
+        )
+    )
+    category = result.scalar_one_or_none()
 
     if not category:
         raise HTTPException(
@@ -158,74 +262,209 @@ async def get_category(
     return category
 
 
-@router.post("/", response_model=CategoryResponse, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/",
+    response_model=CategoryResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(query_budget(2))]
+)
 async def create_category(
     category_data: CategoryCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new category"""
-    # Verify category group belongs to user
-    group = db.query(CategoryGroup).filter(
-        CategoryGroup.id == category_data.category_group_id,
-        CategoryGroup.user_id == current_user.id
-    ).first()
+    # Selected from the group, so nothing is inserted unless it is the user's
+    table = Category.__table__
+    result = await db.execute(
+        insert(table)
+        .from_select(
+            ["user_id", "category_group_id", "name", "sort_order"],
+            select(
+                CategoryGroup.user_id,
+                CategoryGroup.id,
+                literal(category_data.name, table.c.name.type),
+                literal(category_data.sort_order, table.c.sort_order.type),
+            ).where(
+                CategoryGroup.id == category_data.category_group_id,
+                CategoryGroup.user_id == current_user.id
+            )
+        )
+        .returning(*CATEGORY_RETURNING)
+    )
+    category = result.one_or_none()
 
-    if not group:
+    if not category:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Category group not found"
         )
 
-    category = Category(
-        **category_data.model_dump(),
-        user_id=current_user.id
+    await bump_data_version(db, current_user.id)
+    await db.commit()
+    return rows_response(category._asdict(), status_code=status.HTTP_201_CREATED)
+
+
+@router.put(
+    "/order",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(query_budget(3))]
+)
+async def reorder_categories(
+    order: CategoryReorder,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Reorder groups and categories, moving categories between groups.
+
+    For drag and drop: one request instead of a PUT per row. All new sort
+    orders and groups are set by one UPDATE ... FROM (VALUES ...) per
+    table, in one DB transaction. If any listed group or category isn't
+    the user's, nothing changes.
+    """
+    if order.group_ids:
+        # Sorted by id so concurrent reorders lock rows in the same order
+        rows = sorted((group_id, i) for i, group_id in enumerate(order.group_ids))
+        new = values(
+            column("id", Integer), column("sort_order", Integer), name="new"
+        ).data(rows)
+        result = await db.execute(
+            update(CategoryGroup)
+            .where(CategoryGroup.id == new.c.id, CategoryGroup.user_id == current_user.id)
+            .values(sort_order=new.c.sort_order)
+            .returning(CategoryGroup.id)
+            .execution_options(synchronize_session=False)
+        )
+        missing = set(order.group_ids) - set(result.scalars())
+        if missing:
+            await db.rollback()
+            raise _not_found("Category group", missing)
+
+    rows = sorted(
+        (category_id, group.id, i)
+        for group in order.groups
+        for i, category_id in enumerate(group.category_ids)
     )
-    db.add(category)
-    db.commit()
-    db.refresh(category)
-    return category
+    if rows:
+        new = values(
+            column("id", Integer),
+            column("category_group_id", Integer),
+            column("sort_order", Integer),
+            name="new"
+        ).data(rows)
+        # Joined to the user's groups, so categories only move into those
+        result = await db.execute(
+            update(Category)
+            .where(
+                Category.id == new.c.id,
+                Category.user_id == current_user.id,
+                CategoryGroup.id == new.c.category_group_id,
+                CategoryGroup.user_id == current_user.id
+            )
+            .values(category_group_id=new.c.category_group_id, sort_order=new.c.sort_order)
+            .returning(Category.id)
+            .execution_options(synchronize_session=False)
+        )
+        missing = {row[0] for row in rows} - set(result.scalars())
+        if missing:
+            await db.rollback()
+            # Only failures pay for finding out which rows were missing
+            group_ids = {group.id for group in order.groups}
+            result = await db.execute(
+                select(CategoryGroup.id).where(
+                    CategoryGroup.id.in_(group_ids),
+                    CategoryGroup.user_id == current_user.id
+                )
+            )
+            missing_groups = group_ids - set(result.scalars())
+            if missing_groups:
+                raise _not_found("Category group", missing_groups)
+            raise _not_found("Category", missing)
+
+    await bump_data_version(db, current_user.id)
+    await db.commit()
+    return None
 
 
-@router.put("/{category_id}", response_model=CategoryResponse)
+@router.put(
+    "/{category_id}",
+    response_model=CategoryResponse,
+    dependencies=[Depends(query_budget(2))]
+)
 async def update_category(
     category_id: int,
     category_data: CategoryUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update an existing category"""
-    category = db.query(Category).filter(
-        Category.id == category_id,
-        Category.user_id == current_user.id
-    ).first()
+    update_data = category_data.model_dump(exclude_unset=True)
+    owned = [Category.id == category_id, Category.user_id == current_user.id]
+    if "category_group_id" in update_data:
+        # Moving to another group: only one of the user's
+        owned.append(
+            select(CategoryGroup.id).where(
+                CategoryGroup.id == update_data["category_group_id"],
+                CategoryGroup.user_id == current_user.id
+            ).exists()
+        )
+    if update_data:
+        stmt = (
+            update(Category)
+            .where(*owned)
+            .values(**update_data)
+            .returning(*CATEGORY_COLUMNS)
+            .execution_options(synchronize_session=False)
+        )
+    else:
+        # Nothing to change; return the category as it is
+        stmt = select(*CATEGORY_COLUMNS).where(*owned)
+    category = (await db.execute(stmt)).one_or_none()
 
     if not category:
+        # Only failures pay for finding out which row was missing
+        result = await db.execute(
+            select(Category.id).where(
+                Category.id == category_id,
+                Category.user_id == current_user.id
+            )
+        )
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Category not found"
+            detail="Category group not found" if result.first() else "Category not found"
         )
 
-    update_data = category_data.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(category, field, value)
-
-    db.commit()
-    db.refresh(category)
-    return category
+    if update_data:
+        await bump_data_version(db, current_user.id)
+        await db.commit()
+    return rows_response(category._asdict())
 
 
-@router.delete("/{category_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete(
+    "/{category_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(query_budget(3))]
+)
 async def delete_category(
     category_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Delete a category"""
-    category = db.query(Category).filter(
-        Category.id == category_id,
-        Category.user_id == current_user.id
-    ).first()
+    """
+    Delete a category.
+
+    Its transactions become uncategorized (ON DELETE SET NULL) and its
+    allocations and rollup rows are deleted (ON DELETE CASCADE) by the
+    database within the one DELETE.
+    """
+    result = await db.execute(
+        select(Category).where(
+            Category.id == category_id,
+            Category.user_id == current_user.id
+        )
+    )
+    category = result.scalar_one_or_none()
 
     if not category:
         raise HTTPException(
@@ -233,6 +472,90 @@ async def delete_category(
             detail="Category not found"
         )
 
-    db.delete(category)
-    db.commit()
+    await db.delete(category)
+    await bump_data_version(db, current_user.id)
+    await db.commit()
     return None
+
+
+@router.post(
+    "/{category_id}/merge",
+    response_model=CategoryMergeResult,
+    dependencies=[Depends(query_budget(6))]
+)
+async def merge_category(
+    category_id: int,
+    merge: CategoryMerge,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Merge a category into another, then delete it.
+
+    Its transactions move to the target in one UPDATE and its activity
+    rollup is added into the target's. Its allocations move too; where the
+    target already has an allocation for the month, the amounts are summed.
+    Everything happens in one DB transaction, in the same six statements
+    whatever the number of transactions.
+    """
+    target_id = merge.target_category_id
+    if target_id == category_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cannot merge a category into itself"
+        )
+
+    # Locked so no transaction or allocation can be added to the source
+    # mid-merge; id order so concurrent merges lock in the same order
+    result = await db.execute(
+        select(Category)
+        .where(Category.id.in_([category_id, target_id]), Category.user_id == current_user.id)
+        .order_by(Category.id)
+        .with_for_update()
+    )
+    categories = {category.id: category for category in result.scalars()}
+
+    if category_id not in categories:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Category not found"
+        )
+    if target_id not in categories:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Target category not found"
+        )
+
+    transactions = await db.execute(
+        update(Transaction)
+        .where(Transaction.category_id == category_id, Transaction.user_id == current_user.id)
+        .values(category_id=target_id)
+        .execution_options(synchronize_session=False)
+    )
+    await move_category_activity(db, current_user.id, category_id, target_id)
+
+    # Copied onto the target, summed into any allocation it has for the
+    # month; the source's own rows go with it when it is deleted
+    allocations = BudgetAllocation.__table__
+    copy = pg_insert(allocations).from_select(
+        ["user_id", "category_id", "month", "amount"],
+        select(
+            allocations.c.user_id, literal(target_id), allocations.c.month, allocations.c.amount
+        ).where(allocations.c.category_id == category_id)
+    )
+    moved = await db.execute(
+        copy.on_conflict_do_update(
+            index_elements=["user_id", "category_id", "month"],
+            set_={"amount": allocations.c.amount + copy.excluded.amount}
+        )
+    )
+
+    await db.delete(categories[category_id])
+    await bump_data_version(db, current_user.id)
+    response = CategoryMergeResult(
+        target=CategoryResponse.model_validate(categories[target_id]),
+        transactions_moved=transactions.rowcount,
+        allocations_moved=moved.rowcount,
+    )
+    await db.commit()
+    return response
@@ -0,0 +1,126 @@
+"""Delta sync endpoint"""
+
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_db
+from app.middleware import get_current_user, query_budget
+from app.models import (
+    User,
+    Account,
+    BudgetAllocation,
+    Category,
+    CategoryGroup,
+    SyncChange,
+    Transaction,
+)
+from app.pagination import encode_sync_token, decode_sync_token
+from app.schemas import (
+    AccountResponse,
+    BudgetAllocationResponse,
+    CategoryGroupResponse,
+    CategoryResponse,
+    TransactionResponse,
+    SyncChangeResponse,
+    SyncPage,
+)
+
+router = APIRouter(prefix="/sync", tags=["sync"])
+
+# Entity name (table name) -> model and response schema
+ENTITIES = {
+    "accounts": (Account, AccountResponse),
+    "category_groups": (CategoryGroup, CategoryGroupResponse),
+    "categories": (Category, CategoryResponse),
+    "budget_allocations": (BudgetAllocation, BudgetAllocationResponse),
+    "transactions": (Transaction, TransactionResponse),
+}
+
+
+@router.get(
+    "",
+    response_model=SyncPage,
+    dependencies=[Depends(query_budget(6))]
+)
+async def sync_changes(
+    since: str | None = Query(
+        None, description="next_token from the previous sync; omit for a full sync"
+    ),
+    limit: int = Query(500, ge=1, le=2000, description="Maximum changes per page"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Return accounts, category groups, categories, budget allocations and
+    transactions changed since a sync token.
+
+    - Each change carries the row's current data, or `deleted: true`
+    - Without `since` every live row is returned (tombstones are skipped)
+    - Keep calling with `next_token` while `has_more` is true, then store
+      the last `next_token` for the next sync
+    - A row can appear again if it changes while a client is paging;
+      applying changes in order is idempotent
+    """
+    query = select(
+        SyncChange.entity,
+        SyncChange.entity_id,
+        SyncChange.version,
+        SyncChange.deleted
+    ).where(SyncChange.user_id == current_user.id)
+
+    if since:
+        try:
+            position = decode_sync_token(since)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            ) from e
+        query = query.where(
+            tuple_(SyncChange.version, SyncChange.entity, SyncChange.entity_id) > tuple_(*position)
+        )
+    else:
+        query = query.where(SyncChange.deleted.is_(False))
+
+    # Fetch one extra row to learn whether another page follows
+    result = await db.execute(
+        query.order_by(SyncChange.version, SyncChange.entity, SyncChange.entity_id).limit(limit + 1)
+    )
+    changes = result.all()
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    # Current state of the live rows, one query per entity
+    live: dict[str, set[int]] = {}
+    for change in changes:
+        if not change.deleted:
+            live.setdefault(change.entity, set()).add(change.entity_id)
+
+    rows: dict[tuple[str, int], object] = {}
+    for entity, ids in live.items():
+        model, schema = ENTITIES[entity]
+        result = await db.execute(
+            select(model).where(model.id.in_(ids), model.user_id == current_user.id)
+        )
+        for obj in result.scalars():
+            rows[(entity, obj.id)] = schema.model_validate(obj)
+
+    items = []
+    for change in changes:
+        data = rows.get((change.entity, change.entity_id))
+        # A row deleted since its change was read is reported as deleted now
+        items.append(SyncChangeResponse(
+            entity=change.entity,
+            id=change.entity_id,
+            deleted=data is None,
+            data=data,
+        ))
+
+    if changes:
+        last = changes[-1]
+        next_token = encode_sync_token(last.version, last.entity, last.entity_id)
+    else:
+        next_token = since or encode_sync_token(0, "", 0)
+
+    return SyncPage(changes=items, next_token=next_token, has_more=has_more)
@@ -1,56 +1,569 @@
 """Transaction CRUD endpoints"""
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+import csv
+import io
+from itertools import islice
+from typing import Literal
+
+from fastapi import APIRouter, Depends, File, Form, HTTPException, status, Query, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import (
+    Integer, Select, cast, column, delete, insert, literal, select, tuple_, update, values
+)
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import date
 
-from app.database import get_db
-from app.middleware import get_current_user
-from app.models import User, Transaction, Account
-from app.schemas import TransactionCreate, TransactionUpdate, TransactionResponse
+from app.config import settings
+from app.database import AsyncSessionLocal, get_db
+from app.middleware import get_current_user, query_budget
+from app.importers import PARSERS, ParsedRow, detect_format
+from app.models import User, Transaction, Account, Category
+from app.pagination import encode_cursor, decode_cursor
+from app.responses import dumps, response_columns, row_dicts, rows_response
+from app.schemas import (
+    TransactionCreate,
+    TransactionUpdate,
+    TransactionResponse,
+    TransactionPage,
+    ImportRowError,
+    TransactionImportResult,
+    TransactionBatchRequest,
+    TransactionBatchResult,
+    TransactionBatchResponse,
+)
+from app.services.ledger import LedgerDelta
+from app.services.versioning import bump_data_version
 
 router = APIRouter(prefix="/transactions", tags=["transactions"])
 
+# Columns returned by the list and export endpoints, in TransactionResponse field order
+RESPONSE_COLUMNS = response_columns(Transaction, TransactionResponse)
+EXPORT_COLUMNS = RESPONSE_COLUMNS
+# The same for Core INSERT/UPDATE ... RETURNING statements on the table
+RETURNING_COLUMNS = response_columns(Transaction.__table__.c, TransactionResponse)
+EXPORT_BATCH_SIZE = 1000
+
+# Columns loaded by COPY during bulk import
+IMPORT_COLUMNS = (
+    "user_id",
+    "account_id",
+    "category_id",
+    "date",
+    "payee",
+    "amount",
+    "memo",
+    "cleared",
+)
+IMPORT_BATCH_SIZE = 5000
+IMPORT_MAX_ERRORS = 1000
+
+# Columns an update may not set to null
+REQUIRED_FIELDS = {"account_id", "date", "payee", "amount", "cleared"}
+
+# Columns a transaction's ledger deltas depend on, in LedgerDelta.record order
+LEDGER_FIELDS = ("account_id", "category_id", "date", "amount", "cleared")
+
+
+class TransactionFilters:
+    """Query filters shared by the list and export endpoints"""
+
+    def __init__(
+        self,
+        account_id: int | None = Query(None, description="Filter by account ID"),
+        category_id: int | None = Query(None, description="Filter by category ID"),
+        start_date: date | None = Query(None, description="Filter by start date"),
+        end_date: date | None = Query(None, description="Filter by end date"),
+        cleared: bool | None = Query(None, description="Filter by cleared status"),
+    ):
+        self.account_id = account_id
+        self.category_id = category_id
+        self.start_date = start_date
+        self.end_date = end_date
+        self.cleared = cleared
+
+    def apply(self, query: Select, user_id: int) -> Select:
+        """Restrict a transactions query to the user and the requested filters"""
+        query = query.where(Transaction.user_id == user_id)
 
-@router.get("/", response_model=list[TransactionResponse])
+        if self.account_id:
+            query = query.where(Transaction.account_id == self.account_id)
+        if self.category_id:
+            query = query.where(Transaction.category_id == self.category_id)
+        if self.start_date:
+            query = query.where(Transaction.date >= self.start_date)
+        if self.end_date:
+            query = query.where(Transaction.date <= self.end_date)
+        if self.cleared is not None:
+            query = query.where(Transaction.cleared == self.cleared)
+
+        return query
+
+
+@router.get(
+    "/",
+    response_model=TransactionPage,
+    dependencies=[Depends(query_budget(1))]
+)
 async def list_transactions(
-    account_id: int | None = Query(None, description="Filter by account ID"),
-    category_id: int | None = Query(None, description="Filter by category ID"),
-    start_date: date | None = Query(None, description="Filter by start date"),
-    end_date: date | None = Query(None, description="Filter by end date"),
-    cleared: bool | None = Query(None, description="Filter by cleared status"),
+    filters: TransactionFilters = Depends(),
+    cursor: str | None = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(100, ge=1, le=500, description="Maximum transactions per page"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    List transactions for the current user with optional filters.
+
+    Results are ordered newest first by (date, id) and paginated by cursor:
+    pass `next_cursor` back as `cursor` to get the following page.
+    """
+    query = filters.apply(select(*RESPONSE_COLUMNS), current_user.id)
+
+    if cursor:
+        try:
+            cursor_date, cursor_id = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            ) from e
+        query = query.where(
+            tuple_(Transaction.date, Transaction.id) < tuple_(cursor_date, cursor_id)
+        )
+
+    # Fetch one extra row to learn whether another page follows
+    result = await db.execute(
+        query.order_by(Transaction.date.desc(), Transaction.id.desc()).limit(limit + 1)
+    )
+    transactions = result.all()
+
+    next_cursor = None
+    if len(transactions) > limit:
+        transactions = transactions[:limit]
+        last = transactions[-1]
+        next_cursor = encode_cursor(last.date, last.id)
+
+    # Rows go straight to JSON; the shape matches TransactionPage
+    return rows_response({"items": row_dicts(transactions), "next_cursor": next_cursor})
+
+
+def _ndjson_chunk(rows) -> bytes:
+    return b"".join(dumps(row._asdict()) + b"\n" for row in rows)
+
+
+def _csv_chunk(rows, header: bool = False) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow([column.key for column in EXPORT_COLUMNS])
+    writer.writerows(rows)
+    return buffer.getvalue().encode()
+
+
+async def _stream_export(query: Select, fmt: str):
+    """
+    Encode the query's rows batch by batch from a server-side cursor.
+
+    Uses its own session so the cursor outlives the request's dependencies.
+    """
+    if fmt == "csv":
+        yield _csv_chunk([], header=True)
+
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        async for rows in result.partitions():
+            yield _ndjson_chunk(rows) if fmt == "ndjson" else _csv_chunk(rows)
+
+
+@router.get(
+    "/export",
+    dependencies=[Depends(query_budget(1))]
+)
+async def export_transactions(
+    fmt: Literal["ndjson", "csv"] = Query("ndjson", alias="format", description="Output format"),
+    filters: TransactionFilters = Depends(),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Stream all matching transactions as NDJSON or CSV, newest first.
+
+    Rows are read through a server-side cursor and written as they arrive,
+    so memory use does not grow with the size of the ledger.
+    """
+    query = filters.apply(select(*EXPORT_COLUMNS), current_user.id).order_by(
+        Transaction.date.desc(), Transaction.id.desc()
+    )
+    media_type = "application/x-ndjson" if fmt == "ndjson" else "text/csv"
+    return StreamingResponse(
+        _stream_export(query, fmt),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="transactions.{fmt}"'},
+    )
+
+
+async def _owned_ids(db: AsyncSession, model, user_id: int, ids: set[int]) -> set[int]:
+    """Return the subset of `ids` that belong to the user"""
+    result = await db.execute(
+        select(model.id).where(model.id.in_(ids), model.user_id == user_id)
+    )
+    return set(result.scalars().all())
+
+
+def _owned(model, row_id: int, user_id: int):
+    """EXISTS condition: the row with this id belongs to the user"""
+    return select(model.id).where(model.id == row_id, model.user_id == user_id).exists()
+
+
+async def _missing_reference(db: AsyncSession, user_id: int, data: dict) -> HTTPException:
+    """The 404 for a write that matched nothing because of a foreign account or category"""
+    if "account_id" in data and not await _owned_ids(db, Account, user_id, {data["account_id"]}):
+        kind = "Account"
+    else:
+        kind = "Category"
+    return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"{kind} not found")
+
+
+class _ImportBatch:
+    """Validates parsed rows and loads them into transactions with COPY"""
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        default_account_id: int | None,
+        ledger: LedgerDelta
+    ):
+        self.db = db
+        self.user_id = user_id
+        self.default_account_id = default_account_id
+        self.ledger = ledger
+        # Ownership is checked once per account/category for the whole import
+        self.accounts: dict[int, bool] = {}
+        self.categories: dict[int, bool] = {}
+        self.imported = 0
+        self.failed = 0
+        self.errors: list[ImportRowError] = []
+
+    def fail(self, row: int, error: str) -> None:
+        self.failed += 1
+        if len(self.errors) < IMPORT_MAX_ERRORS:
+            self.errors.append(ImportRowError(row=row, error=error))
+
+    async def _check_ownership(self, rows: list[ParsedRow]) -> None:
+        new_accounts = {
+            r.data["account_id"] for r in rows if r.data["account_id"] not in self.accounts
+        }
+        new_categories = {
+            r.data["category_id"] for r in rows
+            if r.data["category_id"] is not None and r.data["category_id"] not in self.categories
+        }
+        new_accounts.discard(None)
+
+        if new_accounts:
+            owned = await _owned_ids(self.db, Account, self.user_id, new_accounts)
+            self.accounts.update({i: i in owned for i in new_accounts})
+        if new_categories:
+            owned = await _owned_ids(self.db, Category, self.user_id, new_categories)
+            self.categories.update({i: i in owned for i in new_categories})
+
+    async def load(self, rows: list[ParsedRow]) -> None:
+        """Validate one batch of parsed rows and COPY the valid ones"""
+        parsed = []
+        for row in rows:
+            if row.error:
+                self.fail(row.row, row.error)
+                continue
+            if row.data["account_id"] is None:
+                row.data["account_id"] = self.default_account_id
+            parsed.append(row)
+
+        await self._check_ownership(parsed)
+        # Pydantic validation of thousands of rows would stall the event loop
+        records = await run_in_threadpool(self._records, parsed)
+
+        if records:
+            conn = await self.db.connection()
+            raw = await conn.get_raw_connection()
+            await raw.driver_connection.copy_records_to_table(
+                Transaction.__tablename__, records=records, columns=IMPORT_COLUMNS
+            )
+            self.imported += len(records)
+
+    def _records(self, parsed: list[ParsedRow]) -> list[tuple]:
+        """COPY records for the rows that validate; the rest are reported"""
+        records = []
+        for row in parsed:
+            account_id = row.data["account_id"]
+            category_id = row.data["category_id"]
+            if account_id is None:
+                self.fail(row.row, "No account_id in row and none given for the import")
+                continue
+            if not self.accounts.get(account_id):
+                self.fail(row.row, f"Account not found: {account_id}")
+                continue
+            if category_id is not None and not self.categories.get(category_id):
+                self.fail(row.row, f"Category not found: {category_id}")
+                continue
+            try:
+                transaction = TransactionCreate.model_validate(row.data)
+            except ValidationError as e:
+                error = e.errors()[0]
+                field = ".".join(str(part) for part in error["loc"])
+                self.fail(row.row, f"{field}: {error['msg']}")
+                continue
+
+            self.ledger.record(
+                self.user_id,
+                transaction.account_id,
+                transaction.category_id,
+                transaction.date,
+                transaction.amount,
+                transaction.cleared,
+            )
+            records.append((
+                self.user_id,
+                transaction.account_id,
+                transaction.category_id,
+                transaction.date,
+                transaction.payee,
+                transaction.amount,
+                transaction.memo,
+                transaction.cleared,
+            ))
+        return records
+
+
+@router.post("/import", response_model=TransactionImportResult)
+async def import_transactions(
+    file: UploadFile = File(..., description="CSV, OFX/QFX or QIF statement"),
+    account_id: int | None = Form(None, description="Account for rows that do not name one"),
+    fmt: Literal["csv", "ofx", "qif"] | None = Form(
+        None, alias="format", description="Statement format; defaults to the file extension"
+    ),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """List all transactions for the current user with optional filters"""
-    query = db.query(Transaction).filter(Transaction.user_id == current_user.id)
+    """
+    Bulk import transactions from a bank statement.
 
-    if account_id:
-        query = query.filter(Transaction.account_id == account_id)
-    if category_id:
-        query = query.filter(Transaction.category_id == category_id)
-    if start_date:
-        query = query.filter(Transaction.date >= start_date)
-    if end_date:
-        query = query.filter(Transaction.date <= end_date)
-    if cleared is not None:
-        query = query.filter(Transaction.cleared == cleared)
+    - Uploads over IMPORT_MAX_BYTES are rejected with 413
+    - The upload is parsed as a stream, off the event loop, and loaded in
+      batches with COPY
+    - Account and category ownership is checked once per id
+    - Rows that fail to parse or validate are skipped and reported
+    - Valid rows are committed together in one transaction, along with
+      the resulting balance and category activity changes
+    """
+    fmt = fmt or detect_format(file.filename)
+    if fmt is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Unknown statement format; pass format=csv, ofx or qif"
+        )
+
+    # BodySizeLimitMiddleware refuses most oversized uploads before they are
+    # read; this catches files just over the limit within the multipart slack
+    if file.size is not None and file.size > settings.import_max_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Statement is larger than {settings.import_max_bytes} bytes"
+        )
 
-    transactions = query.order_by(Transaction.date.desc()).all()
-    return transactions
+    ledger = LedgerDelta()
+    batch = _ImportBatch(db, current_user.id, account_id, ledger)
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", errors="replace", newline="")
+    try:
+        parser = PARSERS[fmt](stream)
+        # Each batch is read and parsed in a worker thread
+        while rows := await run_in_threadpool(list, islice(parser, IMPORT_BATCH_SIZE)):
+            await batch.load(rows)
+    finally:
+        # Leave closing the upload to FastAPI
+        stream.detach()
+
+    await ledger.apply(db)
+    await bump_data_version(db, current_user.id)
+    await db.commit()
+
+    return TransactionImportResult(
+        format=fmt,
+        imported=batch.imported,
+        failed=batch.failed,
+        errors=batch.errors,
+    )
 
 
-@router.get("/{transaction_id}", response_model=TransactionResponse)
+def _not_found(kind: str, ids: set[int]) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"{kind} not found: {', '.join(str(i) for i in sorted(ids))}"
+    )
+
+
+# No query budget: besides a fixed seven statements, a batch runs one UPDATE
+# per distinct set of changed fields and one INSERT per page of creates
+@router.post("/batch", response_model=TransactionBatchResponse)
+async def batch_transactions(
+    batch: TransactionBatchRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Apply many creates, updates and deletes in one database transaction.
+
+    - Every referenced transaction, account and category is checked up front
+    - Creates run as one multi-row INSERT, updates as one UPDATE ... FROM (VALUES ...)
+      per set of changed fields, and deletes as one DELETE
+    - Any invalid operation rejects the whole batch
+    - Balances and category activity are adjusted once for the whole batch
+    - Results are returned in request order
+    """
+    table = Transaction.__table__
+    operations = batch.operations
+
+    creates = [(i, op) for i, op in enumerate(operations) if op.op == "create"]
+    updates = [
+        (i, op.id, op.data.model_dump(exclude_unset=True))
+        for i, op in enumerate(operations) if op.op == "update"
+    ]
+    deletes = [(i, op.id) for i, op in enumerate(operations) if op.op == "delete"]
+
+    for i, _, fields in updates:
+        nulls = sorted(f for f in REQUIRED_FIELDS if f in fields and fields[f] is None)
+        if nulls:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Operation {i}: {', '.join(nulls)} cannot be null"
+            )
+
+    target_ids = [txn_id for _, txn_id, _ in updates] + [txn_id for _, txn_id in deletes]
+    if len(set(target_ids)) != len(target_ids):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A transaction may appear in only one update or delete operation"
+        )
+
+    # Verify everything referenced belongs to the user, one query per table
+    account_ids = {op.data.account_id for _, op in creates}
+    account_ids |= {fields["account_id"] for _, _, fields in updates if "account_id" in fields}
+    category_ids = {op.data.category_id for _, op in creates}
+    category_ids |= {fields.get("category_id") for _, _, fields in updates}
+    category_ids.discard(None)
+
+    for model, ids, kind in (
+        (Account, account_ids, "Account"),
+        (Category, category_ids, "Category"),
+    ):
+        if ids:
+            missing = ids - await _owned_ids(db, model, current_user.id, ids)
+            if missing:
+                raise _not_found(kind, missing)
+
+    # Lock the targets and keep their current values for the ledger deltas
+    ledger = LedgerDelta()
+    targets = {}
+    if target_ids:
+        result = await db.execute(
+            select(
+                table.c.id,
+                table.c.user_id,
+                table.c.account_id,
+                table.c.category_id,
+                table.c.date,
+                table.c.amount,
+                table.c.cleared
+            )
+            .where(table.c.id.in_(target_ids), table.c.user_id == current_user.id)
+            .with_for_update()
+        )
+        targets = {row.id: row for row in result.all()}
+        missing = set(target_ids) - targets.keys()
+        if missing:
+            raise _not_found("Transaction", missing)
+
+    results: list[TransactionBatchResult | None] = [None] * len(operations)
+
+    if creates:
+        stmt = insert(table).returning(*table.c, sort_by_parameter_order=True)
+        result = await db.execute(
+            stmt, [{**op.data.model_dump(), "user_id": current_user.id} for _, op in creates]
+        )
+        for (i, _), row in zip(creates, result.all(), strict=True):
+            ledger.add(row)
+            results[i] = TransactionBatchResult(
+                op="create", id=row.id, transaction=TransactionResponse.model_validate(row._mapping)
+            )
+
+    # One UPDATE per distinct set of changed fields
+    groups: dict[tuple[str, ...], list[tuple[int, int, dict]]] = {}
+    for update_op in updates:
+        groups.setdefault(tuple(sorted(update_op[2])), []).append(update_op)
+
+    for fields, group in groups.items():
+        if fields:
+            changes = values(
+                column("id", Integer),
+                *(column(f, table.c[f].type) for f in fields),
+                name="changes"
+            ).data([(txn_id, *(data[f] for f in fields)) for _, txn_id, data in group])
+            stmt = (
+                update(table)
+                .where(table.c.id == changes.c.id, table.c.user_id == current_user.id)
+                # A column that is NULL in every row would otherwise be typed as text
+                .values({f: cast(changes.c[f], table.c[f].type) for f in fields})
+                .returning(*table.c)
+            )
+        else:
+            # Nothing to change; return the transactions as they are
+            stmt = select(table).where(table.c.id.in_([txn_id for _, txn_id, _ in group]))
+
+        rows = {row.id: row for row in (await db.execute(stmt)).all()}
+        for i, txn_id, _ in group:
+            ledger.remove(targets[txn_id])
+            ledger.add(rows[txn_id])
+            results[i] = TransactionBatchResult(
+                op="update",
+                id=txn_id,
+                transaction=TransactionResponse.model_validate(rows[txn_id]._mapping)
+            )
+
+    if deletes:
+        await db.execute(
+            delete(table).where(
+                table.c.id.in_([txn_id for _, txn_id in deletes]),
+                table.c.user_id == current_user.id
+            )
+        )
+        for i, txn_id in deletes:
+            ledger.remove(targets[txn_id])
+            results[i] = TransactionBatchResult(op="delete", id=txn_id)
+
+    await ledger.apply(db)
+    await bump_data_version(db, current_user.id)
+    await db.commit()
+    return TransactionBatchResponse(results=results)
+
+
+@router.get(
+    "/{transaction_id}",
+    response_model=TransactionResponse,
+    dependencies=[Depends(query_budget(1))]
+)
 async def get_transaction(
     transaction_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get a specific transaction by ID"""
-    transaction = db.query(Transaction).filter(
-        Transaction.id == transaction_id,
-        Transaction.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(Transaction).where(
+            Transaction.id == transaction_id,
+            Transaction.user_id == current_user.id
+        )
+    )
+    transaction = result.scalar_one_or_none()
 
     if not transaction:
         raise HTTPException(
@@ -61,82 +574,181 @@ async def get_transaction(
     return transaction
 
 
-@router.post("/", response_model=TransactionResponse, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/",
+    response_model=TransactionResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(query_budget(4))]
+)
 async def create_transaction(
     transaction_data: TransactionCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Create a new transaction"""
-    # Verify account belongs to user
-    account = db.query(Account).filter(
-        Account.id == transaction_data.account_id,
-        Account.user_id == current_user.id
-    ).first()
-
-    if not account:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Account not found"
-        )
+    """Create a new transaction and add it to its account's balance"""
+    table = Transaction.__table__
+    data = transaction_data.model_dump()
+    fields = [f for f in data if f != "account_id"]
 
-    transaction = Transaction(
-        **transaction_data.model_dump(),
-        user_id=current_user.id
+    # Selected from the account, so nothing is inserted unless the account
+    # (and the category, if any) is the user's
+    source = select(
+        Account.user_id,
+        Account.id,
+        *(literal(data[f], table.c[f].type) for f in fields)
+    ).where(Account.id == data["account_id"], Account.user_id == current_user.id)
+    if data["category_id"] is not None:
+        source = source.where(_owned(Category, data["category_id"], current_user.id))
+
+    result = await db.execute(
+        insert(table)
+        .from_select(["user_id", "account_id", *fields], source)
+        .returning(*RETURNING_COLUMNS)
     )
-    db.add(transaction)
-    db.commit()
-    db.refresh(transaction)
-    return transaction
+    transaction = result.one_or_none()
+
+    if not transaction:
+        raise await _missing_reference(db, current_user.id, data)
 
+    ledger = LedgerDelta()
+    ledger.add(transaction)
+    await ledger.apply(db)
 
-@router.put("/{transaction_id}", response_model=TransactionResponse)
+    await bump_data_version(db, current_user.id)
+    await db.commit()
+    return rows_response(transaction._asdict(), status_code=status.HTTP_201_CREATED)
+
+
+@router.put(
+    "/{transaction_id}",
+    response_model=TransactionResponse,
+    dependencies=[Depends(query_budget(4))]
+)
 async def update_transaction(
     transaction_id: int,
     transaction_data: TransactionUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Update an existing transaction"""
-    transaction = db.query(Transaction).filter(
-        Transaction.id == transaction_id,
-        Transaction.user_id == current_user.id
-    ).first()
+    """
+    Update an existing transaction.
 
-    if not transaction:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Transaction not found"
-        )
+    The old values are taken off their account balance and category
+    activity and the new values added, so moving a transaction between
+    accounts, categories or months adjusts both sides.
+    """
+    table = Transaction.__table__
 
     # Update only provided fields
     update_data = transaction_data.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(transaction, field, value)
 
-    db.commit()
-    db.refresh(transaction)
-    return transaction
+    nulls = sorted(f for f in REQUIRED_FIELDS if f in update_data and update_data[f] is None)
+    if nulls:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"{', '.join(nulls)} cannot be null"
+        )
+
+    if not update_data:
+        # Nothing to change; return the transaction as it is
+        result = await db.execute(
+            select(*RETURNING_COLUMNS).where(
+                table.c.id == transaction_id, table.c.user_id == current_user.id
+            )
+        )
+        transaction = result.one_or_none()
+        if not transaction:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Transaction not found"
+            )
+        return rows_response(transaction._asdict())
+
+    # The current values, for the ledger deltas. Locked so concurrent edits
+    # see each other's: FOR UPDATE waits for them and reads their result
+    old = (
+        select(table.c.id, *(table.c[f] for f in LEDGER_FIELDS))
+        .where(table.c.id == transaction_id, table.c.user_id == current_user.id)
+        .with_for_update()
+        .subquery("old")
+    )
+    where = [table.c.id == old.c.id]
+    # A new account or category must be the user's
+    if "account_id" in update_data:
+        where.append(_owned(Account, update_data["account_id"], current_user.id))
+    if update_data.get("category_id") is not None:
+        where.append(_owned(Category, update_data["category_id"], current_user.id))
+
+    result = await db.execute(
+        update(table)
+        .where(*where)
+        .values(**update_data)
+        .returning(
+            *RETURNING_COLUMNS,
+            *(old.c[f].label(f"old_{f}") for f in LEDGER_FIELDS)
+        )
+    )
+    transaction = result.one_or_none()
 
+    if not transaction:
+        if not await _owned_ids(db, Transaction, current_user.id, {transaction_id}):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Transaction not found"
+            )
+        raise await _missing_reference(db, current_user.id, update_data)
 
-@router.delete("/{transaction_id}", status_code=status.HTTP_204_NO_CONTENT)
+    ledger = LedgerDelta()
+    ledger.record(
+        transaction.user_id,
+        *(getattr(transaction, f"old_{f}") for f in LEDGER_FIELDS),
+        sign=-1
+    )
+    ledger.add(transaction)
+    await ledger.apply(db)
+
+    await bump_data_version(db, current_user.id)
+    await db.commit()
+    return rows_response({f: getattr(transaction, f) for f in TransactionResponse.model_fields})
+
+
+@router.delete(
+    "/{transaction_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(query_budget(4))]
+)
 async def delete_transaction(
     transaction_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Delete a transaction"""
-    transaction = db.query(Transaction).filter(
-        Transaction.id == transaction_id,
-        Transaction.user_id == current_user.id
-    ).first()
+    """Delete a transaction and take it off its account's balance"""
+    result = await db.execute(
+        delete(Transaction)
+        .where(
+            Transaction.id == transaction_id,
+            Transaction.user_id == current_user.id
+        )
+        .returning(
+            Transaction.user_id,
+            Transaction.account_id,
+            Transaction.category_id,
+            Transaction.date,
+            Transaction.amount,
+            Transaction.cleared
+        )
+    )
+    deleted = result.one_or_none()
 
-    if not transaction:
+    if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Transaction not found"
         )
 
-    db.delete(transaction)
-    db.commit()
+    ledger = LedgerDelta()
+    ledger.remove(deleted)
+    await ledger.apply(db)
+    await bump_data_version(db, current_user.id)
+    await db.commit()
     return None
@@ -11,19 +11,42 @@ from app.schemas.category import (
     CategoryCreate,
     CategoryUpdate,
     CategoryResponse,
+    CategoryGroupTree,
+    CategoryMerge,
+    CategoryMergeResult,
+    CategoryGroupOrder,
+    CategoryReorder,
 )
 from app.schemas.transaction import (
     TransactionBase,
     TransactionCreate,
     TransactionUpdate,
     TransactionResponse,
+    TransactionPage,
+    ImportRowError,
+    TransactionImportResult,
+    TransactionBatchCreate,
+    TransactionBatchUpdate,
+    TransactionBatchDelete,
+    TransactionBatchOperation,
+    TransactionBatchRequest,
+    TransactionBatchResult,
+    TransactionBatchResponse,
 )
 from app.schemas.budget import (
     BudgetAllocationBase,
     BudgetAllocationCreate,
     BudgetAllocationUpdate,
     BudgetAllocationResponse,
+    BudgetAllocationBulk,
+    BudgetMonthCopy,
+    BudgetFigures,
+    BudgetSummaryCategory,
+    BudgetSummaryGroup,
+    BudgetSummary,
 )
+from app.schemas.sync import SyncEntity, SyncChangeResponse, SyncPage
+from app.schemas.purge import PurgeJobResponse
 
 __all__ = [
     "UserBase",
@@ -41,12 +64,37 @@ __all__ = [
     "CategoryCreate",
     "CategoryUpdate",
     "CategoryResponse",
+    "CategoryGroupTree",
+    "CategoryMerge",
+    "CategoryMergeResult",
+    "CategoryGroupOrder",
+    "CategoryReorder",
     "TransactionBase",
     "TransactionCreate",
     "TransactionUpdate",
     "TransactionResponse",
+    "TransactionPage",
+    "ImportRowError",
+    "TransactionImportResult",
+    "TransactionBatchCreate",
+    "TransactionBatchUpdate",
+    "TransactionBatchDelete",
+    "TransactionBatchOperation",
+    "TransactionBatchRequest",
+    "TransactionBatchResult",
+    "TransactionBatchResponse",
     "BudgetAllocationBase",
     "BudgetAllocationCreate",
     "BudgetAllocationUpdate",
     "BudgetAllocationResponse",
+    "BudgetAllocationBulk",
+    "BudgetMonthCopy",
+    "BudgetFigures",
+    "BudgetSummaryCategory",
+    "BudgetSummaryGroup",
+    "BudgetSummary",
+    "SyncEntity",
+    "SyncChangeResponse",
+    "SyncPage",
+    "PurgeJobResponse",
 ]
@@ -9,23 +9,24 @@ class AccountBase(BaseModel):
     """Base account schema"""
     name: str = Field(..., min_length=1, max_length=100)
     type: AccountType
-    balance: Decimal = Field(default=Decimal("0.00"), decimal_places=2)
 
 
 class AccountCreate(AccountBase):
-    """Schema for creating an account"""
-    pass
+    """Schema for creating an account; a non-zero balance becomes a starting balance transaction"""
+    balance: Decimal = Field(default=Decimal("0.00"), max_digits=15, decimal_places=2)
 
 
 class AccountUpdate(BaseModel):
-    """Schema for updating an account"""
+    """Schema for updating an account; balances follow its transactions"""
     name: str | None = Field(None, min_length=1, max_length=100)
     type: AccountType | None = None
-    balance: Decimal | None = Field(None, decimal_places=2)
 
 
 class AccountResponse(AccountBase):
     """Schema for account response"""
+    balance: Decimal
+    cleared_balance: Decimal
+    uncleared_balance: Decimal
     id: int
     user_id: int
 
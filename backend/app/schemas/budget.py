@@ -1,23 +1,27 @@
 """Budget allocation schemas"""
 
 from decimal import Decimal
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 import re
 
 
+def validate_month(v: str) -> str:
+    """Validate month is in YYYY-MM format"""
+    if not re.match(r"^\d{4}-(0[1-9]|1[0-2])$", v):
+        raise ValueError("Month must be in YYYY-MM format with valid month (01-12)")
+    return v
+
+
 class BudgetAllocationBase(BaseModel):
     """Base budget allocation schema"""
     category_id: int
     month: str = Field(..., pattern=r"^\d{4}-\d{2}$")
-    amount: Decimal = Field(..., decimal_places=2)
+    amount: Decimal = Field(..., max_digits=15, decimal_places=2)
 
     @field_validator("month")
     @classmethod
     def validate_month_format(cls, v: str) -> str:
-        """Validate month is in YYYY-MM format"""
-        if not re.match(r"^\d{4}-(0[1-9]|1[0-2])$", v):
-            raise ValueError("Month must be in YYYY-MM format with valid month (01-12)")
-        return v
+        return validate_month(v)
 
 
 class BudgetAllocationCreate(BudgetAllocationBase):
@@ -27,7 +31,7 @@ class BudgetAllocationCreate(BudgetAllocationBase):
 
 class BudgetAllocationUpdate(BaseModel):
     """Schema for updating a budget allocation"""
-    amount: Decimal = Field(..., decimal_places=2)
+    amount: Decimal = Field(..., max_digits=15, decimal_places=2)
 
 
 class BudgetAllocationResponse(BudgetAllocationBase):
@@ -37,3 +41,69 @@ class BudgetAllocationResponse(BudgetAllocationBase):
 
     class Config:
         from_attributes = True
+
+
+class BudgetAllocationBulk(BaseModel):
+    """Schema for setting many allocations at once; existing ones get the new amount"""
+    allocations: list[BudgetAllocationCreate] = Field(..., min_length=1, max_length=1000)
+
+    @model_validator(mode="after")
+    def check_unique(self) -> "BudgetAllocationBulk":
+        """One allocation per category and month"""
+        seen = set()
+        for allocation in self.allocations:
+            key = (allocation.category_id, allocation.month)
+            if key in seen:
+                raise ValueError(
+                    f"Category {allocation.category_id} is listed twice for {allocation.month}"
+                )
+            seen.add(key)
+        return self
+
+
+class BudgetMonthCopy(BaseModel):
+    """Schema for copying one month's allocations to another"""
+    from_month: str = Field(..., pattern=r"^\d{4}-\d{2}$")
+    to_month: str = Field(..., pattern=r"^\d{4}-\d{2}$")
+    # Replace allocations to_month already has, instead of keeping them
+    overwrite: bool = False
+
+    @field_validator("from_month", "to_month")
+    @classmethod
+    def validate_month_format(cls, v: str) -> str:
+        return validate_month(v)
+
+
+class BudgetFigures(BaseModel):
+    """
+    Envelope figures for one month.
+
+    budgeted: allocated this month
+    activity: net transaction amount this month (spending is negative)
+    available: everything allocated minus everything spent up to the end
+    of the month, so unspent money and overspending carry over
+    """
+    budgeted: Decimal = Decimal("0.00")
+    activity: Decimal = Decimal("0.00")
+    available: Decimal = Decimal("0.00")
+
+
+class BudgetSummaryCategory(BudgetFigures):
+    """A category's figures for the month"""
+    id: int
+    name: str
+    sort_order: int
+
+
+class BudgetSummaryGroup(BudgetFigures):
+    """A category group's totals and its categories"""
+    id: int
+    name: str
+    sort_order: int
+    categories: list[BudgetSummaryCategory] = []
+
+
+class BudgetSummary(BudgetFigures):
+    """The budget screen for a month: overall totals and the category tree"""
+    month: str
+    groups: list[BudgetSummaryGroup] = []
@@ -1,6 +1,6 @@
 """Category schemas"""
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 
 class CategoryGroupBase(BaseModel):
@@ -55,3 +55,51 @@ class CategoryResponse(CategoryBase):
 
     class Config:
         from_attributes = True
+
+
+class CategoryGroupTree(CategoryGroupResponse):
+    """Category group with its categories nested, in sort order"""
+    categories: list[CategoryResponse] = []
+
+
+class CategoryMerge(BaseModel):
+    """Schema for merging a category into another"""
+    target_category_id: int
+
+
+class CategoryMergeResult(BaseModel):
+    """Schema for a completed merge; the merged category no longer exists"""
+    target: CategoryResponse
+    transactions_moved: int
+    allocations_moved: int  # Including those added to one the target had for the month
+
+
+class CategoryGroupOrder(BaseModel):
+    """A group's categories in display order; categories listed from other groups move in"""
+    id: int
+    category_ids: list[int] = Field(..., max_length=1000)
+
+
+class CategoryReorder(BaseModel):
+    """
+    Schema for reordering groups and categories at once.
+
+    Listed groups and categories get sort orders 0, 1, 2... in list order;
+    anything not listed keeps its place.
+    """
+    group_ids: list[int] = Field(default=[], max_length=1000)  # Groups in display order
+    groups: list[CategoryGroupOrder] = Field(default=[], max_length=1000)
+
+    @model_validator(mode="after")
+    def check_ids(self) -> "CategoryReorder":
+        """Something to reorder, and no group or category listed twice"""
+        if not self.group_ids and not self.groups:
+            raise ValueError("Nothing to reorder; give group_ids, groups or both")
+        for kind, ids in (
+            ("Group", self.group_ids),
+            ("Group", [group.id for group in self.groups]),
+            ("Category", [i for group in self.groups for i in group.category_ids]),
+        ):
+            if len(set(ids)) != len(ids):
+                raise ValueError(f"{kind} ids may only be listed once")
+        return self
@@ -0,0 +1,21 @@
+"""Background purge schemas"""
+
+from datetime import datetime
+from typing import Literal
+from pydantic import BaseModel
+
+
+class PurgeJobResponse(BaseModel):
+    """Schema for a background purge's progress; poll until status is done or failed"""
+    id: str
+    entity: Literal["account", "user"]
+    entity_id: int
+    status: Literal["pending", "running", "done", "failed"]
+    total: int | None = None  # Transactions to delete, once counted
+    deleted: int
+    error: str | None = None
+    created_at: datetime
+    finished_at: datetime | None = None
+
+    class Config:
+        from_attributes = True
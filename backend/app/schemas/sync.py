@@ -0,0 +1,35 @@
+"""Delta sync schemas"""
+
+from typing import Literal
+from pydantic import BaseModel
+
+from app.schemas.account import AccountResponse
+from app.schemas.budget import BudgetAllocationResponse
+from app.schemas.category import CategoryGroupResponse, CategoryResponse
+from app.schemas.transaction import TransactionResponse
+
+SyncEntity = Literal[
+    "accounts", "category_groups", "categories", "budget_allocations", "transactions"
+]
+
+
+class SyncChangeResponse(BaseModel):
+    """The current state of one changed row, or a tombstone if it was deleted"""
+    entity: SyncEntity
+    id: int
+    deleted: bool
+    data: (
+        AccountResponse
+        | CategoryGroupResponse
+        | CategoryResponse
+        | BudgetAllocationResponse
+        | TransactionResponse
+        | None
+    ) = None
+
+
+class SyncPage(BaseModel):
+    """Schema for a page of changes; pass next_token as `since` for the next call"""
+    changes: list[SyncChangeResponse]
+    next_token: str
+    has_more: bool
@@ -1,7 +1,8 @@
 """Transaction schemas"""
 
-from datetime import date
+from datetime import date as date_type
 from decimal import Decimal
+from typing import Annotated, Literal
 from pydantic import BaseModel, Field
 
 
@@ -9,9 +10,9 @@ class TransactionBase(BaseModel):
     """Base transaction schema"""
     account_id: int
     category_id: int | None = None
-    date: date
+    date: date_type
     payee: str = Field(..., min_length=1, max_length=200)
-    amount: Decimal = Field(..., decimal_places=2)
+    amount: Decimal = Field(..., max_digits=15, decimal_places=2)
     memo: str | None = Field(None, max_length=500)
     cleared: bool = False
 
@@ -25,9 +26,9 @@ class TransactionUpdate(BaseModel):
     """Schema for updating a transaction"""
     account_id: int | None = None
     category_id: int | None = None
-    date: date | None = None
+    date: date_type | None = None
     payee: str | None = Field(None, min_length=1, max_length=200)
-    amount: Decimal | None = Field(None, decimal_places=2)
+    amount: Decimal | None = Field(None, max_digits=15, decimal_places=2)
     memo: str | None = Field(None, max_length=500)
     cleared: bool | None = None
 
@@ -39,3 +40,65 @@ class TransactionResponse(TransactionBase):
 
     class Config:
         from_attributes = True
+
+
+class TransactionPage(BaseModel):
+    """Schema for a page of transactions, newest first"""
+    items: list[TransactionResponse]
+    next_cursor: str | None = None
+
+
+class ImportRowError(BaseModel):
+    """A statement row that was not imported"""
+    row: int
+    error: str
+
+
+class TransactionImportResult(BaseModel):
+    """Schema for bulk import response"""
+    format: str
+    imported: int
+    failed: int
+    errors: list[ImportRowError]
+
+
+class TransactionBatchCreate(BaseModel):
+    """Batch operation creating a transaction"""
+    op: Literal["create"]
+    data: TransactionCreate
+
+
+class TransactionBatchUpdate(BaseModel):
+    """Batch operation updating a transaction"""
+    op: Literal["update"]
+    id: int
+    data: TransactionUpdate
+
+
+class TransactionBatchDelete(BaseModel):
+    """Batch operation deleting a transaction"""
+    op: Literal["delete"]
+    id: int
+
+
+TransactionBatchOperation = Annotated[
+    TransactionBatchCreate | TransactionBatchUpdate | TransactionBatchDelete,
+    Field(discriminator="op"),
+]
+
+
+class TransactionBatchRequest(BaseModel):
+    """Schema for a batch of transaction mutations"""
+    operations: list[TransactionBatchOperation] = Field(..., min_length=1, max_length=1000)
+
+
+class TransactionBatchResult(BaseModel):
+    """Outcome of one batch operation; `transaction` is omitted for deletes"""
+    op: Literal["create", "update", "delete"]
+    id: int
+    transaction: TransactionResponse | None = None
+
+
+class TransactionBatchResponse(BaseModel):
+    """Schema for batch mutation response, in request order"""
+    results: list[TransactionBatchResult]
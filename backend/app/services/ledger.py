@@ -0,0 +1,386 @@
+"""
+Derived ledger state maintained incrementally from transaction writes.
+
+- Account balances (total, cleared and uncleared)
+- Category activity per month (CategoryMonthActivity)
+"""
+
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import (
+    Integer,
+    Numeric,
+    and_,
+    case,
+    cast,
+    column,
+    delete,
+    func,
+    insert,
+    literal,
+    or_,
+    select,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Account, CategoryMonthActivity, Transaction
+
+ZERO = Decimal("0.00")
+MONEY = Numeric(precision=15, scale=2)
+
+
+def month_of(day: date) -> str:
+    """The YYYY-MM month a date falls in"""
+    return f"{day:%Y-%m}"
+
+
+# SQL equivalent of month_of
+TRANSACTION_MONTH = func.to_char(Transaction.date, "YYYY-MM")
+
+
+class LedgerDelta:
+    """
+    Accumulates how transaction writes change derived ledger state.
+
+    Call `add` for every row written and `remove` for every row replaced or
+    deleted (an update is a remove of the old values plus an add of the new),
+    then `apply` in the same DB transaction as the writes. Deltas are
+    applied relative to the stored values, so concurrent writers compose.
+    """
+
+    def __init__(self):
+        # account_id -> [cleared delta, uncleared delta]
+        self.balances: dict[int, list[Decimal]] = defaultdict(lambda: [ZERO, ZERO])
+        # (user_id, category_id, month) -> [activity delta, count delta]
+        self.activity: dict[tuple[int, int, str], list] = defaultdict(lambda: [ZERO, 0])
+
+    def record(
+        self,
+        user_id: int,
+        account_id: int,
+        category_id: int | None,
+        day: date,
+        amount: Decimal,
+        cleared: bool,
+        sign: int = 1
+    ) -> None:
+        self.balances[account_id][0 if cleared else 1] += sign * amount
+        if category_id is not None:
+            totals = self.activity[(user_id, category_id, month_of(day))]
+            totals[0] += sign * amount
+            totals[1] += sign
+
+    def add(self, row) -> None:
+        """Count a transaction row (ORM object or result row) that now exists"""
+        self.record(
+            row.user_id, row.account_id, row.category_id, row.date, row.amount, row.cleared
+        )
+
+    def remove(self, row) -> None:
+        """Count a transaction row that no longer exists in this form"""
+        self.record(
+            row.user_id, row.account_id, row.category_id, row.date, row.amount, row.cleared,
+            sign=-1
+        )
+
+    async def apply(self, db: AsyncSession) -> None:
+        """Apply all deltas: one UPDATE for balances, one upsert for activity"""
+        await self._apply_balances(db)
+        await self._apply_activity(db)
+
+    async def _apply_balances(self, db: AsyncSession) -> None:
+        rows = [
+            (account_id, cleared, uncleared)
+            for account_id, (cleared, uncleared) in sorted(self.balances.items())
+            if cleared or uncleared
+        ]
+        if rows:
+            deltas = values(
+                column("account_id", Integer),
+                column("cleared", MONEY),
+                column("uncleared", MONEY),
+                name="deltas"
+            ).data(rows)
+            await db.execute(
+                update(Account)
+                .where(Account.id == deltas.c.account_id)
+                .values(
+                    balance=Account.balance + deltas.c.cleared + deltas.c.uncleared,
+                    cleared_balance=Account.cleared_balance + deltas.c.cleared,
+                    uncleared_balance=Account.uncleared_balance + deltas.c.uncleared,
+                )
+                .execution_options(synchronize_session=False)
+            )
+        self.balances.clear()
+
+    async def _apply_activity(self, db: AsyncSession) -> None:
+        # Sorted so concurrent writers lock rollup rows in the same order
+        rows = [
+            {
+                "user_id": user_id,
+                "category_id": category_id,
+                "month": month,
+                "activity": amount,
+                "transaction_count": count,
+            }
+            for (user_id, category_id, month), (amount, count) in sorted(self.activity.items())
+            if amount or count
+        ]
+        if rows:
+            table = CategoryMonthActivity.__table__
+            stmt = pg_insert(table).values(rows)
+            await db.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[table.c.user_id, table.c.category_id, table.c.month],
+                    set_={
+                        "activity": table.c.activity + stmt.excluded.activity,
+                        "transaction_count": (
+                            table.c.transaction_count + stmt.excluded.transaction_count
+                        ),
+                    }
+                )
+            )
+        self.activity.clear()
+
+
+async def remove_account_activity(db: AsyncSession, account_id: int) -> None:
+    """
+    Take an account's transactions out of the category rollup.
+
+    Call before deleting the account; its transactions go with it by
+    cascade, so they never pass through a LedgerDelta.
+    """
+    sums = (
+        select(
+            Transaction.user_id,
+            Transaction.category_id,
+            TRANSACTION_MONTH.label("month"),
+            func.sum(Transaction.amount).label("activity"),
+            func.count().label("transaction_count"),
+        )
+        .where(Transaction.account_id == account_id, Transaction.category_id.is_not(None))
+        .group_by(Transaction.user_id, Transaction.category_id, TRANSACTION_MONTH)
+        .subquery("sums")
+    )
+    await db.execute(
+        update(CategoryMonthActivity)
+        .where(
+            CategoryMonthActivity.user_id == sums.c.user_id,
+            CategoryMonthActivity.category_id == sums.c.category_id,
+            CategoryMonthActivity.month == sums.c.month,
+        )
+        .values(
+            activity=CategoryMonthActivity.activity - sums.c.activity,
+            transaction_count=CategoryMonthActivity.transaction_count - sums.c.transaction_count,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def move_category_activity(
+    db: AsyncSession, user_id: int, source_id: int, target_id: int
+) -> None:
+    """
+    Add a category's rollup rows into another category's, month by month.
+
+    For merges: call when moving all of the source's transactions to the
+    target. The source's rows go when the source category is deleted.
+    """
+    table = CategoryMonthActivity.__table__
+    stmt = pg_insert(table).from_select(
+        ["user_id", "category_id", "month", "activity", "transaction_count"],
+        select(
+            table.c.user_id,
+            literal(target_id),
+            table.c.month,
+            table.c.activity,
+            table.c.transaction_count,
+        )
+        .where(table.c.user_id == user_id, table.c.category_id == source_id)
+        # Same lock order as LedgerDelta.apply
+        .order_by(table.c.month)
+    )
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.category_id, table.c.month],
+            set_={
+                "activity": table.c.activity + stmt.excluded.activity,
+                "transaction_count": table.c.transaction_count + stmt.excluded.transaction_count,
+            }
+        )
+    )
+
+
+def _balance_sums(user_id: int | None = None):
+    """Balances recomputed from transactions, one row per account"""
+    cleared = cast(func.coalesce(
+        func.sum(case((Transaction.cleared, Transaction.amount), else_=0)), 0
+    ), MONEY)
+    uncleared = cast(func.coalesce(
+        func.sum(case((Transaction.cleared, 0), else_=Transaction.amount)), 0
+    ), MONEY)
+    query = (
+        select(
+            Account.id.label("account_id"),
+            cleared.label("cleared"),
+            uncleared.label("uncleared"),
+        )
+        .select_from(Account)
+        .outerjoin(Transaction, Transaction.account_id == Account.id)
+        .group_by(Account.id)
+    )
+    if user_id is not None:
+        query = query.where(Account.user_id == user_id)
+    return query.subquery("sums")
+
+
+def _mismatch(sums):
+    return or_(
+        Account.cleared_balance != sums.c.cleared,
+        Account.uncleared_balance != sums.c.uncleared,
+        Account.balance != sums.c.cleared + sums.c.uncleared,
+    )
+
+
+async def check_balances(db: AsyncSession, user_id: int | None = None) -> list[dict]:
+    """Return every account whose stored balances disagree with its transactions"""
+    sums = _balance_sums(user_id)
+    result = await db.execute(
+        select(
+            Account.id,
+            Account.user_id,
+            Account.balance,
+            Account.cleared_balance,
+            Account.uncleared_balance,
+            sums.c.cleared,
+            sums.c.uncleared,
+        )
+        .join(sums, sums.c.account_id == Account.id)
+        .where(_mismatch(sums))
+        .order_by(Account.id)
+    )
+    return [
+        {
+            "account_id": row.id,
+            "user_id": row.user_id,
+            "stored": {
+                "balance": row.balance,
+                "cleared_balance": row.cleared_balance,
+                "uncleared_balance": row.uncleared_balance,
+            },
+            "expected": {
+                "balance": row.cleared + row.uncleared,
+                "cleared_balance": row.cleared,
+                "uncleared_balance": row.uncleared,
+            },
+        }
+        for row in result.all()
+    ]
+
+
+async def rebuild_balances(db: AsyncSession, user_id: int | None = None) -> list[int]:
+    """Recompute balances from transactions in one statement, returning the fixed account ids"""
+    sums = _balance_sums(user_id)
+    result = await db.execute(
+        update(Account)
+        .where(and_(Account.id == sums.c.account_id, _mismatch(sums)))
+        .values(
+            balance=sums.c.cleared + sums.c.uncleared,
+            cleared_balance=sums.c.cleared,
+            uncleared_balance=sums.c.uncleared,
+        )
+        .returning(Account.id)
+        .execution_options(synchronize_session=False)
+    )
+    return sorted(result.scalars().all())
+
+
+def _activity_sums(user_id: int | None = None):
+    """Category activity recomputed from transactions"""
+    query = (
+        select(
+            Transaction.user_id,
+            Transaction.category_id,
+            TRANSACTION_MONTH.label("month"),
+            func.sum(Transaction.amount).label("activity"),
+            func.count().label("transaction_count"),
+        )
+        .where(Transaction.category_id.is_not(None))
+        .group_by(Transaction.user_id, Transaction.category_id, TRANSACTION_MONTH)
+    )
+    if user_id is not None:
+        query = query.where(Transaction.user_id == user_id)
+    return query
+
+
+async def check_activity(db: AsyncSession, user_id: int | None = None) -> list[dict]:
+    """Return every rollup row that disagrees with the transactions, missing rows included"""
+    sums = _activity_sums(user_id).subquery("sums")
+    # Rows whose transactions have all gone are harmless leftovers
+    rollup = select(CategoryMonthActivity).where(CategoryMonthActivity.transaction_count != 0)
+    if user_id is not None:
+        rollup = rollup.where(CategoryMonthActivity.user_id == user_id)
+    rollup = rollup.subquery("rollup")
+
+    keys = [
+        func.coalesce(rollup.c[key], sums.c[key]).label(key)
+        for key in ("user_id", "category_id", "month")
+    ]
+    result = await db.execute(
+        select(
+            *keys,
+            rollup.c.activity,
+            rollup.c.transaction_count,
+            sums.c.activity.label("expected_activity"),
+            sums.c.transaction_count.label("expected_count"),
+        )
+        .select_from(rollup)
+        .join(
+            sums,
+            and_(
+                rollup.c.user_id == sums.c.user_id,
+                rollup.c.category_id == sums.c.category_id,
+                rollup.c.month == sums.c.month,
+            ),
+            full=True
+        )
+        .where(or_(
+            rollup.c.activity.is_distinct_from(sums.c.activity),
+            rollup.c.transaction_count.is_distinct_from(sums.c.transaction_count),
+        ))
+        .order_by(*keys)
+    )
+    return [
+        {
+            "user_id": row.user_id,
+            "category_id": row.category_id,
+            "month": row.month,
+            "stored": {"activity": row.activity, "transaction_count": row.transaction_count},
+            "expected": {
+                "activity": row.expected_activity,
+                "transaction_count": row.expected_count,
+            },
+        }
+        for row in result.all()
+    ]
+
+
+async def rebuild_activity(db: AsyncSession, user_id: int | None = None) -> int:
+    """Replace the category rollup with sums of the transactions, returning the row count"""
+    stmt = delete(CategoryMonthActivity)
+    if user_id is not None:
+        stmt = stmt.where(CategoryMonthActivity.user_id == user_id)
+    await db.execute(stmt)
+
+    result = await db.execute(
+        insert(CategoryMonthActivity).from_select(
+            ["user_id", "category_id", "month", "activity", "transaction_count"],
+            _activity_sums(user_id)
+        )
+    )
+    return result.rowcount
@@ -0,0 +1,255 @@
+"""
+Chunked deletion of accounts and users too large to delete in one statement.
+
+Deleting an account or user cascades to its transactions in the database.
+For a few thousand rows that is one quick statement; for hundreds of
+thousands it holds row locks and trigger transition tables and ties up a
+worker for as long as it runs. A purge deletes the transactions in chunks
+instead, each chunk in its own DB transaction together with its ledger
+deltas, so balances and the category rollup are right after every chunk
+and an interrupted purge can simply be run again. The account or user row
+goes last, taking the remaining small tables with it by cascade.
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import logging
+import uuid
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+
+from sqlalchemy import delete, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.middleware.auth import principal_cache
+from app.models import Account, SyncChange, Transaction, User
+from app.services.ledger import LedgerDelta, remove_account_activity
+from app.services.versioning import bump_data_version
+
+logger = logging.getLogger(__name__)
+
+# Finished jobs kept for polling, oldest dropped first
+MAX_FINISHED_JOBS = 1000
+
+
+async def count_transactions(db: AsyncSession, *where, limit: int | None = None) -> int:
+    """Count the transactions matching `where`, stopping at `limit`"""
+    query = select(Transaction.id).where(*where)
+    if limit is not None:
+        query = query.limit(limit)
+    result = await db.execute(select(func.count()).select_from(query.subquery()))
+    return result.scalar_one()
+
+
+async def purge_transactions(
+    where: list,
+    chunk_size: int,
+    on_chunk: Callable[[int], None] | None = None
+) -> int:
+    """
+    Delete the transactions matching `where`, `chunk_size` per DB transaction.
+
+    Calls `on_chunk` with the running total after each commit and returns
+    the number deleted.
+    """
+    deleted = 0
+    async with AsyncSessionLocal() as db:
+        while True:
+            chunk = select(Transaction.id).where(*where).limit(chunk_size).scalar_subquery()
+            result = await db.execute(
+                delete(Transaction)
+                .where(Transaction.id.in_(chunk))
+                .returning(
+                    Transaction.user_id,
+                    Transaction.account_id,
+                    Transaction.category_id,
+                    Transaction.date,
+                    Transaction.amount,
+                    Transaction.cleared,
+                )
+                .execution_options(synchronize_session=False)
+            )
+            rows = result.all()
+            if not rows:
+                await db.rollback()
+                return deleted
+
+            delta = LedgerDelta()
+            for row in rows:
+                delta.remove(row)
+            await delta.apply(db)
+            # Also returns the connection to the pool between chunks
+            await db.commit()
+
+            deleted += len(rows)
+            if on_chunk is not None:
+                on_chunk(deleted)
+
+
+async def purge_account(
+    user_id: int,
+    account_id: int,
+    chunk_size: int | None = None,
+    on_chunk: Callable[[int], None] | None = None
+) -> int:
+    """Delete an account's transactions in chunks, then the account; returns the count"""
+    deleted = await purge_transactions(
+        [Transaction.account_id == account_id, Transaction.user_id == user_id],
+        chunk_size or settings.purge_chunk_size,
+        on_chunk
+    )
+    async with AsyncSessionLocal() as db:
+        # Transactions written to the account during the purge go with it
+        await remove_account_activity(db, account_id)
+        await db.execute(
+            delete(Account).where(Account.id == account_id, Account.user_id == user_id)
+        )
+        await bump_data_version(db, user_id)
+        await db.commit()
+    return deleted
+
+
+async def purge_user(
+    user_id: int,
+    chunk_size: int | None = None,
+    on_chunk: Callable[[int], None] | None = None
+) -> int:
+    """
+    Delete a user's transactions and sync log in chunks, then the user; returns the count.
+
+    The user's principal is evicted from this process's cache. Other
+    processes keep authenticating it for up to PRINCIPAL_CACHE_TTL_SECONDS.
+    """
+    chunk_size = chunk_size or settings.purge_chunk_size
+    deleted = await purge_transactions([Transaction.user_id == user_id], chunk_size, on_chunk)
+    async with AsyncSessionLocal() as db:
+        # Every deleted transaction left a tombstone in the sync log
+        keys = (
+            select(SyncChange.entity, SyncChange.entity_id)
+            .where(SyncChange.user_id == user_id)
+            .limit(chunk_size)
+        )
+        while True:
+            result = await db.execute(
+                delete(SyncChange)
+                .where(tuple_(SyncChange.entity, SyncChange.entity_id).in_(keys))
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+            if result.rowcount < chunk_size:
+                break
+        result = await db.execute(
+            delete(User).where(User.id == user_id).returning(User.clerk_user_id)
+        )
+        clerk_user_id = result.scalar_one_or_none()
+        await db.commit()
+    if clerk_user_id is not None:
+        principal_cache.pop(clerk_user_id)
+    return deleted
+
+
+@dataclass
+class PurgeJob:
+    """A queued or running purge and its progress"""
+    entity: str  # "account" or "user"
+    entity_id: int
+    user_id: int
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: str = "pending"
+    total: int | None = None
+    deleted: int = 0
+    error: str | None = None
+    created_at: datetime = field(default_factory=lambda: datetime.now(UTC))
+    finished_at: datetime | None = None
+
+    def transaction_filter(self) -> list:
+        if self.entity == "account":
+            return [Transaction.account_id == self.entity_id, Transaction.user_id == self.user_id]
+        return [Transaction.user_id == self.user_id]
+
+
+class PurgeQueue:
+    """
+    Runs purges one at a time in a background task of this process.
+
+    One at a time, so purges use at most one pooled connection between
+    them and leave the rest to requests. Jobs are kept in memory: they are
+    only visible to the worker process that accepted them, and a purge cut
+    short by a restart is resumed by deleting the account again.
+    """
+
+    def __init__(self):
+        self.jobs: dict[str, PurgeJob] = {}
+        self._pending: deque[PurgeJob] = deque()
+        self._task: asyncio.Task | None = None
+
+    def get(self, job_id: str, user_id: int) -> PurgeJob | None:
+        job = self.jobs.get(job_id)
+        return job if job is not None and job.user_id == user_id else None
+
+    def submit(self, entity: str, entity_id: int, user_id: int) -> PurgeJob:
+        """Queue a purge, or return the unfinished one for the same row"""
+        for job in self.jobs.values():
+            if (job.entity, job.entity_id) == (entity, entity_id) and job.finished_at is None:
+                return job
+
+        job = PurgeJob(entity=entity, entity_id=entity_id, user_id=user_id)
+        self.jobs[job.id] = job
+        self._trim()
+        self._pending.append(job)
+        if self._task is None or self._task.done():
+            # A fresh context, so the purge's statements are not counted
+            # against (or budgeted as) the request that queued it
+            self._task = asyncio.create_task(self._run(), context=contextvars.Context())
+        return job
+
+    def _trim(self) -> None:
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished_at is not None]
+        for job_id in finished[:max(len(finished) - MAX_FINISHED_JOBS, 0)]:
+            del self.jobs[job_id]
+
+    async def _run(self) -> None:
+        while self._pending:
+            await self._run_job(self._pending.popleft())
+
+    async def _run_job(self, job: PurgeJob) -> None:
+        job.status = "running"
+
+        def progress(deleted: int) -> None:
+            job.deleted = deleted
+
+        try:
+            async with AsyncSessionLocal() as db:
+                job.total = await count_transactions(db, *job.transaction_filter())
+            if job.entity == "account":
+                await purge_account(job.user_id, job.entity_id, on_chunk=progress)
+            else:
+                await purge_user(job.user_id, on_chunk=progress)
+            job.status = "done"
+        except asyncio.CancelledError:
+            job.status = "failed"
+            job.error = "Interrupted by shutdown; delete again to resume"
+            raise
+        except Exception as e:
+            logger.exception("Purge of %s %d failed", job.entity, job.entity_id)
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            job.finished_at = datetime.now(UTC)
+
+    async def stop(self) -> None:
+        """Cancel the running purge; committed chunks stay deleted"""
+        self._pending.clear()
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+
+purges = PurgeQueue()
@@ -0,0 +1,68 @@
+"""
+Per-user cache of read endpoint responses.
+
+Keys include the user's data version, so any write (from any process)
+makes that user's cached responses unreachable; writes in this process
+also drop them right away to free the memory. Lookups happen in
+`conditional_get` after the ETag check, and successful responses are
+stored by routers that use `CachedRoute`.
+"""
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+from app.cache import MemoryResponseCache, ResponseCacheBackend
+from app.config import settings
+
+response_cache: ResponseCacheBackend | None = (
+    MemoryResponseCache(
+        max_entries=settings.response_cache_max_entries,
+        max_bytes=settings.response_cache_max_bytes,
+        ttl_seconds=settings.response_cache_ttl_seconds,
+    )
+    if settings.response_cache_enabled
+    else None
+)
+
+
+def user_namespace(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+def response_cache_key(user_id: int, version: int, request: Request) -> str:
+    return f"{user_namespace(user_id)}:v{version}:{request.url.path}?{request.url.query}"
+
+
+class ResponseCacheHit(Exception):
+    """Raised by conditional_get to answer from the cache without running the endpoint"""
+
+    def __init__(self, body: bytes, headers: dict[str, str]):
+        self.body = body
+        self.headers = headers
+
+
+async def response_cache_hit_handler(request: Request, exc: ResponseCacheHit) -> Response:
+    return Response(content=exc.body, media_type="application/json", headers=exc.headers)
+
+
+async def invalidate_user(user_id: int) -> None:
+    """Drop the user's cached responses"""
+    if response_cache is not None:
+        await response_cache.invalidate(user_namespace(user_id))
+
+
+class CachedRoute(APIRoute):
+    """Route class that stores 200 responses for requests marked cacheable by conditional_get"""
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def cached_route_handler(request: Request) -> Response:
+            response = await handler(request)
+            entry = getattr(request.state, "response_cache_entry", None)
+            if entry is not None and response_cache is not None and response.status_code == 200:
+                namespace, key = entry
+                await response_cache.set(namespace, key, bytes(response.body))
+            return response
+
+        return cached_route_handler
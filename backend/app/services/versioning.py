@@ -0,0 +1,97 @@
+"""Per-user data version and conditional GETs"""
+
+from fastapi import Depends, HTTPException, Request, Response, status
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_db
+from app.middleware import get_current_user
+from app.models import User
+from app.services.response_cache import (
+    ResponseCacheHit,
+    invalidate_user,
+    response_cache,
+    response_cache_key,
+    user_namespace,
+)
+
+
+async def bump_data_version(db: AsyncSession, user_id: int) -> int:
+    """
+    Increment the user's data version and return the new value.
+
+    Call in the same DB transaction as the write, just before commit. The
+    user row stays locked until then, so concurrent writes by one user get
+    distinct, ordered versions.
+
+    Also drops all of the user's cached responses, not just those of the
+    rows written: cache keys carry the data version, which is one per user,
+    so the new version makes every one of them unreachable anyway. Dropping
+    them here only frees the memory sooner.
+    """
+    await invalidate_user(user_id)
+    result = await db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(data_version=User.data_version + 1)
+        .returning(User.data_version)
+        .execution_options(synchronize_session=False)
+    )
+    return result.scalar_one()
+
+
+async def get_data_version(db: AsyncSession, user_id: int) -> int:
+    result = await db.execute(select(User.data_version).where(User.id == user_id))
+    return result.scalar_one_or_none() or 0
+
+
+def make_etag(version: int) -> str:
+    return f'W/"v{version}"'
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+async def conditional_get(
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+) -> str:
+    """
+    Route dependency that tags the response with the user's data version.
+
+    Every write bumps the version, so a matching If-None-Match means the
+    client's copy is current: answer 304 without running the endpoint.
+    The version is read before the endpoint's queries, so a concurrent
+    write can only make the ETag older than the body, never newer.
+
+    With the response cache enabled, a cached body for this version is
+    returned instead of running the endpoint.
+    """
+    version = await get_data_version(db, current_user.id)
+    etag = make_etag(version)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if response_cache is not None:
+        key = response_cache_key(current_user.id, version, request)
+        body = await response_cache.get(key)
+        if body is not None:
+            raise ResponseCacheHit(body, headers)
+        request.state.response_cache_entry = (user_namespace(current_user.id), key)
+
+    response.headers.update(headers)
+    return etag
@@ -0,0 +1,303 @@
+"""
+Throughput and p50/p95/p99 latency of the API endpoints against a seeded dataset.
+
+Runs the app in-process over httpx's ASGI transport as the first seeded
+user, so the numbers cover routing, auth, validation, SQL and
+serialization but no network. Auth is stubbed at the key set: requests
+carry a token signed by a local key (see bench_auth) and the principal
+cache resolves the user, as in production. Overriding get_current_user
+instead would make FastAPI re-analyse every dependency on each request.
+Each endpoint gets a warmup, then --requests requests from --concurrency
+concurrent clients. The write endpoints create, update and then delete
+the same transactions, leaving the dataset as it was.
+
+Results can be saved as a JSON baseline and later runs compared against
+it; a comparison exits 1 when an endpoint's p95 or throughput is worse by
+more than --tolerance, or it runs more SQL statements than before.
+Needs a PostgreSQL at DATABASE_URL seeded with benchmarks.seed.
+
+    python -m benchmarks.seed --users 10 --transactions 1000000 --reset
+    python -m benchmarks.bench_api --save benchmarks/baselines/default.json
+    python -m benchmarks.bench_api --compare benchmarks/baselines/default.json
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import platform
+import sys
+import time
+from datetime import UTC, datetime
+
+import httpx
+from jose import jwt
+from sqlalchemy import func, select
+
+from app.database import AsyncSessionLocal, engine
+from app.main import app
+from app.metrics import metrics
+from app.middleware import auth
+from app.middleware.jwks import JWKSCache
+from app.models import Account, Category, Transaction, User
+from benchmarks.bench_auth import ISSUER, KID, make_signing_key, make_stub_issuer
+
+
+def percentile(ordered: list[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    return ordered[max(math.ceil(q * len(ordered)) - 1, 0)]
+
+
+async def stub_auth(clerk_user_id: str) -> str:
+    """Trust a freshly generated signing key and return a token for the user"""
+    pem, public_jwk = make_signing_key()
+    auth.jwks_cache = JWKSCache(
+        f"{ISSUER}/v1/jwks", transport=make_stub_issuer(public_jwk, latency=0)
+    )
+    await auth.jwks_cache.refresh()
+    now = int(time.time())
+    return jwt.encode(
+        {"sub": clerk_user_id, "iat": now, "nbf": now, "exp": now + 24 * 3600},
+        pem,
+        algorithm="RS256",
+        headers={"kid": KID},
+    )
+
+
+def statements_run() -> int:
+    return sum(route.statements for route in metrics.routes.values())
+
+
+async def load_context(prefix: str) -> dict:
+    """Ids of the benchmark user's data to build request URLs from"""
+    async with AsyncSessionLocal() as db:
+        user = (await db.execute(
+            select(User).where(User.clerk_user_id == f"{prefix}_1")
+        )).scalar_one_or_none()
+        if user is None:
+            raise SystemExit(f"No user {prefix}_1; run python -m benchmarks.seed first")
+        account_id = (await db.execute(
+            select(Account.id).where(Account.user_id == user.id).order_by(Account.id).limit(1)
+        )).scalar_one()
+        category_id = (await db.execute(
+            select(Category.id).where(Category.user_id == user.id).order_by(Category.id).limit(1)
+        )).scalar_one()
+        transactions, latest = (await db.execute(
+            select(func.count(), func.max(Transaction.date)).where(Transaction.user_id == user.id)
+        )).one()
+        transaction_ids = (await db.execute(
+            select(Transaction.id).where(Transaction.user_id == user.id)
+            .order_by(Transaction.id).limit(1000)
+        )).scalars().all()
+    return {
+        "clerk_user_id": user.clerk_user_id,
+        "account_id": account_id,
+        "category_id": category_id,
+        "transaction_ids": transaction_ids,
+        "transactions": transactions,
+        "month": (latest or datetime.now(UTC)).strftime("%Y-%m"),
+        # Ids created by the POST scenario, then updated and deleted
+        "created": [],
+    }
+
+
+def scenarios(ctx: dict) -> list[tuple]:
+    """(name, method, url(i), json body(i) or None) for each endpoint"""
+    existing = ctx["transaction_ids"]
+    created = ctx["created"]
+
+    def new_transaction(i: int) -> dict:
+        return {
+            "account_id": ctx["account_id"],
+            "category_id": ctx["category_id"],
+            "date": f"{ctx['month']}-01",
+            "payee": f"Bench {i}",
+            "amount": "-12.34",
+        }
+
+    return [
+        ("GET /api/accounts/", "GET", lambda i: "/api/accounts/", None),
+        ("GET /api/accounts/{id}", "GET", lambda i: f"/api/accounts/{ctx['account_id']}", None),
+        ("GET /api/categories/tree", "GET", lambda i: "/api/categories/tree", None),
+        ("GET /api/categories/", "GET", lambda i: "/api/categories/", None),
+        (
+            "GET /api/budget/summary", "GET",
+            lambda i: f"/api/budget/summary?month={ctx['month']}", None
+        ),
+        ("GET /api/budget/", "GET", lambda i: f"/api/budget/?month={ctx['month']}", None),
+        ("GET /api/transactions/", "GET", lambda i: "/api/transactions/?limit=100", None),
+        (
+            "GET /api/transactions/?account_id", "GET",
+            lambda i: f"/api/transactions/?account_id={ctx['account_id']}&limit=100", None
+        ),
+        (
+            "GET /api/transactions/{id}", "GET",
+            lambda i: f"/api/transactions/{existing[i % len(existing)]}", None
+        ),
+        ("GET /api/sync", "GET", lambda i: "/api/sync?limit=500", None),
+        ("POST /api/transactions/", "POST", lambda i: "/api/transactions/", new_transaction),
+        (
+            "PUT /api/transactions/{id}", "PUT",
+            lambda i: f"/api/transactions/{created[i % len(created)]}",
+            lambda i: {"cleared": i % 2 == 0, "amount": "-23.45"}
+        ),
+        (
+            "DELETE /api/transactions/{id}", "DELETE",
+            lambda i: f"/api/transactions/{created.pop()}", None
+        ),
+    ]
+
+
+async def run_scenario(client, scenario, requests: int, concurrency: int, warmup: int,
+                       created: list) -> dict:
+    _, method, url, body = scenario
+    counter = itertools.count()
+    latencies: list[float] = []
+    errors = 0
+
+    async def call(i: int) -> httpx.Response:
+        response = await client.request(method, url(i), json=body(i) if body else None)
+        if method == "POST" and response.status_code == 201:
+            created.append(response.json()["id"])
+        return response
+
+    async def worker(total: int, record: bool) -> None:
+        nonlocal errors
+        while (i := next(counter)) < total:
+            start = time.perf_counter()
+            response = await call(i)
+            if record:
+                latencies.append(time.perf_counter() - start)
+                if response.status_code >= 400:
+                    errors += 1
+
+    # Deletes consume the created ids one by one, so they get no warmup
+    if method != "DELETE":
+        await asyncio.gather(*(worker(warmup, False) for _ in range(concurrency)))
+    counter = itertools.count()
+    statements = statements_run()
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(requests, True) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    statements = statements_run() - statements
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "statements_per_request": round(statements / len(latencies), 2),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Describe each endpoint's change against the baseline; return the regressions"""
+    regressions = []
+    for name, current in results["endpoints"].items():
+        base = baseline["endpoints"].get(name)
+        if base is None:
+            print(f"{name}: new endpoint, no baseline", file=sys.stderr)
+            continue
+        problems = []
+        if current["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            problems.append(f"p95 {base['p95_ms']} -> {current['p95_ms']} ms")
+        if current["requests_per_second"] < base["requests_per_second"] / (1 + tolerance):
+            problems.append(
+                f"throughput {base['requests_per_second']} -> {current['requests_per_second']} rps"
+            )
+        if current["statements_per_request"] > base["statements_per_request"]:
+            problems.append(
+                f"statements {base['statements_per_request']} -> "
+                f"{current['statements_per_request']} per request"
+            )
+        if problems:
+            regressions.append(f"{name}: " + "; ".join(problems))
+        print(
+            f"{name}: p95 {current['p95_ms']} ms (baseline {base['p95_ms']}), "
+            f"{current['requests_per_second']} rps (baseline {base['requests_per_second']})"
+            + (" REGRESSION" if problems else ""),
+            file=sys.stderr
+        )
+    return regressions
+
+
+def report(results: dict, args) -> int:
+    """Print the results, save or compare them with a baseline, and return the exit status"""
+    print(json.dumps(results, indent=2))
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+async def measure(args) -> dict:
+    ctx = await load_context(args.prefix)
+    token = await stub_auth(ctx["clerk_user_id"])
+    results = {
+        "dataset": {
+            "prefix": args.prefix,
+            "user_transactions": ctx["transactions"],
+            "month": ctx["month"],
+        },
+        "settings": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+        },
+        "endpoints": {},
+    }
+    try:
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://bench",
+            headers={"Authorization": f"Bearer {token}"},
+            timeout=None
+        ) as client:
+            for scenario in scenarios(ctx):
+                if args.only and args.only not in scenario[0]:
+                    continue
+                if scenario[1] in ("PUT", "DELETE") and not ctx["created"]:
+                    continue
+                # Deletes can only remove what the POST scenario created
+                requests = len(ctx["created"]) if scenario[1] == "DELETE" else args.requests
+                result = await run_scenario(
+                    client, scenario, requests, args.concurrency, args.warmup, ctx["created"]
+                )
+                results["endpoints"][scenario[0]] = result
+                print(f"{scenario[0]}: {json.dumps(result)}", file=sys.stderr)
+    finally:
+        await engine.dispose()
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--prefix", default="bench", help="Prefix given to benchmarks.seed")
+    parser.add_argument("--requests", type=int, default=300, help="Measured requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=20, help="Unmeasured requests per endpoint")
+    parser.add_argument("--only", help="Only endpoints whose name contains this text")
+    parser.add_argument("--save", help="Write the results to this baseline file")
+    parser.add_argument("--compare", help="Compare with this baseline file; exit 1 on regressions")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.25, help="Allowed slowdown before a regression"
+    )
+    args = parser.parse_args()
+    # File I/O stays out of the event loop: measure first, then report
+    sys.exit(report(asyncio.run(measure(args)), args))
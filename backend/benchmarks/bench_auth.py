@@ -0,0 +1,119 @@
+"""
+Per-request auth latency: remote Clerk verification vs local JWKS verification.
+
+Runs against a local stub issuer (httpx.MockTransport) that adds a fixed
+network latency to every call, so no Clerk account or network is needed.
+
+    python -m benchmarks.bench_auth --requests 500 --latency-ms 40
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+
+from app.middleware.jwks import JWKSCache
+
+ISSUER = "https://stub.clerk.local"
+KID = "stub-key-1"
+
+
+def make_signing_key() -> tuple[str, dict]:
+    """Generate an RSA key pair, returning the private PEM and public JWK"""
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+    public_jwk = jwk.construct(pem, algorithm="RS256").public_key().to_dict()
+    public_jwk.update({"kid": KID, "use": "sig", "alg": "RS256"})
+    return pem, public_jwk
+
+
+def make_stub_issuer(public_jwk: dict, latency: float) -> httpx.MockTransport:
+    """Stub of the Clerk endpoints the old and new auth paths call"""
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(latency)
+        if request.url.path == "/v1/jwks":
+            return httpx.Response(200, json={"keys": [public_jwk]})
+        if request.url.path == "/v1/verify":
+            token = json.loads(request.content)["token"]
+            return httpx.Response(200, json=jwt.get_unverified_claims(token))
+        if request.url.path.startswith("/v1/users/"):
+            user_id = request.url.path.rsplit("/", 1)[-1]
+            return httpx.Response(200, json={"id": user_id, "email_addresses": []})
+        return httpx.Response(404)
+
+    return httpx.MockTransport(handler)
+
+
+async def remote_auth(client: httpx.AsyncClient, token: str) -> str:
+    """Old path: verify the token remotely, then fetch the user"""
+    response = await client.post("/v1/verify", json={"token": token})
+    clerk_user_id = response.json()["sub"]
+    await client.get(f"/v1/users/{clerk_user_id}")
+    return clerk_user_id
+
+
+async def local_auth(cache: JWKSCache, token: str) -> str:
+    """New path: verify the signature against the cached key set"""
+    claims = await cache.verify(token, issuer=ISSUER)
+    return claims["sub"]
+
+
+async def measure(fn, requests: int) -> list[float]:
+    samples = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def summarize(name: str, samples: list[float]) -> dict:
+    ordered = sorted(samples)
+    return {
+        "path": name,
+        "requests": len(samples),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+        "p50_ms": round(ordered[len(ordered) // 2], 3),
+        "p99_ms": round(ordered[int(len(ordered) * 0.99) - 1], 3),
+    }
+
+
+async def main(requests: int, latency_ms: float) -> None:
+    pem, public_jwk = make_signing_key()
+    transport = make_stub_issuer(public_jwk, latency_ms / 1000)
+    now = int(time.time())
+    token = jwt.encode(
+        {"sub": "user_bench", "iss": ISSUER, "iat": now, "nbf": now, "exp": now + 3600},
+        pem,
+        algorithm="RS256",
+        headers={"kid": KID},
+    )
+
+    async with httpx.AsyncClient(base_url=ISSUER, transport=transport) as client:
+        before = await measure(lambda: remote_auth(client, token), requests)
+
+    cache = JWKSCache(f"{ISSUER}/v1/jwks", transport=transport)
+    await cache.refresh()
+    after = await measure(lambda: local_auth(cache, token), requests)
+
+    for result in (summarize("remote", before), summarize("local_jwks", after)):
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=40.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.latency_ms))
@@ -0,0 +1,105 @@
+"""
+Event loop throughput with blocking vs async database sessions.
+
+Simulates one worker serving concurrent requests where a fraction of them
+run a slow query (pg_sleep). With a blocking Session every slow query stalls
+the loop, so fast requests queue behind it; with AsyncSession they proceed.
+Needs a reachable PostgreSQL at DATABASE_URL.
+
+    python -m benchmarks.bench_db_concurrency --seconds 10 --concurrency 20
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import async_database_url
+
+FAST_QUERY = text("SELECT 1")
+SLOW_QUERY = text("SELECT pg_sleep(:seconds)")
+
+
+async def blocking_request(engine, slow: bool, slow_seconds: float) -> None:
+    """Old path: a sync Session called from an async handler"""
+    with Session(engine) as db:
+        if slow:
+            db.execute(SLOW_QUERY, {"seconds": slow_seconds})
+        else:
+            db.execute(FAST_QUERY)
+
+
+async def async_request(engine, slow: bool, slow_seconds: float) -> None:
+    """New path: an AsyncSession awaited from an async handler"""
+    async with engine.connect() as conn:
+        if slow:
+            await conn.execute(SLOW_QUERY, {"seconds": slow_seconds})
+        else:
+            await conn.execute(FAST_QUERY)
+
+
+async def run(request_fn, engine, args) -> dict:
+    deadline = time.perf_counter() + args.seconds
+    fast_latencies: list[float] = []
+    completed = {"fast": 0, "slow": 0}
+    rng = random.Random(42)
+
+    async def client() -> None:
+        while time.perf_counter() < deadline:
+            slow = rng.random() < args.slow_ratio
+            start = time.perf_counter()
+            await request_fn(engine, slow, args.slow_ms / 1000)
+            if slow:
+                completed["slow"] += 1
+            else:
+                completed["fast"] += 1
+                fast_latencies.append((time.perf_counter() - start) * 1000)
+            # Yield so blocking clients still interleave between requests
+            await asyncio.sleep(0)
+
+    await asyncio.gather(*(client() for _ in range(args.concurrency)))
+
+    fast_latencies.sort()
+    total = completed["fast"] + completed["slow"]
+    return {
+        "requests_per_second": round(total / args.seconds, 1),
+        "fast_requests": completed["fast"],
+        "slow_requests": completed["slow"],
+        "fast_p50_ms": (
+            round(fast_latencies[len(fast_latencies) // 2], 2) if fast_latencies else None
+        ),
+        "fast_p99_ms": (
+            round(fast_latencies[int(len(fast_latencies) * 0.99) - 1], 2)
+            if fast_latencies else None
+        ),
+    }
+
+
+async def main(args) -> None:
+    pool = {"pool_size": args.concurrency, "max_overflow": 0}
+
+    sync_engine = create_engine(settings.database_url, **pool)
+    result = await run(blocking_request, sync_engine, args)
+    sync_engine.dispose()
+    print(json.dumps({"session": "sync", **result}))
+
+    async_engine = create_async_engine(async_database_url(settings.database_url), **pool)
+    result = await run(async_request, async_engine, args)
+    await async_engine.dispose()
+    print(json.dumps({"session": "async", **result}))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--slow-ratio", type=float, default=0.1)
+    parser.add_argument("--slow-ms", type=float, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args))
@@ -0,0 +1,136 @@
+"""
+Peak RSS while streaming GET /api/transactions/export.
+
+Seeds a throwaway user with N transactions (server-side generate_series),
+then drives the ASGI app directly and discards the body as it streams, so
+only the server's memory is measured. Peak RSS after exporting N/10 rows
+and N rows should be about the same; tests/test_export_memory.py asserts
+it. Needs a migrated PostgreSQL at DATABASE_URL.
+
+    python -m benchmarks.bench_export --rows 1000000 --format ndjson
+"""
+
+import argparse
+import asyncio
+import json
+import resource
+import time
+
+from sqlalchemy import text
+
+from app.database import AsyncSessionLocal
+from app.main import app
+from app.middleware import get_current_user
+from app.models import User
+
+SEED_SQL = text("""
+    INSERT INTO transactions (user_id, account_id, category_id, date, payee, amount, memo, cleared)
+    SELECT :user_id, :account_id, NULL,
+           DATE '2000-01-01' + (n % 9000),
+           'Payee ' || (n % 500),
+           ((n % 20000) - 10000) / 100.0,
+           CASE WHEN n % 7 = 0 THEN 'memo ' || n END,
+           n % 3 = 0
+    FROM generate_series(1, :rows) AS n
+""")
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def seed(rows: int) -> tuple[int, int]:
+    async with AsyncSessionLocal() as db:
+        # Leftovers from an interrupted run
+        await db.execute(text("DELETE FROM users WHERE clerk_user_id = 'bench_export'"))
+        user_id = (await db.execute(text(
+            "INSERT INTO users (clerk_user_id, email, created_at) "
+            "VALUES ('bench_export', 'bench_export@example.com', now()) RETURNING id"
+        ))).scalar_one()
+        account_id = (await db.execute(text(
+            "INSERT INTO accounts (user_id, name, type, balance) "
+            "VALUES (:user_id, 'Bench', 'CHECKING', 0) RETURNING id"
+        ), {"user_id": user_id})).scalar_one()
+        await db.execute(SEED_SQL, {"user_id": user_id, "account_id": account_id, "rows": rows})
+        await db.commit()
+    return user_id, account_id
+
+
+async def cleanup(user_id: int) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(text("DELETE FROM users WHERE id = :id"), {"id": user_id})
+        await db.commit()
+
+
+async def export(fmt: str, end_date: str | None = None) -> dict:
+    """Run one export request through the ASGI app, counting bytes instead of keeping them"""
+    query = f"format={fmt}" + (f"&end_date={end_date}" if end_date else "")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/api/transactions/export",
+        "raw_path": b"/api/transactions/export",
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 0),
+        "server": ("bench", 80),
+    }
+    received = {"bytes": 0, "status": None}
+    request_sent = False
+    disconnected = asyncio.Event()
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # The client stays connected until the response is complete
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            received["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            received["bytes"] += len(message.get("body", b""))
+
+    start = time.perf_counter()
+    await app(scope, receive, send)
+    disconnected.set()
+    return {
+        "status": received["status"],
+        "megabytes": round(received["bytes"] / 2**20, 1),
+        "seconds": round(time.perf_counter() - start, 2),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+async def main(rows: int, fmt: str) -> None:
+    user_id, _ = await seed(rows)
+    app.dependency_overrides[get_current_user] = lambda: User(
+        id=user_id, clerk_user_id="bench_export", email="bench_export@example.com"
+    )
+    try:
+        baseline = peak_rss_mb()
+        # Dates cycle over 9000 days, so this bound selects roughly a tenth of the rows
+        small = await export(fmt, end_date="2002-06-19")
+        full = await export(fmt)
+        print(json.dumps({"rows": rows, "format": fmt, "baseline_rss_mb": round(baseline, 1)}))
+        print(json.dumps({"export": "tenth", **small}))
+        print(json.dumps({"export": "full", **full}))
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+        await cleanup(user_id)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.format))
@@ -0,0 +1,83 @@
+"""
+Wall time for POST /api/transactions/import of a generated CSV statement.
+
+Needs a migrated PostgreSQL at DATABASE_URL.
+
+    python -m benchmarks.bench_import --rows 100000
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import time
+
+import httpx
+from sqlalchemy import text
+
+from app.database import AsyncSessionLocal
+from app.main import app
+from app.middleware import get_current_user
+from app.models import User
+
+
+def make_csv(rows: int) -> bytes:
+    buffer = io.StringIO()
+    buffer.write("date,payee,amount,memo,cleared\n")
+    for n in range(rows):
+        buffer.write(
+            f"2024-{n % 12 + 1:02d}-{n % 28 + 1:02d},Payee {n % 300},"
+            f"{(n % 20000 - 10000) / 100:.2f},memo {n},{'yes' if n % 2 else ''}\n"
+        )
+    return buffer.getvalue().encode()
+
+
+async def main(rows: int) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(text("DELETE FROM users WHERE clerk_user_id = 'bench_import'"))
+        user_id = (await db.execute(text(
+            "INSERT INTO users (clerk_user_id, email, created_at) "
+            "VALUES ('bench_import', 'bench_import@example.com', now()) RETURNING id"
+        ))).scalar_one()
+        account_id = (await db.execute(text(
+            "INSERT INTO accounts (user_id, name, type, balance) "
+            "VALUES (:user_id, 'Bench', 'CHECKING', 0) RETURNING id"
+        ), {"user_id": user_id})).scalar_one()
+        await db.commit()
+
+    app.dependency_overrides[get_current_user] = lambda: User(
+        id=user_id, clerk_user_id="bench_import", email="bench_import@example.com"
+    )
+    body = make_csv(rows)
+    try:
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None
+        ) as client:
+            start = time.perf_counter()
+            response = await client.post(
+                "/api/transactions/import",
+                files={"file": ("statement.csv", body, "text/csv")},
+                data={"account_id": str(account_id)},
+            )
+            elapsed = time.perf_counter() - start
+        result = response.json()
+        print(json.dumps({
+            "rows": rows,
+            "status": response.status_code,
+            "imported": result.get("imported"),
+            "failed": result.get("failed"),
+            "seconds": round(elapsed, 2),
+            "rows_per_second": round(rows / elapsed),
+        }))
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+        async with AsyncSessionLocal() as db:
+            await db.execute(text("DELETE FROM users WHERE id = :id"), {"id": user_id})
+            await db.commit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows))
@@ -0,0 +1,94 @@
+"""
+Serialization cost of a 10k-row transaction list: ORM + Pydantic vs row tuples + orjson.
+
+No database needed. The old path builds ORM objects and validates them into
+TransactionPage with from_attributes, then encodes with the standard json
+encoder, as FastAPI does for a response_model. The new path turns the same
+values as result rows straight into bytes. Both paths start from the
+values the driver returns, so ORM hydration is counted and row fetching is
+not. Both outputs are checked to be byte-identical.
+
+    python -m benchmarks.bench_json --rows 10000
+"""
+
+import argparse
+import json
+import statistics
+import time
+from collections import namedtuple
+from datetime import date, timedelta
+from decimal import Decimal
+
+from fastapi.responses import JSONResponse
+
+from app.models import Transaction
+from app.responses import FastJSONResponse, row_dicts
+from app.routers.transactions import RESPONSE_COLUMNS
+from app.schemas import TransactionPage
+
+FIELDS = [column.key for column in RESPONSE_COLUMNS]
+# Stands in for sqlalchemy Row, which has the same _asdict()
+Row = namedtuple("Row", FIELDS)
+
+
+def make_values(rows: int) -> list[tuple]:
+    start = date(2024, 1, 1)
+    return [
+        (
+            n % 7 + 1,
+            n % 40 + 1 if n % 5 else None,
+            start + timedelta(days=n % 365),
+            f"Payee {n % 300}",
+            Decimal(n % 20000 - 10000) / 100,
+            f"memo {n}" if n % 3 == 0 else None,
+            n % 2 == 0,
+            n + 1,
+            1,
+        )
+        for n in range(rows)
+    ]
+
+
+def old_path(values: list[tuple]) -> bytes:
+    transactions = [Transaction(**dict(zip(FIELDS, v, strict=True))) for v in values]
+    page = TransactionPage.model_validate({"items": transactions, "next_cursor": None})
+    return JSONResponse(page.model_dump(mode="json")).body
+
+
+def new_path(rows: list[Row]) -> bytes:
+    return FastJSONResponse({"items": row_dicts(rows), "next_cursor": None}).body
+
+
+def timed(fn, arg, repeat: int) -> tuple[float, bytes]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = fn(arg)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), body
+
+
+def main(rows: int, repeat: int) -> None:
+    values = make_values(rows)
+    result_rows = [Row(*v) for v in values]
+
+    old_seconds, old_body = timed(old_path, values, repeat)
+    new_seconds, new_body = timed(new_path, result_rows, repeat)
+    assert json.loads(old_body) == json.loads(new_body), "fast path changed the output"
+    assert old_body == new_body, "fast path changed the encoding"
+
+    print(json.dumps({
+        "rows": rows,
+        "bytes": len(new_body),
+        "orm_pydantic_ms": round(old_seconds * 1000, 1),
+        "rows_orjson_ms": round(new_seconds * 1000, 1),
+        "speedup": round(old_seconds / new_seconds, 1),
+    }))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    main(args.rows, args.repeat)
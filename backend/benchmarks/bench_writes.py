@@ -0,0 +1,168 @@
+"""
+Statements and p50/p95/p99 latency per request of the API's write endpoints.
+
+Creates, updates and then deletes accounts, category groups, categories,
+budget allocations and transactions as the first seeded user, one
+endpoint at a time, so the cost of each write path can be compared before
+and after a change. Everything created is deleted again, leaving the
+dataset as it was. Runs in-process like bench_api and takes the same
+options; baselines are kept separately because the endpoint sets differ.
+Needs a PostgreSQL at DATABASE_URL seeded with benchmarks.seed.
+
+    python -m benchmarks.bench_writes --save benchmarks/baselines/writes.json
+    python -m benchmarks.bench_writes --compare benchmarks/baselines/writes.json
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import sys
+
+import httpx
+from sqlalchemy import select
+
+from app.database import AsyncSessionLocal, engine
+from app.main import app
+from app.models import CategoryGroup, User
+from benchmarks.bench_api import load_context, report, run_scenario, stub_auth
+
+
+async def load_group_id(clerk_user_id: str) -> int:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(CategoryGroup.id)
+            .join(User, User.id == CategoryGroup.user_id)
+            .where(User.clerk_user_id == clerk_user_id)
+            .order_by(CategoryGroup.id)
+            .limit(1)
+        )
+        return result.scalar_one()
+
+
+def resources(ctx: dict) -> list[tuple]:
+    """(collection path, create body(i), update body(i)) for each kind of row"""
+    # Allocations are unique per category and month, so every create,
+    # warmups included, budgets a month of its own far in the future
+    months = itertools.count()
+
+    def new_allocation(i: int) -> dict:
+        n = next(months)
+        return {
+            "category_id": ctx["category_id"],
+            "month": f"{2200 + n // 12}-{n % 12 + 1:02d}",
+            "amount": "100.00",
+        }
+
+    return [
+        (
+            "/api/accounts/",
+            lambda i: {"name": f"Bench {i}", "type": "checking"},
+            lambda i: {"name": f"Bench {i} renamed"},
+        ),
+        (
+            "/api/categories/groups",
+            lambda i: {"name": f"Bench {i}"},
+            lambda i: {"sort_order": i % 10},
+        ),
+        (
+            "/api/categories/",
+            lambda i: {"name": f"Bench {i}", "category_group_id": ctx["group_id"]},
+            lambda i: {"name": f"Bench {i} renamed"},
+        ),
+        ("/api/budget/", new_allocation, lambda i: {"amount": f"{i % 100}.00"}),
+        (
+            "/api/transactions/",
+            lambda i: {
+                "account_id": ctx["account_id"],
+                "category_id": ctx["category_id"],
+                "date": f"{ctx['month']}-01",
+                "payee": f"Bench {i}",
+                "amount": "-12.34",
+            },
+            lambda i: {"cleared": i % 2 == 0, "amount": "-23.45"},
+        ),
+    ]
+
+
+def scenarios(ctx: dict) -> list[tuple]:
+    """(name, method, url(i), json body(i) or None, ids created) for each endpoint"""
+    result = []
+    for path, create, change in resources(ctx):
+        # Each kind of row has its own ids, created by POST, then updated and deleted
+        created: list[int] = []
+        item = path.rstrip("/") + "/"
+        result += [
+            (f"POST {path}", "POST", lambda i, path=path: path, create, created),
+            (
+                f"PUT {item}{{id}}", "PUT",
+                lambda i, item=item, created=created: f"{item}{created[i % len(created)]}",
+                change, created
+            ),
+            (
+                f"DELETE {item}{{id}}", "DELETE",
+                lambda i, item=item, created=created: f"{item}{created.pop()}",
+                None, created
+            ),
+        ]
+    return result
+
+
+async def measure(args) -> dict:
+    ctx = await load_context(args.prefix)
+    ctx["group_id"] = await load_group_id(ctx["clerk_user_id"])
+    token = await stub_auth(ctx["clerk_user_id"])
+    results = {
+        "dataset": {"prefix": args.prefix, "user_transactions": ctx["transactions"]},
+        "settings": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+        },
+        "endpoints": {},
+    }
+    try:
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://bench",
+            headers={"Authorization": f"Bearer {token}"},
+            timeout=None
+        ) as client:
+            for name, method, url, body, created in scenarios(ctx):
+                if args.only and args.only not in name:
+                    continue
+                if method in ("PUT", "DELETE") and not created:
+                    continue
+                # Deletes can only remove what the POST scenario created
+                requests = len(created) if method == "DELETE" else args.requests
+                result = await run_scenario(
+                    client, (name, method, url, body), requests, args.concurrency, args.warmup,
+                    created
+                )
+                results["endpoints"][name] = result
+                print(f"{name}: {json.dumps(result)}", file=sys.stderr)
+    finally:
+        await engine.dispose()
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--prefix", default="bench", help="Prefix given to benchmarks.seed")
+    parser.add_argument("--requests", type=int, default=200, help="Measured requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=20, help="Unmeasured requests per endpoint")
+    parser.add_argument("--only", help="Only endpoints whose name contains this text")
+    parser.add_argument("--save", help="Write the results to this baseline file")
+    parser.add_argument("--compare", help="Compare with this baseline file; exit 1 on regressions")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.25, help="Allowed slowdown before a regression"
+    )
+    args = parser.parse_args()
+    # File I/O stays out of the event loop: measure first, then report
+    sys.exit(report(asyncio.run(measure(args)), args))
@@ -0,0 +1,249 @@
+"""
+Seed synthetic users with accounts, category trees, allocations and transactions.
+
+Rows are generated server-side with generate_series, so millions of
+transactions load in a few minutes without going through the API. The
+data is deterministic for a given set of arguments: transactions are
+spread evenly over users, their accounts and categories and --months months
+up to --end-date; about one in seven is uncategorized, one in fifteen is
+income and three in four are cleared.
+Account balances and the category activity rollup are rebuilt afterwards
+with the same code as `python -m app.cli rebuild-*`.
+
+Seeded users have clerk_user_id '<prefix>_<n>'; --reset deletes them first.
+Needs a migrated PostgreSQL at DATABASE_URL.
+
+    python -m benchmarks.seed --users 10 --transactions 1000000 --reset
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from datetime import date
+
+from sqlalchemy import text
+
+from app.database import AsyncSessionLocal, engine
+from app.services.ledger import rebuild_activity, rebuild_balances
+
+# Transactions per INSERT ... SELECT, so progress shows and no single
+# statement holds millions of rows of trigger transition tables
+CHUNK_SIZE = 250_000
+
+DEFAULT_END_DATE = date(2025, 12, 31)
+
+ACCOUNTS = [
+    ("Checking", "CHECKING"),
+    ("Savings", "SAVINGS"),
+    ("Credit Card", "CREDIT_CARD"),
+    ("Cash", "CASH"),
+    ("Brokerage", "INVESTMENT"),
+]
+
+CATEGORY_TREE = [
+    ("Bills", ["Rent", "Electric", "Water", "Internet", "Phone", "Insurance"]),
+    ("Everyday", ["Groceries", "Dining Out", "Fuel", "Household", "Personal Care", "Pets"]),
+    ("Goals", ["Vacation", "Emergency Fund", "New Car", "Gifts", "Education", "Home Repair"]),
+    ("Fun", ["Games", "Music", "Movies", "Hobbies", "Books", "Sports"]),
+    ("Health", ["Doctor", "Pharmacy", "Dentist", "Gym", "Therapy", "Glasses"]),
+    ("Income", ["Paycheck", "Interest", "Refunds", "Side Work", "Dividends", "Other"]),
+]
+
+PAYEES = [
+    "Whole Foods", "Trader Joe's", "Shell", "Chevron", "Amazon", "Target", "Costco",
+    "Netflix", "Spotify", "City Utilities", "Comcast", "Verizon", "Starbucks",
+    "Chipotle", "CVS Pharmacy", "Walgreens", "Home Depot", "Uber", "Lyft", "Delta",
+    "Landlord LLC", "State Farm", "Petco", "Planet Fitness", "Acme Corp Payroll",
+]
+
+INSERT_USERS = text("""
+    INSERT INTO users (clerk_user_id, email, created_at, data_version)
+    SELECT :prefix || '_' || n, :prefix || '_' || n || '@example.com', now(), 0
+    FROM generate_series(1, :users) AS n
+""")
+
+INSERT_ACCOUNTS = text("""
+    INSERT INTO accounts (user_id, name, type, balance, cleared_balance, uncleared_balance)
+    SELECT u.id, (CAST(:names AS text[]))[k],
+           CAST((CAST(:types AS text[]))[k] AS accounttype), 0, 0, 0
+    FROM users u CROSS JOIN generate_series(1, :accounts) AS k
+    WHERE u.clerk_user_id LIKE :pattern
+    ORDER BY u.id, k
+""")
+
+INSERT_GROUPS = text("""
+    INSERT INTO category_groups (user_id, name, sort_order)
+    SELECT u.id, (CAST(:names AS text[]))[g], g
+    FROM users u CROSS JOIN generate_series(1, :groups) AS g
+    WHERE u.clerk_user_id LIKE :pattern
+    ORDER BY u.id, g
+""")
+
+INSERT_CATEGORIES = text("""
+    INSERT INTO categories (user_id, category_group_id, name, sort_order)
+    SELECT g.user_id, g.id, (CAST(:names AS text[]))[g.sort_order][c], c
+    FROM category_groups g
+    JOIN users u ON u.id = g.user_id
+    CROSS JOIN generate_series(1, :categories) AS c
+    WHERE u.clerk_user_id LIKE :pattern
+    ORDER BY g.user_id, g.sort_order, c
+""")
+
+INSERT_ALLOCATIONS = text("""
+    INSERT INTO budget_allocations (user_id, category_id, month, amount)
+    SELECT c.user_id, c.id,
+           to_char(CAST(:end_date AS date) - make_interval(months => m), 'YYYY-MM'),
+           (50 + (c.id * 37 + m * 11) % 20 * 25)::numeric(15, 2)
+    FROM categories c
+    JOIN users u ON u.id = c.user_id
+    CROSS JOIN generate_series(0, :months - 1) AS m
+    WHERE u.clerk_user_id LIKE :pattern
+""")
+
+# Transaction n belongs to user n % users; everything else is taken from
+# slices of a multiplicative hash of n, so the attributes are spread
+# independently of each other and of the user, and are reproducible
+INSERT_TRANSACTIONS = text("""
+    WITH u AS (
+        SELECT id, row_number() OVER (ORDER BY id) - 1 AS idx
+        FROM users WHERE clerk_user_id LIKE :pattern
+    ),
+    a AS (
+        SELECT id, user_id, row_number() OVER (PARTITION BY user_id ORDER BY id) - 1 AS idx
+        FROM accounts WHERE user_id IN (SELECT id FROM u)
+    ),
+    c AS (
+        SELECT id, user_id, row_number() OVER (PARTITION BY user_id ORDER BY id) - 1 AS idx
+        FROM categories WHERE user_id IN (SELECT id FROM u)
+    ),
+    s AS (
+        SELECT n, n * 2654435761 % 4294967296 AS h
+        FROM generate_series(CAST(:first AS bigint), CAST(:last AS bigint)) AS n
+    )
+    INSERT INTO transactions (user_id, account_id, category_id, date, payee, amount, memo, cleared)
+    SELECT u.id, a.id, c.id,
+           CAST(:end_date AS date) - CAST(h / 3 % :days AS integer),
+           (CAST(:payees AS text[]))[h / 13 % :payee_count + 1],
+           CASE WHEN h / 1000 % 15 = 0 THEN (1500 + h / 15000 % 2000)::numeric(15, 2)
+                ELSE -(h / 7 % 30000 / 100.0 + 0.01)::numeric(15, 2) END,
+           CASE WHEN h / 11 % 9 = 0 THEN 'memo ' || n END,
+           h / 100000 % 4 <> 0
+    FROM s
+    JOIN u ON u.idx = n % :users
+    JOIN a ON a.user_id = u.id AND a.idx = h % :accounts
+    LEFT JOIN c ON c.user_id = u.id AND c.idx = h / 49 % :categories AND h / 7 % 7 <> 0
+""")
+
+
+def log(message: str) -> None:
+    print(message, file=sys.stderr, flush=True)
+
+
+async def reset(prefix: str) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(text("SET LOCAL statement_timeout = 0"))
+        result = await db.execute(
+            text("DELETE FROM users WHERE clerk_user_id LIKE :pattern"),
+            {"pattern": f"{prefix}\\_%"}
+        )
+        await db.commit()
+    log(f"deleted {result.rowcount} user(s) with prefix {prefix!r}")
+
+
+async def seed(args) -> dict:
+    pattern = f"{args.prefix}\\_%"
+    groups = CATEGORY_TREE[:args.groups]
+    params = {"pattern": pattern, "end_date": args.end_date}
+    started = time.perf_counter()
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(text("SET LOCAL statement_timeout = 0"))
+        existing = (await db.execute(
+            text("SELECT count(*) FROM users WHERE clerk_user_id LIKE :pattern"), params
+        )).scalar_one()
+        if existing:
+            raise SystemExit(f"{existing} user(s) with prefix {args.prefix!r} exist; use --reset")
+
+        await db.execute(INSERT_USERS, {"prefix": args.prefix, "users": args.users})
+        await db.execute(INSERT_ACCOUNTS, {
+            **params,
+            "accounts": args.accounts,
+            "names": [name for name, _ in ACCOUNTS],
+            "types": [kind for _, kind in ACCOUNTS],
+        })
+        await db.execute(INSERT_GROUPS, {
+            **params, "groups": len(groups), "names": [name for name, _ in groups]
+        })
+        await db.execute(INSERT_CATEGORIES, {
+            **params,
+            "categories": args.categories,
+            "names": [names[:args.categories] for _, names in groups],
+        })
+        await db.execute(INSERT_ALLOCATIONS, {**params, "months": args.months})
+        await db.commit()
+        log(f"created {args.users} user(s) with accounts, categories and allocations")
+
+        for first in range(1, args.transactions + 1, CHUNK_SIZE):
+            last = min(first + CHUNK_SIZE - 1, args.transactions)
+            await db.execute(text("SET LOCAL statement_timeout = 0"))
+            await db.execute(INSERT_TRANSACTIONS, {
+                **params,
+                "first": first,
+                "last": last,
+                "users": args.users,
+                "accounts": args.accounts,
+                "categories": len(groups) * args.categories,
+                "days": args.months * 30,
+                "payees": PAYEES,
+                "payee_count": len(PAYEES),
+            })
+            await db.commit()
+            log(f"inserted transactions {first}-{last}")
+
+        await db.execute(text("SET LOCAL statement_timeout = 0"))
+        user_ids = (await db.execute(
+            text("SELECT id FROM users WHERE clerk_user_id LIKE :pattern ORDER BY id"), params
+        )).scalars().all()
+        for user_id in user_ids:
+            await rebuild_balances(db, user_id)
+            await rebuild_activity(db, user_id)
+        await db.execute(text("ANALYZE"))
+        await db.commit()
+        log("rebuilt balances and category activity")
+
+    return {
+        "prefix": args.prefix,
+        "users": args.users,
+        "accounts": args.users * args.accounts,
+        "categories": args.users * len(groups) * args.categories,
+        "allocations": args.users * len(groups) * args.categories * args.months,
+        "transactions": args.transactions,
+        "seconds": round(time.perf_counter() - started, 1),
+    }
+
+
+async def main(args) -> None:
+    try:
+        if args.reset:
+            await reset(args.prefix)
+        print(json.dumps(await seed(args)))
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--prefix", default="bench", help="clerk_user_id prefix of seeded users")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--accounts", type=int, default=4, choices=range(1, len(ACCOUNTS) + 1))
+    parser.add_argument("--groups", type=int, default=5, choices=range(1, len(CATEGORY_TREE) + 1))
+    parser.add_argument(
+        "--categories", type=int, default=6, choices=range(1, 7), help="Categories per group"
+    )
+    parser.add_argument("--months", type=int, default=24, help="Months of history")
+    parser.add_argument("--end-date", type=date.fromisoformat, default=DEFAULT_END_DATE)
+    parser.add_argument("--transactions", type=int, default=100_000, help="Across all users")
+    parser.add_argument("--reset", action="store_true", help="Delete previously seeded users first")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,90 @@
+"""
+Shared fixtures.
+
+Unit tests need nothing but the app's code. Tests that use the `db`,
+`user` or `client` fixtures need a throwaway PostgreSQL database at
+TEST_DATABASE_URL, which is wiped and migrated to head once per run;
+they are skipped when it is not set or not reachable.
+"""
+
+import os
+import uuid
+from pathlib import Path
+
+# Settings are read when app.config is first imported
+os.environ["DATABASE_URL"] = os.environ.get(
+    "TEST_DATABASE_URL", "postgresql://postgres@localhost/minty_test"
+)
+os.environ.setdefault("CLERK_SECRET_KEY", "sk_test")
+os.environ.setdefault("CLERK_PUBLISHABLE_KEY", "pk_test")
+os.environ.setdefault("DEBUG", "false")
+
+import asyncpg
+import httpx
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.config import settings
+from app.database import AsyncSessionLocal, engine
+from app.main import app
+from app.middleware.auth import get_current_user, principal_cache
+from app.models import User
+
+BACKEND = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture(scope="session")
+async def database():
+    """Wipe the test database and migrate it to head"""
+    if "TEST_DATABASE_URL" not in os.environ:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(text("DROP SCHEMA public CASCADE"))
+            await conn.execute(text("CREATE SCHEMA public"))
+    except (OSError, asyncpg.PostgresError, SQLAlchemyError) as e:
+        pytest.skip(f"Test database is not reachable: {e}")
+    # Migrations rather than create_all, so triggers and indexes match production
+    command.upgrade(Config(str(BACKEND / "alembic.ini")), "head")
+    yield
+    await engine.dispose()
+
+
+@pytest.fixture
+async def db(database):
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+async def user(db) -> User:
+    """A user of their own for each test"""
+    key = uuid.uuid4().hex
+    user = User(clerk_user_id=f"user_test_{key}", email=f"{key}@example.com")
+    db.add(user)
+    await db.commit()
+    return user
+
+
+@pytest.fixture
+async def client(user, monkeypatch):
+    """
+    An API client signed in as `user`.
+
+    Query budgets are enforced, so a request that runs more statements
+    than its route allows fails the test.
+    """
+    monkeypatch.setattr(settings, "query_debug", True)
+    monkeypatch.setattr(settings, "query_budget_strict", True)
+    app.dependency_overrides[get_current_user] = lambda: user
+    try:
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            yield client
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+        principal_cache.clear()
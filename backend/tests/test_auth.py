@@ -0,0 +1,61 @@
+"""First login through get_current_user, with Clerk stubbed out"""
+
+import uuid
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from sqlalchemy import select
+
+from app.main import app
+from app.middleware import auth
+from app.models import User
+from benchmarks.bench_api import stub_auth
+
+
+@pytest.fixture
+def clerk_users(monkeypatch):
+    """clerk_user_id -> email the stubbed Clerk users API returns"""
+    users: dict[str, str] = {}
+
+    async def get_async(user_id: str):
+        return SimpleNamespace(
+            email_addresses=[SimpleNamespace(email_address=users[user_id])]
+        )
+
+    monkeypatch.setattr(auth.clerk, "users", SimpleNamespace(get_async=get_async))
+    # stub_auth swaps in a JWKS cache trusting its own key; put the real one back after
+    monkeypatch.setattr(auth, "jwks_cache", auth.jwks_cache)
+    yield users
+    auth.principal_cache.clear()
+
+
+async def sign_in(clerk_user_id: str) -> httpx.Response:
+    token = await stub_auth(clerk_user_id)
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        return await client.get(
+            "/api/accounts/", headers={"Authorization": f"Bearer {token}"}
+        )
+
+
+async def test_first_login_creates_user(database, db, clerk_users):
+    clerk_user_id = f"user_{uuid.uuid4().hex}"
+    clerk_users[clerk_user_id] = f"{clerk_user_id}@example.com"
+
+    assert (await sign_in(clerk_user_id)).status_code == 200
+    assert (await sign_in(clerk_user_id)).status_code == 200
+
+    emails = (await db.execute(
+        select(User.email).where(User.clerk_user_id == clerk_user_id)
+    )).scalars().all()
+    assert emails == [f"{clerk_user_id}@example.com"]
+
+
+async def test_email_of_another_user_is_a_conflict(database, user, clerk_users):
+    clerk_user_id = f"user_{uuid.uuid4().hex}"
+    clerk_users[clerk_user_id] = user.email
+
+    response = await sign_in(clerk_user_id)
+    assert response.status_code == 409
@@ -0,0 +1,30 @@
+"""ETags and If-None-Match on read endpoints"""
+
+from app.services.versioning import _etag_matches
+
+
+async def test_conditional_get(client):
+    first = await client.get("/api/accounts/")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert etag.startswith('W/"v')
+
+    unchanged = await client.get("/api/accounts/", headers={"If-None-Match": etag})
+    assert unchanged.status_code == 304
+    assert unchanged.content == b""
+    assert unchanged.headers["ETag"] == etag
+
+    await client.post("/api/accounts/", json={"name": "Checking", "type": "checking"})
+
+    changed = await client.get("/api/accounts/", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert [account["name"] for account in changed.json()] == ["Checking"]
+
+
+def test_etag_matching_is_weak():
+    assert _etag_matches('"v3"', 'W/"v3"')
+    assert _etag_matches('W/"v1", W/"v3"', 'W/"v3"')
+    assert _etag_matches("*", 'W/"v3"')
+    assert not _etag_matches('W/"v2"', 'W/"v3"')
+    assert not _etag_matches(None, 'W/"v3"')
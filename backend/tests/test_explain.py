@@ -0,0 +1,118 @@
+"""
+Every query the endpoints run is served by an index.
+
+Seeds a small dataset, replays one request per bench_api and bench_writes
+scenario while recording the SQL sent, then EXPLAINs each statement with
+sequential scans disabled. The planner then avoids them wherever an index
+can serve the query, so a Seq Scan that remains on one of the large tables
+is a missing index, as it would show on a production-sized dataset.
+Queries run inside database triggers are not visible here.
+"""
+
+import argparse
+import json
+
+import httpx
+import pytest
+from sqlalchemy import event, text
+
+from app.database import engine
+from app.main import app
+from app.middleware import auth
+from benchmarks import bench_api, bench_writes
+from benchmarks.seed import DEFAULT_END_DATE, seed
+
+PREFIX = "explain"
+# Tables that grow with each user's history
+LARGE_TABLES = {"transactions", "budget_allocations", "category_month_activity"}
+
+
+def plan_nodes(node: dict):
+    yield node
+    for child in node.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+@pytest.fixture
+async def seeded(database):
+    await seed(argparse.Namespace(
+        prefix=PREFIX,
+        users=2,
+        accounts=3,
+        groups=4,
+        categories=5,
+        months=12,
+        end_date=DEFAULT_END_DATE,
+        transactions=20_000,
+    ))
+    yield
+    async with engine.begin() as conn:
+        await conn.execute(
+            text("DELETE FROM users WHERE clerk_user_id LIKE :pattern"),
+            {"pattern": f"{PREFIX}\\_%"}
+        )
+
+
+async def capture_statements(monkeypatch) -> list[tuple[str, str, tuple]]:
+    """(scenario, statement, parameters) for each statement the scenarios run"""
+    ctx = await bench_api.load_context(PREFIX)
+    ctx["group_id"] = await bench_writes.load_group_id(ctx["clerk_user_id"])
+    # stub_auth swaps in a JWKS cache trusting its own key; put the real one back after
+    monkeypatch.setattr(auth, "jwks_cache", auth.jwks_cache)
+    token = await bench_api.stub_auth(ctx["clerk_user_id"])
+    captured = []
+    current = None
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if current is not None and not executemany:
+            captured.append((current, statement, tuple(parameters or ())))
+
+    reads = [(*scenario, ctx["created"]) for scenario in bench_api.scenarios(ctx)]
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://test",
+            headers={"Authorization": f"Bearer {token}"},
+        ) as client:
+            for name, method, url, body, created in reads + bench_writes.scenarios(ctx):
+                current = name
+                response = await client.request(method, url(0), json=body(0) if body else None)
+                assert response.status_code < 300, (name, response.text)
+                if method == "POST":
+                    created.append(response.json()["id"])
+                current = None
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+    return captured
+
+
+async def test_no_sequential_scans_of_large_tables(seeded, monkeypatch):
+    captured = await capture_statements(monkeypatch)
+    failures = []
+    seen = set()
+    async with engine.connect() as conn:
+        await conn.execute(text("SET LOCAL enable_seqscan = off"))
+        raw = (await conn.get_raw_connection()).driver_connection
+        for scenario, statement, parameters in captured:
+            if statement in seen:
+                continue
+            seen.add(statement)
+            plan = await raw.fetchval(f"EXPLAIN (FORMAT JSON) {statement}", *parameters)
+            # The engine registers a json codec on its connections; plain
+            # asyncpg returns text
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            scanned = {
+                node["Relation Name"] for node in plan_nodes(plan[0]["Plan"])
+                if node["Node Type"] == "Seq Scan"
+            } & LARGE_TABLES
+            if scanned:
+                failures.append(
+                    f"{scenario}: Seq Scan on {', '.join(sorted(scanned))}: "
+                    + " ".join(statement.split())
+                )
+        await conn.rollback()
+
+    assert len(seen) > 20
+    assert not failures, "\n".join(failures)
@@ -0,0 +1,35 @@
+"""Streaming the export keeps memory flat however many rows it returns"""
+
+from app.main import app
+from app.middleware import get_current_user
+from app.models import Account
+from app.models.account import AccountType
+from benchmarks.bench_export import SEED_SQL, export, peak_rss_mb
+
+ROWS = 200_000
+# Holding the full export in memory would take more than this at ROWS:
+# the rows alone are over 100 MB as Python objects, the ndjson body ~28 MB
+MAX_GROWTH_MB = 20
+
+
+async def test_export_peak_rss_does_not_grow_with_rows(db, user):
+    account = Account(user_id=user.id, name="Export", type=AccountType.CHECKING)
+    db.add(account)
+    await db.flush()
+    await db.execute(SEED_SQL, {"user_id": user.id, "account_id": account.id, "rows": ROWS})
+    await db.commit()
+
+    app.dependency_overrides[get_current_user] = lambda: user
+    try:
+        for fmt in ("ndjson", "csv"):
+            # Dates cycle over 9000 days, so this bound selects roughly a tenth of the rows
+            tenth = await export(fmt, end_date="2002-06-19")
+            after_tenth = peak_rss_mb()
+            full = await export(fmt)
+            growth = peak_rss_mb() - after_tenth
+
+            assert tenth["status"] == full["status"] == 200
+            assert full["megabytes"] > 5 * tenth["megabytes"]
+            assert growth < MAX_GROWTH_MB, (fmt, tenth, full)
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
@@ -0,0 +1,110 @@
+"""POST /api/transactions/import"""
+
+from decimal import Decimal
+
+import httpx
+
+from app.config import settings
+from app.services.ledger import check_activity, check_balances
+
+
+async def create_account(client) -> int:
+    response = await client.post("/api/accounts/", json={"name": "Checking", "type": "checking"})
+    return response.json()["id"]
+
+
+async def test_import_csv(client, db, user):
+    account_id = await create_account(client)
+    statement = (
+        "date,payee,amount,cleared\n"
+        "2024-03-05,Grocer,-12.34,yes\n"
+        "2024-03-06,Employer,\"1,000.00\",\n"
+        "2024-03-07,Too much,1e30,\n"
+        "2024-03-08,Bad,abc,\n"
+    )
+    response = await client.post(
+        "/api/transactions/import",
+        files={"file": ("statement.csv", statement, "text/csv")},
+        data={"account_id": str(account_id)},
+    )
+
+    assert response.status_code == 200
+    result = response.json()
+    assert (result["imported"], result["failed"]) == (2, 2)
+    errors = {error["row"]: error["error"] for error in result["errors"]}
+    assert errors.keys() == {4, 5}
+    assert errors[4].startswith("amount:")
+    assert errors[5] == "Invalid amount: 'abc'"
+
+    account = (await client.get(f"/api/accounts/{account_id}")).json()
+    assert Decimal(account["balance"]) == Decimal("987.66")
+    assert await check_balances(db, user.id) == []
+    assert await check_activity(db, user.id) == []
+
+
+async def test_import_ofx_decodes_entities(client):
+    account_id = await create_account(client)
+    statement = (
+        "<OFX><STMTTRN><DTPOSTED>20240305<TRNAMT>-5.00<NAME>A &amp; B</STMTTRN></OFX>\n"
+    ).replace("<TRNAMT>", "\n<TRNAMT>").replace("<NAME>", "\n<NAME>")
+    response = await client.post(
+        "/api/transactions/import",
+        files={"file": ("statement.ofx", statement)},
+        data={"account_id": str(account_id)},
+    )
+    assert response.json()["imported"] == 1
+
+    [transaction] = (await client.get("/api/transactions/")).json()["items"]
+    assert transaction["payee"] == "A & B"
+
+
+async def test_import_rejects_large_uploads(client, monkeypatch):
+    monkeypatch.setattr(settings, "import_max_bytes", 100)
+    response = await client.post(
+        "/api/transactions/import",
+        files={"file": ("statement.csv", "date,payee,amount\n" + "2024-03-05,x,1\n" * 20)},
+    )
+    assert response.status_code == 413
+
+
+async def test_import_refuses_oversized_body_before_reading_it(client, monkeypatch):
+    monkeypatch.setattr(settings, "import_max_bytes", 100)
+    statement = "date,payee,amount\n" + "2024-03-05,x,1\n" * 10_000
+    files = {"file": ("statement.csv", statement)}
+
+    # Refused on its Content-Length
+    response = await client.post("/api/transactions/import", files=files)
+    assert response.status_code == 413
+    assert response.json()["detail"].startswith("Request body is larger than")
+
+    # Chunked, with no Content-Length: cut off once the limit is passed
+    body = httpx.Request("POST", "http://test", files=files)
+    content = body.read()
+
+    async def chunks():
+        for start in range(0, len(content), 4096):
+            yield content[start:start + 4096]
+
+    response = await client.post(
+        "/api/transactions/import",
+        content=chunks(),
+        headers={"Content-Type": body.headers["Content-Type"]},
+    )
+    assert response.status_code == 413
+    assert response.json()["detail"].startswith("Request body is larger than")
+
+
+async def test_amount_out_of_range_is_rejected(client):
+    account_id = await create_account(client)
+    response = await client.post("/api/transactions/", json={
+        "account_id": account_id,
+        "date": "2024-03-05",
+        "payee": "Too much",
+        "amount": "1e30",
+    })
+    assert response.status_code == 422
+
+    response = await client.post(
+        "/api/accounts/", json={"name": "Too much", "type": "checking", "balance": "1e30"}
+    )
+    assert response.status_code == 422
@@ -0,0 +1,232 @@
+import io
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app.importers import (
+    ParsedRow,
+    detect_format,
+    parse_amount,
+    parse_csv,
+    parse_date,
+    parse_ofx,
+    parse_qif,
+)
+
+
+@pytest.mark.parametrize("filename, expected", [
+    ("statement.csv", "csv"),
+    ("STATEMENT.OFX", "ofx"),
+    ("bank.qfx", "ofx"),
+    ("export.qif", "qif"),
+    ("notes.txt", None),
+    ("noextension", None),
+    (None, None),
+])
+def test_detect_format(filename, expected):
+    assert detect_format(filename) == expected
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("12.34", Decimal("12.34")),
+    ("-1,234.56", Decimal("-1234.56")),
+    ("$12.00", Decimal("12.00")),
+    ("(12.00)", Decimal("-12.00")),
+    (" 7 ", Decimal(7)),
+])
+def test_parse_amount(value, expected):
+    assert parse_amount(value) == expected
+
+
+def test_parse_amount_rejects_text():
+    with pytest.raises(ValueError, match="Invalid amount"):
+        parse_amount("twelve")
+
+
+@pytest.mark.parametrize("value", ["2024-03-05", "03/05/2024", "03/05/24", "05.03.2024"])
+def test_parse_date_formats(value):
+    assert parse_date(value) == date(2024, 3, 5)
+
+
+def test_parse_date_rejects_unknown_format():
+    with pytest.raises(ValueError, match="Invalid date"):
+        parse_date("March 5th")
+
+
+def test_parse_csv():
+    stream = io.StringIO(
+        "Date,Payee,Amount,Memo,Cleared,Category_ID\n"
+        "2024-03-05,Grocer,-12.34,weekly,yes,7\n"
+        "03/06/2024,Employer,\"1,000.00\",,,\n"
+    )
+    assert list(parse_csv(stream)) == [
+        ParsedRow(2, data={
+            "date": date(2024, 3, 5),
+            "payee": "Grocer",
+            "amount": Decimal("-12.34"),
+            "memo": "weekly",
+            "cleared": True,
+            "category_id": 7,
+            "account_id": None,
+        }),
+        ParsedRow(3, data={
+            "date": date(2024, 3, 6),
+            "payee": "Employer",
+            "amount": Decimal("1000.00"),
+            "memo": None,
+            "cleared": False,
+            "category_id": None,
+            "account_id": None,
+        }),
+    ]
+
+
+def test_parse_csv_reports_bad_rows_by_line():
+    stream = io.StringIO(
+        "date,payee,amount\n"
+        "2024-03-05,Grocer,abc\n"
+        "yesterday,Grocer,1.00\n"
+        "2024-03-05,Grocer,1.00\n"
+    )
+    rows = list(parse_csv(stream))
+    assert [(row.row, row.error) for row in rows] == [
+        (2, "Invalid amount: 'abc'"),
+        (3, "Invalid date: 'yesterday'"),
+        (4, None),
+    ]
+
+
+def test_parse_csv_missing_columns():
+    rows = list(parse_csv(io.StringIO("date,description\n2024-03-05,Grocer\n")))
+    assert rows == [ParsedRow(1, error="Missing columns: amount, payee")]
+
+
+def test_parse_csv_empty():
+    assert list(parse_csv(io.StringIO(""))) == []
+
+
+OFX_SGML = """OFXHEADER:100
+DATA:OFXSGML
+<OFX>
+<BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN>
+<TRNTYPE>DEBIT
+<DTPOSTED>20240305120000[-5:EST]
+<TRNAMT>-12.34
+<NAME>Grocer
+<MEMO>Weekly shop
+</STMTTRN>
+<STMTTRN>
+<TRNTYPE>CREDIT
+<DTPOSTED>20240306
+<TRNAMT>1000.00
+<NAME>Employer
+<MEMO>Employer
+</STMTTRN>
+<STMTTRN>
+<DTPOSTED>2024
+<TRNAMT>1.00
+<NAME>Broken
+</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1>
+</OFX>
+"""
+
+
+def test_parse_ofx_sgml():
+    rows = list(parse_ofx(io.StringIO(OFX_SGML)))
+    assert rows[:2] == [
+        ParsedRow(1, data={
+            "date": date(2024, 3, 5),
+            "payee": "Grocer",
+            "amount": Decimal("-12.34"),
+            "memo": "Weekly shop",
+            "cleared": True,
+            "category_id": None,
+            "account_id": None,
+        }),
+        ParsedRow(2, data={
+            "date": date(2024, 3, 6),
+            "payee": "Employer",
+            "amount": Decimal("1000.00"),
+            "memo": None,
+            "cleared": True,
+            "category_id": None,
+            "account_id": None,
+        }),
+    ]
+    assert rows[2] == ParsedRow(3, error="Invalid date: '2024'")
+
+
+def test_parse_ofx_decodes_character_references():
+    stream = io.StringIO(
+        "<STMTTRN>\n<DTPOSTED>20240305\n<TRNAMT>-5.00\n<NAME>A &amp; B&#39;s\n"
+        "<MEMO>&lt;online&gt;\n</STMTTRN>\n"
+    )
+    [row] = parse_ofx(stream)
+    assert row.data["payee"] == "A & B's"
+    assert row.data["memo"] == "<online>"
+
+
+def test_parse_ofx_xml():
+    stream = io.StringIO(
+        '<?xml version="1.0"?><OFX><STMTTRN><DTPOSTED>20240305</DTPOSTED>'
+        "<TRNAMT>-5.00</TRNAMT><PAYEE>Cafe</PAYEE></STMTTRN></OFX>"
+    )
+    [row] = parse_ofx(stream)
+    assert row.data["payee"] == "Cafe"
+    assert row.data["amount"] == Decimal("-5.00")
+
+
+QIF = """!Type:Bank
+D3/5'24
+T-12.34
+PGrocer
+MWeekly shop
+C*
+LGroceries
+^
+D03/06/2024
+U1,000.00
+PEmployer
+^
+D13/45/24
+T1.00
+^
+"""
+
+
+def test_parse_qif():
+    rows = list(parse_qif(io.StringIO(QIF)))
+    assert rows[:2] == [
+        ParsedRow(8, data={
+            "date": date(2024, 3, 5),
+            "payee": "Grocer",
+            "amount": Decimal("-12.34"),
+            "memo": "Weekly shop",
+            "cleared": True,
+            "category_id": None,
+            "account_id": None,
+        }),
+        ParsedRow(12, data={
+            "date": date(2024, 3, 6),
+            "payee": "Employer",
+            "amount": Decimal("1000.00"),
+            "memo": None,
+            "cleared": False,
+            "category_id": None,
+            "account_id": None,
+        }),
+    ]
+    assert rows[2] == ParsedRow(15, error="Invalid date: '13/45/24'")
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("1/31'99", date(1999, 1, 31)),
+    ("1-31-24", date(2024, 1, 31)),
+    ("1/31/2024", date(2024, 1, 31)),
+])
+def test_parse_qif_two_digit_years(value, expected):
+    [row] = parse_qif(io.StringIO(f"D{value}\nT1\nPx\n^\n"))
+    assert row.data["date"] == expected
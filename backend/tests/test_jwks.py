@@ -0,0 +1,99 @@
+"""JWKSCache key rotation and issuer outages, against a stub JWKS endpoint"""
+
+import time
+
+import httpx
+import pytest
+from jose import jwt
+
+from app.middleware.jwks import JWKSCache
+from benchmarks.bench_auth import ISSUER, make_signing_key
+
+
+class StubIssuer:
+    """Serves `keys` from /v1/jwks, or a 503 while `down`"""
+
+    def __init__(self, *public_jwks: dict):
+        self.keys = list(public_jwks)
+        self.down = False
+        self.fetches = 0
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.fetches += 1
+        if self.down:
+            return httpx.Response(503)
+        return httpx.Response(200, json={"keys": self.keys})
+
+    def cache(self, **kwargs) -> JWKSCache:
+        return JWKSCache(
+            f"{ISSUER}/v1/jwks", transport=httpx.MockTransport(self.handler), **kwargs
+        )
+
+
+def signing_key(kid: str) -> tuple[str, dict]:
+    pem, public_jwk = make_signing_key()
+    public_jwk["kid"] = kid
+    return pem, public_jwk
+
+
+def sign(pem: str, kid: str) -> str:
+    now = int(time.time())
+    claims = {"sub": "user_jwks", "iss": ISSUER, "iat": now, "exp": now + 60}
+    return jwt.encode(claims, pem, algorithm="RS256", headers={"kid": kid})
+
+
+async def test_unknown_kid_refetches_rotated_keys():
+    old_pem, old_jwk = signing_key("old")
+    new_pem, new_jwk = signing_key("new")
+    issuer = StubIssuer(old_jwk)
+    cache = issuer.cache(min_refresh_interval=0)
+
+    assert (await cache.verify(sign(old_pem, "old"), issuer=ISSUER))["sub"] == "user_jwks"
+    assert issuer.fetches == 1
+
+    issuer.keys = [new_jwk]
+    await cache.verify(sign(new_pem, "new"), issuer=ISSUER)
+    assert issuer.fetches == 2
+
+
+async def test_unknown_kid_refetch_is_rate_limited():
+    _, public_jwk = signing_key("known")
+    issuer = StubIssuer(public_jwk)
+    cache = issuer.cache(min_refresh_interval=60)
+    await cache.refresh()
+
+    for _ in range(3):
+        with pytest.raises(ValueError, match="Unknown signing key"):
+            await cache.get_key("forged")
+    assert issuer.fetches == 1
+
+
+async def test_failed_refresh_serves_cached_keys():
+    pem, public_jwk = signing_key("known")
+    issuer = StubIssuer(public_jwk)
+    # Every lookup finds the keys expired
+    cache = issuer.cache(ttl_seconds=0, min_refresh_interval=60)
+    await cache.verify(sign(pem, "known"), issuer=ISSUER)
+    assert issuer.fetches == 1
+
+    issuer.down = True
+    cache._attempted_at = float("-inf")
+    for _ in range(3):
+        claims = await cache.verify(sign(pem, "known"), issuer=ISSUER)
+        assert claims["sub"] == "user_jwks"
+    # One failed attempt, then no retries until min_refresh_interval passes
+    assert issuer.fetches == 2
+
+
+async def test_failed_refresh_with_nothing_cached_raises():
+    _, public_jwk = signing_key("known")
+    issuer = StubIssuer(public_jwk)
+    issuer.down = True
+    cache = issuer.cache(min_refresh_interval=60)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await cache.get_key("known")
+    # Within the retry interval requests fail fast instead of waiting on the issuer
+    with pytest.raises(ValueError, match="Unknown signing key"):
+        await cache.get_key("known")
+    assert issuer.fetches == 1
@@ -0,0 +1,124 @@
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+
+from sqlalchemy import select
+
+from app.models import Account, Category, CategoryGroup, CategoryMonthActivity
+from app.models.account import AccountType
+from app.services.ledger import ZERO, LedgerDelta, month_of
+
+
+def transaction(**fields):
+    row = {
+        "user_id": 1,
+        "account_id": 10,
+        "category_id": 100,
+        "date": date(2024, 3, 5),
+        "amount": Decimal("-12.34"),
+        "cleared": False,
+    }
+    row.update(fields)
+    return SimpleNamespace(**row)
+
+
+def test_month_of():
+    assert month_of(date(2024, 3, 5)) == "2024-03"
+    assert month_of(date(2023, 12, 31)) == "2023-12"
+
+
+def test_add_splits_cleared_and_uncleared():
+    delta = LedgerDelta()
+    delta.add(transaction(amount=Decimal("-10.00"), cleared=True))
+    delta.add(transaction(amount=Decimal("-2.50")))
+    delta.add(transaction(account_id=11, amount=Decimal("100.00")))
+
+    assert delta.balances == {
+        10: [Decimal("-10.00"), Decimal("-2.50")],
+        11: [ZERO, Decimal("100.00")],
+    }
+
+
+def test_activity_is_per_user_category_and_month():
+    delta = LedgerDelta()
+    delta.add(transaction(amount=Decimal("-1.00")))
+    delta.add(transaction(amount=Decimal("-2.00"), date=date(2024, 3, 31)))
+    delta.add(transaction(amount=Decimal("-4.00"), date=date(2024, 4, 1)))
+    delta.add(transaction(amount=Decimal("-8.00"), category_id=101))
+
+    assert delta.activity == {
+        (1, 100, "2024-03"): [Decimal("-3.00"), 2],
+        (1, 100, "2024-04"): [Decimal("-4.00"), 1],
+        (1, 101, "2024-03"): [Decimal("-8.00"), 1],
+    }
+
+
+def test_uncategorized_rows_only_move_balances():
+    delta = LedgerDelta()
+    delta.add(transaction(category_id=None))
+
+    assert delta.balances == {10: [ZERO, Decimal("-12.34")]}
+    assert delta.activity == {}
+
+
+def test_remove_cancels_add():
+    delta = LedgerDelta()
+    row = transaction()
+    delta.add(row)
+    delta.remove(row)
+
+    assert delta.balances == {10: [ZERO, ZERO]}
+    assert delta.activity == {(1, 100, "2024-03"): [ZERO, 0]}
+
+
+def test_update_moves_totals_between_keys():
+    # An update is a remove of the old values plus an add of the new ones
+    old = transaction(cleared=False)
+    new = transaction(cleared=True, category_id=101, date=date(2024, 4, 2))
+    delta = LedgerDelta()
+    delta.remove(old)
+    delta.add(new)
+
+    assert delta.balances == {10: [Decimal("-12.34"), Decimal("12.34")]}
+    assert delta.activity == {
+        (1, 100, "2024-03"): [Decimal("12.34"), -1],
+        (1, 101, "2024-04"): [Decimal("-12.34"), 1],
+    }
+
+
+async def test_apply_updates_stored_totals(db, user):
+    account = Account(user_id=user.id, name="Checking", type=AccountType.CHECKING)
+    group = CategoryGroup(user_id=user.id, name="Bills")
+    db.add_all([account, group])
+    await db.flush()
+    category = Category(user_id=user.id, category_group_id=group.id, name="Rent")
+    db.add(category)
+    await db.flush()
+
+    delta = LedgerDelta()
+    for amount, cleared in ((Decimal("-100.00"), True), (Decimal("-20.00"), False)):
+        delta.add(transaction(
+            user_id=user.id, account_id=account.id, category_id=category.id,
+            amount=amount, cleared=cleared
+        ))
+    await delta.apply(db)
+    assert delta.balances == {}
+    assert delta.activity == {}
+
+    # Deltas apply on top of what is stored
+    delta.remove(transaction(
+        user_id=user.id, account_id=account.id, category_id=category.id,
+        amount=Decimal("-20.00")
+    ))
+    await delta.apply(db)
+    await db.commit()
+
+    await db.refresh(account)
+    assert (account.balance, account.cleared_balance, account.uncleared_balance) == (
+        Decimal("-100.00"), Decimal("-100.00"), ZERO
+    )
+    activity = (await db.execute(
+        select(CategoryMonthActivity.activity, CategoryMonthActivity.transaction_count)
+        .where(CategoryMonthActivity.category_id == category.id)
+    )).all()
+    assert activity == [(Decimal("-100.00"), 1)]
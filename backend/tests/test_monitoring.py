@@ -0,0 +1,34 @@
+"""Access to the internal /metrics and /stats endpoints"""
+
+import httpx
+import pytest
+
+from app.config import settings
+from app.main import app
+
+
+@pytest.fixture
+async def anonymous():
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        yield client
+
+
+@pytest.mark.parametrize("path", ["/metrics", "/stats"])
+async def test_disabled_without_token_setting(anonymous, monkeypatch, path):
+    monkeypatch.setattr(settings, "metrics_token", None)
+    response = await anonymous.get(path, headers={"Authorization": "Bearer anything"})
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize("path", ["/metrics", "/stats"])
+async def test_require_token(anonymous, monkeypatch, path):
+    monkeypatch.setattr(settings, "metrics_token", "s3cret")
+
+    assert (await anonymous.get(path)).status_code == 401
+    response = await anonymous.get(path, headers={"Authorization": "Bearer wrong"})
+    assert response.status_code == 401
+
+    response = await anonymous.get(path, headers={"Authorization": "Bearer s3cret"})
+    assert response.status_code == 200
@@ -0,0 +1,50 @@
+from datetime import date
+
+import pytest
+
+from app.pagination import (
+    decode_cursor,
+    decode_sync_token,
+    encode_cursor,
+    encode_sync_token,
+)
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(date(2024, 2, 29), 12345)
+    assert decode_cursor(cursor) == (date(2024, 2, 29), 12345)
+
+
+def test_cursor_is_url_safe_without_padding():
+    for row_id in range(1, 50):
+        cursor = encode_cursor(date(2024, 1, 1), row_id)
+        assert "=" not in cursor
+        assert set(cursor) <= set(
+            "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+        )
+
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "not a cursor",
+    encode_sync_token(1, "account", 2),
+    encode_cursor(date(2024, 1, 1), 1)[:-3],
+])
+def test_decode_cursor_rejects_malformed(cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(cursor)
+
+
+def test_sync_token_round_trip():
+    token = encode_sync_token(42, "transaction", 7)
+    assert decode_sync_token(token) == (42, "transaction", 7)
+
+
+@pytest.mark.parametrize("token", [
+    "",
+    "%%%",
+    encode_cursor(date(2024, 1, 1), 1),
+])
+def test_decode_sync_token_rejects_malformed(token):
+    with pytest.raises(ValueError, match="Invalid sync token"):
+        decode_sync_token(token)
@@ -0,0 +1,59 @@
+from sqlalchemy import func, select
+
+from app.config import settings
+
+from app.middleware.auth import principal_cache
+from app.models import Transaction, User
+from app.services.purge import PurgeJob, purge_user, purges
+
+
+async def test_purge_user_deletes_in_chunks_and_evicts_principal(client, db, user):
+    account = (await client.post(
+        "/api/accounts/", json={"name": "Checking", "type": "checking"}
+    )).json()
+    for i in range(5):
+        await client.post("/api/transactions/", json={
+            "account_id": account["id"], "date": "2024-03-05", "payee": f"Payee {i}",
+            "amount": "-1.00",
+        })
+    principal_cache.set(user.clerk_user_id, (user.id, user.email))
+    chunks = []
+
+    deleted = await purge_user(user.id, chunk_size=2, on_chunk=chunks.append)
+
+    assert deleted == 5
+    assert chunks == [2, 4, 5]
+    assert principal_cache.get(user.clerk_user_id) is None
+    assert (await db.execute(select(User.id).where(User.id == user.id))).first() is None
+    count = select(func.count()).where(Transaction.user_id == user.id)
+    assert (await db.execute(count)).scalar_one() == 0
+
+
+def test_purge_job_times_are_utc():
+    job = PurgeJob(entity="user", entity_id=1, user_id=1)
+    assert job.created_at.utcoffset().total_seconds() == 0
+
+
+async def test_delete_large_account_purges_in_background(client, db, user, monkeypatch):
+    monkeypatch.setattr(settings, "purge_background_threshold", 2)
+    monkeypatch.setattr(settings, "purge_chunk_size", 2)
+    account = (await client.post(
+        "/api/accounts/", json={"name": "Checking", "type": "checking"}
+    )).json()
+    for i in range(5):
+        await client.post("/api/transactions/", json={
+            "account_id": account["id"], "date": "2024-03-05", "payee": f"Payee {i}",
+            "amount": "-1.00",
+        })
+
+    response = await client.delete(f"/api/accounts/{account['id']}")
+    assert response.status_code == 202
+    assert response.json()["status"] == "pending"
+    # The purge runs under strict query budgets too, but not the request's
+    await purges._task
+
+    job = (await client.get(response.headers["Location"])).json()
+    assert (job["status"], job["total"], job["deleted"], job["error"]) == ("done", 5, 5, None)
+    assert (await client.get(f"/api/accounts/{account['id']}")).status_code == 404
+    count = select(func.count()).where(Transaction.user_id == user.id)
+    assert (await db.execute(count)).scalar_one() == 0
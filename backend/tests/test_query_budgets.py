@@ -0,0 +1,131 @@
+"""Endpoints stay within their query budgets, which fail requests in strict mode"""
+
+import httpx
+import pytest
+from fastapi import Depends, FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import get_db
+from app.metrics import QueryBudgetExceeded
+from app.middleware import get_current_user, query_budget
+from app.middleware.metrics import MetricsMiddleware
+from app.services.ledger import check_activity, check_balances
+
+
+async def test_strict_budget_fails_the_request(user, monkeypatch):
+    monkeypatch.setattr(settings, "query_debug", True)
+    monkeypatch.setattr(settings, "query_budget_strict", True)
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+    app.dependency_overrides[get_current_user] = lambda: user
+
+    @app.get("/two", dependencies=[Depends(query_budget(1))])
+    async def two_statements(db: AsyncSession = Depends(get_db)):
+        await db.execute(text("SELECT 1"))
+        await db.execute(text("SELECT 2"))
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        with pytest.raises(QueryBudgetExceeded, match="statement 2 exceeds the query budget"):
+            await client.get("/two")
+
+
+async def test_endpoints_stay_within_budget(client, db, user):
+    """Walk through the write and read endpoints; any budget overrun raises"""
+    account = (await client.post(
+        "/api/accounts/", json={"name": "Checking", "type": "checking"}
+    )).json()
+    group = (await client.post("/api/categories/groups", json={"name": "Bills"})).json()
+    rent, power = [
+        (await client.post(
+            "/api/categories/", json={"name": name, "category_group_id": group["id"]}
+        )).json()
+        for name in ("Rent", "Power")
+    ]
+
+    response = await client.post("/api/transactions/", json={
+        "account_id": account["id"],
+        "category_id": rent["id"],
+        "date": "2024-03-05",
+        "payee": "Landlord",
+        "amount": "-1200.00",
+    })
+    assert response.status_code == 201
+    txn = response.json()
+    response = await client.put(
+        f"/api/transactions/{txn['id']}", json={"cleared": True, "category_id": power["id"]}
+    )
+    assert response.status_code == 200
+
+    for method, url, body in [
+        ("GET", "/api/accounts/", None),
+        ("GET", f"/api/accounts/{account['id']}", None),
+        ("PUT", f"/api/accounts/{account['id']}", {"name": "Main"}),
+        ("GET", "/api/categories/tree", None),
+        ("PUT", f"/api/categories/{rent['id']}", {"name": "Housing"}),
+        ("PUT", "/api/categories/order", {
+            "group_ids": [group["id"]],
+            "groups": [{"id": group["id"], "category_ids": [power["id"], rent["id"]]}],
+        }),
+        ("POST", "/api/budget/", {
+            "category_id": rent["id"], "month": "2024-03", "amount": "1200.00"
+        }),
+        ("PUT", "/api/budget/bulk", {"allocations": [
+            {"category_id": rent["id"], "month": "2024-04", "amount": "1200.00"},
+            {"category_id": power["id"], "month": "2024-04", "amount": "80.00"},
+        ]}),
+        ("POST", "/api/budget/copy", {"from_month": "2024-04", "to_month": "2024-05"}),
+        ("GET", "/api/budget/?month=2024-04", None),
+        ("GET", "/api/budget/summary?month=2024-03", None),
+        ("GET", "/api/transactions/?limit=10", None),
+        ("GET", f"/api/transactions/{txn['id']}", None),
+        ("GET", "/api/sync?limit=100", None),
+        ("POST", f"/api/categories/{rent['id']}/merge", {"target_category_id": power["id"]}),
+        ("DELETE", f"/api/transactions/{txn['id']}", None),
+    ]:
+        response = await client.request(method, url, json=body)
+        assert response.status_code < 300, (method, url, response.text)
+        assert "X-Query-Count" in response.headers
+
+    assert await check_balances(db, user.id) == []
+    assert await check_activity(db, user.id) == []
+
+
+async def test_batch_with_many_update_shapes_runs_without_budget(client, db, user):
+    account = (await client.post(
+        "/api/accounts/", json={"name": "Checking", "type": "checking"}
+    )).json()
+
+    def new(i: int) -> dict:
+        return {"op": "create", "data": {
+            "account_id": account["id"], "date": "2024-03-05", "payee": f"Payee {i}",
+            "amount": "-1.00",
+        }}
+
+    response = await client.post(
+        "/api/transactions/batch", json={"operations": [new(i) for i in range(6)]}
+    )
+    assert response.status_code == 200
+    ids = [result["id"] for result in response.json()["results"]]
+
+    # Five distinct sets of changed fields, each its own UPDATE
+    changes = [
+        {"cleared": True},
+        {"amount": "-2.00"},
+        {"payee": "Renamed"},
+        {"memo": "note"},
+        {"date": "2024-04-01", "amount": "-3.00"},
+    ]
+    operations = [
+        {"op": "update", "id": txn_id, "data": data}
+        for txn_id, data in zip(ids[:5], changes, strict=True)
+    ]
+    operations += [{"op": "delete", "id": ids[5]}] + [new(i) for i in range(1000 - 6)]
+    response = await client.post("/api/transactions/batch", json={"operations": operations})
+
+    assert response.status_code == 200
+    assert int(response.headers["X-Query-Count"]) > 8
+    assert await check_balances(db, user.id) == []
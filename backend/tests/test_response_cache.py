@@ -0,0 +1,34 @@
+import pytest
+
+from app.cache import MemoryResponseCache
+from app.services import response_cache, versioning
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = MemoryResponseCache(max_entries=100, max_bytes=1024 * 1024, ttl_seconds=60)
+    monkeypatch.setattr(response_cache, "response_cache", cache)
+    monkeypatch.setattr(versioning, "response_cache", cache)
+    return cache
+
+
+async def test_cached_reads_are_dropped_by_any_write(client, cache):
+    await client.post("/api/accounts/", json={"name": "Checking", "type": "checking"})
+    await client.get("/api/accounts/")
+    first = await client.get("/api/categories/tree")
+    assert len(cache) == 2
+
+    second = await client.get("/api/categories/tree")
+    assert cache.hits == 1
+    assert second.content == first.content
+    assert second.headers["ETag"] == first.headers["ETag"]
+
+    # A category write makes the cached account list unreachable too, since
+    # it bumps the one data version every key of the user carries
+    await client.post("/api/categories/groups", json={"name": "Bills"})
+    assert len(cache) == 0
+
+    accounts = await client.get("/api/accounts/")
+    assert [account["name"] for account in accounts.json()] == ["Checking"]
+    tree = await client.get("/api/categories/tree")
+    assert [group["name"] for group in tree.json()] == ["Bills"]
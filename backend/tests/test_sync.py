@@ -0,0 +1,69 @@
+"""GET /api/sync paging and tombstones"""
+
+
+async def create_transactions(client, count: int) -> tuple[int, list[int]]:
+    account = await client.post("/api/accounts/", json={"name": "Checking", "type": "checking"})
+    account_id = account.json()["id"]
+    ids = []
+    for day in range(1, count + 1):
+        response = await client.post("/api/transactions/", json={
+            "account_id": account_id,
+            "date": f"2024-03-{day:02d}",
+            "payee": f"Payee {day}",
+            "amount": "-1.00",
+        })
+        ids.append(response.json()["id"])
+    return account_id, ids
+
+
+async def sync_all(client, since: str | None = None, limit: int = 500) -> tuple[list[dict], str]:
+    """Page through GET /api/sync, returning every change and the final token"""
+    changes = []
+    while True:
+        params = {"limit": limit} | ({"since": since} if since else {})
+        response = await client.get("/api/sync", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        changes += page["changes"]
+        since = page["next_token"]
+        if not page["has_more"]:
+            return changes, since
+
+
+async def test_paging_returns_each_change_once(client):
+    account_id, transaction_ids = await create_transactions(client, 7)
+
+    changes, token = await sync_all(client, limit=2)
+    keys = [(change["entity"], change["id"]) for change in changes]
+    assert len(keys) == len(set(keys))
+    assert ("accounts", account_id) in keys
+    assert sorted(id for entity, id in keys if entity == "transactions") == transaction_ids
+    assert not any(change["deleted"] for change in changes)
+
+    # Nothing changed, so a sync from the final token is empty
+    assert await sync_all(client, since=token) == ([], token)
+
+
+async def test_deletes_are_tombstones_only_for_incremental_syncs(client):
+    _, transaction_ids = await create_transactions(client, 3)
+    _, token = await sync_all(client)
+
+    deleted_id = transaction_ids[1]
+    response = await client.delete(f"/api/transactions/{deleted_id}")
+    assert response.status_code == 204
+
+    changes, _ = await sync_all(client, since=token)
+    tombstones = [change for change in changes if change["deleted"]]
+    assert [(change["entity"], change["id"], change["data"]) for change in tombstones] == [
+        ("transactions", deleted_id, None)
+    ]
+
+    changes, _ = await sync_all(client)
+    synced_ids = {change["id"] for change in changes if change["entity"] == "transactions"}
+    assert synced_ids == {transaction_ids[0], transaction_ids[2]}
+    assert not any(change["deleted"] for change in changes)
+
+
+async def test_malformed_token_is_rejected(client):
+    response = await client.get("/api/sync", params={"since": "not-a-token"})
+    assert response.status_code == 400